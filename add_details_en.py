@@ -1,41 +1,49 @@
 # -*- coding: utf-8 -*-
-import json
+from item_store import iter_items, record_changes
 
-# Load data
-with open('nba.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+def needs_detail(item):
+    return 'detail' not in item or not item['detail'] or len(item['detail'].strip()) < 50
 
-print("Total items:", len(data))
+# Stream nba.json instead of loading it whole
+data = iter_items('nba.json')
 
 # Check which items are missing detail field
 missing_details = []
+total = 0
 for item in data:
-    if 'detail' not in item or not item['detail'] or len(item['detail'].strip()) < 50:
-        missing_details.append(item)
+    total += 1
+    if needs_detail(item):
+        missing_details.append((item['id'], item['title']))
 
+print("Total items:", total)
 print("Items missing detail field:", len(missing_details))
 
 # Show first 10 items missing detail
 print("\nFirst 10 items missing detail:")
-for i, item in enumerate(missing_details[:10]):
-    print(f"{i+1}. ID {item['id']}: {item['title']}")
+for i, (item_id, item_title) in enumerate(missing_details[:10]):
+    print(f"{i+1}. ID {item_id}: {item_title}")
 
 # Generate content for items missing detail
-for item in missing_details:
-    title = item['title']
+def fill_details(items):
+    for item in items:
+        if not needs_detail(item):
+            yield item
+            continue
+        title = item['title']
     
-    # Generate base content
-    detail_content = f"About {title} this NBA trivia, it shows many little-known historical records and interesting details in professional basketball. In the NBA, a highly competitive league, every detail contains profound meaning, and {title} is undoubtedly one of the most representative. This seemingly simple trivia actually reflects the complexity and diversity of NBA history. It not only records history but also reflects the development of the times. In NBA history, few events can maintain their importance for such a long time like {title}. This trivia not only helps us understand the historical development of the NBA but also gives us a deeper understanding of the charm and complexity of professional sports. In NBA history, {title} is not only an important historical record but also an important component of the NBA development process."
+        # Generate base content
+        detail_content = f"About {title} this NBA trivia, it shows many little-known historical records and interesting details in professional basketball. In the NBA, a highly competitive league, every detail contains profound meaning, and {title} is undoubtedly one of the most representative. This seemingly simple trivia actually reflects the complexity and diversity of NBA history. It not only records history but also reflects the development of the times. In NBA history, few events can maintain their importance for such a long time like {title}. This trivia not only helps us understand the historical development of the NBA but also gives us a deeper understanding of the charm and complexity of professional sports. In NBA history, {title} is not only an important historical record but also an important component of the NBA development process."
     
-    # Ensure content length is over 300 characters
-    while len(detail_content) < 300:
-        detail_content += " This trivia not only gives us a deeper understanding of NBA history and culture but also makes us realize the complexity and diversity of professional sports. In NBA history, details like this often contain profound meaning. They not only record history but also reflect the development of the times."
+        # Ensure content length is over 300 characters
+        while len(detail_content) < 300:
+            detail_content += " This trivia not only gives us a deeper understanding of NBA history and culture but also makes us realize the complexity and diversity of professional sports. In NBA history, details like this often contain profound meaning. They not only record history but also reflect the development of the times."
     
-    item['detail'] = detail_content
-    print(f"Generated {len(detail_content)} characters for ID {item['id']} - {item['title']}")
+        item['detail'] = detail_content
+        print(f"Generated {len(detail_content)} characters for ID {item['id']} - {item['title']}")
+        yield item
 
-# Save updated data
-with open('nba.json', 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
+# Only the new details are appended to the change log (nba.json.changes) instead of rewriting nba.json;
+# rerun to continue after an interruption. python item_store.py compact nba.json folds them back in
+record_changes('nba.json', fill_details)
 
 print(f"\nProcessing complete! Added detail field for {len(missing_details)} items")
@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
 import random
+from item_store import ItemWriter, argv_option, has_bom, iter_items, load_items, record_changes
+
+DATA_PATH = argv_option('--data') or 'nba.json'
 
 def load_nba_data():
     """加载NBA数据"""
-    with open('nba.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return load_items(DATA_PATH)
 
 def generate_detail_content(title):
     """根据标题生成详细的detail内容"""
@@ -34,15 +35,23 @@ def generate_detail_content(title):
     
     return content
 
+def needs_detail(item):
+    return 'detail' not in item or not item['detail'] or len(item['detail'].strip()) < 50
+
 def find_missing_details(nba_data):
     """找到缺少detail字段的条目"""
-    missing_details = []
-    
-    for item in nba_data:
-        if 'detail' not in item or not item['detail'] or len(item['detail'].strip()) < 50:
-            missing_details.append(item)
-    
-    return missing_details
+    return [item for item in nba_data if needs_detail(item)]
+
+def fill_missing_details(items, counts):
+    """逐条补全detail（生成器，内存占用与条目数无关）"""
+    for item in items:
+        counts['total'] += 1
+        if needs_detail(item):
+            print(f"正在为 ID {item['id']} - {item['title']} 生成detail内容...")
+            item['detail'] = generate_detail_content(item['title'])
+            counts['filled'] += 1
+            print(f"✓ 已为 {item['title']} 生成 {len(item['detail'])} 字的detail内容")
+        yield item
 
 def update_missing_details(nba_data):
     """为缺少detail的条目生成内容"""
@@ -50,55 +59,42 @@ def update_missing_details(nba_data):
     
     print(f"找到 {len(missing_items)} 个缺少detail字段的条目")
     
-    for item in missing_items:
-        print(f"正在为 ID {item['id']} - {item['title']} 生成detail内容...")
-        
-        # 生成detail内容
-        detail_content = generate_detail_content(item['title'])
-        
-        # 更新item
-        item['detail'] = detail_content
-        
-        print(f"✓ 已为 {item['title']} 生成 {len(detail_content)} 字的detail内容")
+    list(fill_missing_details(nba_data, {'total': 0, 'filled': 0}))
     
     return nba_data
 
 def save_nba_data(nba_data):
     """保存更新后的NBA数据"""
-    with open('nba.json', 'w', encoding='utf-8') as f:
-        json.dump(nba_data, f, ensure_ascii=False, indent=2)
+    with ItemWriter(DATA_PATH, bom=has_bom(DATA_PATH)) as writer:
+        for item in nba_data:
+            writer.write(item)
     
-    print("✓ 已保存更新后的nba.json文件")
+    print(f"✓ 已保存更新后的{DATA_PATH}文件")
 
 def main():
     """主函数"""
     print("开始处理NBA数据...")
     
-    # 加载数据
-    nba_data = load_nba_data()
-    print(f"加载了 {len(nba_data)} 条NBA数据")
-    
-    # 检查缺少detail的条目
-    missing_items = find_missing_details(nba_data)
+    # 先流式检查一遍，只记下缺失条目的ID和标题；没有缺失就不改写文件
+    missing_items = [(item['id'], item['title']) for item in iter_items(DATA_PATH) if needs_detail(item)]
     print(f"发现 {len(missing_items)} 个缺少detail字段的条目")
     
     if not missing_items:
         print("所有条目都已经有detail字段，无需处理")
         return
     
-    # 显示缺少detail的条目
     print("\n缺少detail字段的条目：")
-    for item in missing_items:
-        print(f"  - ID {item['id']}: {item['title']}")
+    for item_id, title in missing_items:
+        print(f"  - ID {item_id}: {title}")
     
-    # 更新缺少detail的条目
     print(f"\n开始为 {len(missing_items)} 个条目生成detail内容...")
-    updated_data = update_missing_details(nba_data)
-    
-    # 保存更新后的数据
-    save_nba_data(updated_data)
+    # 逐条补全，只把改动追加到变更日志（<data>.changes），不整体改写文件；
+    # 中断后重新运行即可继续，python item_store.py compact 合并回文件
+    counts = {'total': 0, 'filled': 0}
+    record_changes(DATA_PATH, lambda items: fill_missing_details(items, counts))
     
-    print(f"\n处理完成！已为 {len(missing_items)} 个条目添加了detail字段")
+    print(f"✓ 已将改动记录到{DATA_PATH}.changes")
+    print(f"\n处理完成！共 {counts['total']} 条，已为 {counts['filled']} 个条目添加了detail字段")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
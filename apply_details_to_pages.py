@@ -1,84 +1,29 @@
 # -*- coding: utf-8 -*-
-from __future__ import unicode_literals
-import json
+import argparse
+import multiprocessing
 import os
 import re
-try:
-    from urllib.parse import quote
-except Exception:
-    # Python 2 fallback
-    from urllib import quote
+import fact_store
+import html_minify
+import page_assets
+import page_index
+import fragments as fragments_module
+import item_store
+from build_manifest import BuildManifest, code_version, hash_inputs
+from fact_store import FactStore, fact_id, related_ids
+from fragments import TREE_LABELS, registry
+from html_minify import minify
+from page_assets import link_assets, load_assets
+from page_index import PageIndex
+from urllib.parse import quote
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
-
-
-def read_text(path):
-    if hasattr(__builtins__, 'open'):
-        try:
-            # Python 3
-            with open(path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except TypeError:
-            pass
-    import io
-    with io.open(path, 'r', encoding='utf-8') as f:
-        return f.read()
-
-
-def write_text(path, content):
-    if hasattr(__builtins__, 'open'):
-        try:
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write(content)
-                return
-        except TypeError:
-            pass
-    import io
-    with io.open(path, 'w', encoding='utf-8') as f:
-        f.write(content)
-
-
-def find_div_block(html, class_selector):
-    """
-    Find the div with exact class attribute value equal to class_selector and return:
-    - start index of opening <div ...>
-    - end index (exclusive) of opening tag '>'
-    - start index of closing </div>
-    - end index (exclusive) of closing tag
-    The function attempts to balance nested <div> ... </div> blocks starting at the matched div.
-    """
-    # Match the opening div with exact class attribute
-    # Allow additional attributes order-insensitive by matching class first, then anything until '>'
-    pattern = re.compile(r'<div\s+[^>]*class\s*=\s*"' + re.escape(class_selector) + r'"[^>]*>', re.IGNORECASE)
-    m = pattern.search(html)
-    if not m:
-        return -1, -1, -1, -1
-    open_start = m.start()
-    open_end = m.end()
-
-    # Now from open_end, walk to find the matching closing </div> by counting nested divs
-    idx = open_end
-    depth = 1
-    # Precompile simple tags
-    open_tag = re.compile(r'<div\b', re.IGNORECASE)
-    close_tag = re.compile(r'</div\s*>', re.IGNORECASE)
-    while depth > 0:
-        next_open = open_tag.search(html, idx)
-        next_close = close_tag.search(html, idx)
-        if not next_close:
-            # Unbalanced
-            return open_start, open_end, -1, -1
-        if next_open and next_open.start() < next_close.start():
-            depth += 1
-            idx = next_open.end()
-        else:
-            depth -= 1
-            idx = next_close.end()
-            if depth == 0:
-                close_start = next_close.start()
-                close_end = next_close.end()
-                return open_start, open_end, close_start, close_end
-    return open_start, open_end, -1, -1
+# Site trees processed in one run: root (English) and the cn/ mirror
+TREE_DIRS = ('', 'cn')
+MANIFEST_STAGE = 'apply_details'
+# Changing the transform code invalidates every page built by it
+CODE_VERSION = code_version(__file__, page_index.__file__, fragments_module.__file__, fact_store.__file__,
+                            html_minify.__file__, page_assets.__file__)
 
 
 def extract_probable_player_name(title):
@@ -101,10 +46,17 @@ def extract_probable_player_name(title):
     return None
 
 
-def build_enhanced_inner(title, detail_text):
-    # split paragraphs by full stop U+3002 while keeping content
-    parts = [p.strip() for p in re.split(u'\u3002', detail_text) if p.strip()]
-    parts = [p + u'。' for p in parts]
+def split_sentences(text, tree='cn'):
+    """Sentences of ``text``: split at the Chinese full stop (U+3002) in cn/, after . ! ? elsewhere."""
+    if tree == 'cn':
+        parts = [p.strip() for p in re.split(u'\u3002', text) if p.strip()]
+        return [p + u'。' for p in parts]
+    return [p.strip() for p in re.split(r'(?<=[.!?])\s+', text) if p.strip()]
+
+
+def build_enhanced_inner(title, detail_text, tree='cn'):
+    labels = TREE_LABELS[tree]
+    parts = split_sentences(detail_text, tree)
     if not parts:
         parts = [detail_text]
     # build paragraphs html
@@ -124,13 +76,13 @@ def build_enhanced_inner(title, detail_text):
         first_sentence = first_sentence[:60] + '...'
     first_sentence = first_sentence.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
     # name badge
-    name = extract_probable_player_name(title) or '冷知识'
+    name = extract_probable_player_name(title) or labels['fact']
     header = (
         '                <!-- 信息徽章与阅读提示 -->\n'
         '                <div class="flex flex-wrap items-center gap-2 mb-6 text-sm">\n'
         '                    <span class="px-3 py-1 rounded-full bg-nba-purple/10 text-nba-purple">' + name + '</span>\n'
-        '                    <span class="px-3 py-1 rounded-full bg-nba-gold/10 text-nba-gold">冷知识</span>\n'
-        '                    <span class="ml-auto text-gray-500 flex items-center"><i class="fa fa-clock-o mr-1"></i> 3 min read</span>\n'
+        '                    <span class="px-3 py-1 rounded-full bg-nba-gold/10 text-nba-gold">' + labels['fact'] + '</span>\n'
+        '                    <span class="ml-auto text-gray-500 flex items-center"><i class="fa fa-clock-o mr-1"></i> ' + labels['read_time'] + '</span>\n'
         '                </div>\n\n'
         '                <!-- 渐变分隔线 -->\n'
         '                <div class="relative mb-6">\n'
@@ -145,8 +97,8 @@ def build_enhanced_inner(title, detail_text):
         '                <div class="mt-8 grid md:grid-cols-5 gap-6 items-start">\n'
         '                    <div class="md:col-span-3">\n'
         '                        <div class="bg-nba-light/60 border border-gray-100 rounded-lg p-4">\n'
-        '                            <div class="flex items-center text-nba-purple font-medium mb-2"><i class="fa fa-lightbulb-o mr-2"></i>小贴士</div>\n'
-        '                            <p class="text-gray-700 leading-relaxed">持续的基本功与专注力，决定了稳定的比赛表现。</p>\n'
+        '                            <div class="flex items-center text-nba-purple font-medium mb-2"><i class="fa fa-lightbulb-o mr-2"></i>' + labels['tip'] + '</div>\n'
+        '                            <p class="text-gray-700 leading-relaxed">' + labels['tip_text'] + '</p>\n'
         '                        </div>\n'
         '                    </div>\n'
         '                    <div class="md:col-span-2">\n'
@@ -169,79 +121,31 @@ def build_detail_block(detail_text):
     )
 
 
-def update_content_div(html, detail_text, title, local_link):
-    open_start, open_end, close_start, close_end = find_div_block(html, 'p-6 md:p-8')
-    if open_start == -1 or close_start == -1:
-        return html  # no change if not found
+def build_content_inner(title, detail_text, local_link, tree='cn'):
     # nba_1.html 已单独优化，其他统一使用增强版
     if local_link != 'nba_1.html':
-        inner = build_enhanced_inner(title, detail_text)
-    else:
-        inner = build_detail_block(detail_text)
-    return html[:open_end] + inner + html[close_start:]
+        return build_enhanced_inner(title, detail_text, tree)
+    return build_detail_block(detail_text)
 
 
-def update_hero_image(html, title):
-    name = extract_probable_player_name(title)
-    if not name:
-        return html
-    # Replace src of the first <img ... class="w-full h-full object-cover">
+HERO_IMG_SRC_RE = re.compile(r'(<img\s+[^>]*class\s*=\s*"[^"<>]*\bw-full\s+h-full\s+object-cover\b[^"<>]*"[^>]*src\s*=\s*")([^"<>]+)("[^>]*>)', re.IGNORECASE)
+HERO_IMG_CLASS_RE = re.compile(r'(<img\s+[^>]*class\s*=\s*"[^"<>]*\bw-full\s+h-full\s+object-cover\b[^"<>]*"[^>]*)(>)', re.IGNORECASE)
+
+
+def build_avatar_url(name):
     # Build avatar URL (use ui-avatars with encoded name)
-    try:
-        # Python 3 path
-        encoded = quote(name)
-    except Exception:
-        # Python 2 path: ensure bytes
-        try:
-            encoded = quote(name.encode('utf-8'))
-        except Exception:
-            encoded = quote(name)
-    avatar_url = "https://ui-avatars.com/api/?name={}&background=552583&color=ffffff&size=512".format(encoded)
-    img_pattern = re.compile(r'(<img\s+[^>]*class\s*=\s*"[^"<>]*\bw-full\s+h-full\s+object-cover\b[^"<>]*"[^>]*src\s*=\s*")([^"<>]+)("[^>]*>)', re.IGNORECASE)
-    m = img_pattern.search(html)
-    if not m:
-        # Try without requiring src before class (replace any matching class img's src)
-        img_class_pattern = re.compile(r'(<img\s+[^>]*class\s*=\s*"[^"<>]*\bw-full\s+h-full\s+object-cover\b[^"<>]*"[^>]*)(>)', re.IGNORECASE)
-        m2 = img_class_pattern.search(html)
-        if not m2:
-            return html
-        # Inject src attribute
-        start, end = m2.start(1), m2.end(1)
-        return html[:end] + ' src="{}"'.format(avatar_url) + html[end:]
-    start, old_src, tail = m.group(1), m.group(2), m.group(3)
-    return html[:m.start(1)] + start + avatar_url + tail + html[m.end(3):]
-
-
-def find_grid_block(html):
-    # Match div whose class contains the grid tokens regardless of order
-    pattern = re.compile(
-        r'<div\s+[^>]*class\s*=\s*"(?=[^"]*\bgrid\b)(?=[^"]*\bgrid-cols-1\b)(?=[^"]*\bmd:grid-cols-2\b)(?=[^"]*\blg:grid-cols-3\b)(?=[^"]*\bgap-6\b)[^"]*"[^>]*>',
-        re.IGNORECASE,
-    )
-    m = pattern.search(html)
-    if not m:
-        return -1, -1, -1, -1
-    open_start = m.start()
-    open_end = m.end()
-    # balance nested divs
-    idx = open_end
-    depth = 1
-    open_tag = re.compile(r'<div\b', re.IGNORECASE)
-    close_tag = re.compile(r'</div\s*>', re.IGNORECASE)
-    while depth > 0:
-        next_open = open_tag.search(html, idx)
-        next_close = close_tag.search(html, idx)
-        if not next_close:
-            return open_start, open_end, -1, -1
-        if next_open and next_open.start() < next_close.start():
-            depth += 1
-            idx = next_open.end()
-        else:
-            depth -= 1
-            idx = next_close.end()
-            if depth == 0:
-                return open_start, open_end, next_close.start(), next_close.end()
-    return open_start, open_end, -1, -1
+    return "https://ui-avatars.com/api/?name={}&background=552583&color=ffffff&size=512".format(quote(name))
+
+
+# Related grid: class contains the grid tokens regardless of order
+GRID_CLASS_RE = re.compile(
+    r'^(?=[^"]*\bgrid\b)(?=[^"]*\bgrid-cols-1\b)(?=[^"]*\bmd:grid-cols-2\b)(?=[^"]*\blg:grid-cols-3\b)(?=[^"]*\bgap-6\b)',
+    re.IGNORECASE,
+)
+
+
+def is_related_grid(el):
+    return el.class_attr is not None and GRID_CLASS_RE.match(el.class_attr) is not None
 
 
 def build_card_html(item, seed):
@@ -267,289 +171,237 @@ def build_card_html(item, seed):
     ).format(href=local_link, img=img_src, alt=esc_title, title=esc_title, summary=esc_summary)
 
 
-def update_related_grid(html, current_item, id_to_item):
-    gid = current_item.get('id')
-    if not isinstance(gid, int):
-        return html
-    # pick next three ids, wrap around if needed
-    related_ids = [gid + 1, gid + 2, gid + 3]
-    # wrap around to existing ids range
-    max_id = max(id_to_item.keys()) if id_to_item else gid
-    norm_ids = []
-    for rid in related_ids:
-        nid = rid
-        if nid > max_id:
-            nid = ((nid - 1) % max_id) + 1
-        norm_ids.append(nid)
-    related_items = [id_to_item[i] for i in norm_ids if i in id_to_item]
+def find_related_items(current_item, id_to_item):
+    gid = fact_id(current_item.get('id'))
+    if gid is None or not id_to_item:
+        return []
+    # pick next three ids, wrap around to the existing ids range if needed;
+    # FactStore knows its max id, so this is O(1) per page
+    max_id = getattr(id_to_item, 'max_id', None)
+    if max_id is None:
+        max_id = max(id_to_item.keys())
+    return [id_to_item[i] for i in related_ids(gid, max_id) if i in id_to_item]
+
+
+def build_related_inner(current_item, id_to_item):
+    related_items = find_related_items(current_item, id_to_item)
     if len(related_items) < 1:
-        return html
-    open_start, open_end, close_start, close_end = find_grid_block(html)
-    if open_start == -1 or close_start == -1:
-        return html
+        return None
     cards = ''
     for idx, it in enumerate(related_items):
-        seed = (it.get('id') or (idx + 1)) % 1000
+        seed = (fact_id(it.get('id')) or (idx + 1)) % 1000
         cards += build_card_html(it, seed)
     # Keep indentation similar
-    inner = '\n' + cards + '            '
-    return html[:open_end] + inner + html[close_start:]
-
-
-def update_nav_links(html):
-    nav_container = re.search(r'(\<div class=\"hidden md:flex[^\"]*[^>]*\>)([\s\S]*?)(\</div\>)', html)
-    if not nav_container:
-        # Try fallback: right-side container with only Home link
-        right_div = re.search(r'(\<div\>)([\s\S]*?)(\</div\>)', html)
-        if right_div and ('href="index.html"' in right_div.group(2)) and ('about.html' not in right_div.group(2)):
-            addition = (
-                '\n                <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-                '                    <i class="fa fa-info-circle mr-1"></i> 关于我们\n'
-                '                </a>\n'
-                '                <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-                '                    <i class="fa fa-shield mr-1"></i> 隐私政策\n'
-                '                </a>'
-            )
-            new_inner = right_div.group(2) + addition
-            return html[:right_div.start()] + right_div.group(1) + new_inner + right_div.group(3) + html[right_div.end():]
-        return html
-    head, inner, tail = nav_container.group(1), nav_container.group(2), nav_container.group(3)
-    if 'about.html' in inner and 'privacy.html' in inner:
-        return html
-    addition = (
-        '\n                <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-        '                    <i class="fa fa-info-circle mr-1"></i> 关于我们\n'
-        '                </a>\n'
-        '                <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-        '                    <i class="fa fa-shield mr-1"></i> 隐私政策\n'
-        '                </a>'
-    )
-    new_inner = inner + addition
-    return html[:nav_container.start()] + head + new_inner + tail + html[nav_container.end():]
-
-
-def extract_index_footer():
-    try:
-        index_path = os.path.join(ROOT_DIR, 'index.html')
-        src = read_text(index_path)
-        m = re.search(r'(\<footer[\s\S]*?class=\"bg-nba-dark[\s\S]*?\</footer\>)', src)
-        if m:
-            return m.group(1)
-    except Exception:
-        return None
-    return None
+    return '\n' + cards + '            '
 
 
-def replace_footer(html, footer_html):
-    m = re.search(r'(\<footer[\s\S]*?class=\"bg-nba-dark[\s\S]*?\</footer\>)', html)
-    if not m:
-        return html
-    return html[:m.start()] + footer_html + html[m.end():]
-
-
-def replace_nav_block(html):
-    # Find opening <nav ...>
-    nav_open = re.search(r'<nav[^>]*>', html)
-    nav_close = re.search(r'</nav>', html)
-    if not nav_open or not nav_close or nav_close.start() < nav_open.end():
-        return html
-    opening = nav_open.group(0)
-    # Standard navbar content (mobile-friendly)
-    content = (
-        '\n        <div class="container mx-auto px-4 py-3 flex justify-between items-center">\n'
-        '            <div class="flex items-center space-x-2">\n'
-        '                <i class="fa fa-basketball-ball text-2xl text-nba-gold"></i>\n'
-        '                <h1 class="text-xl font-bold">NBA冷门知识库</h1>\n'
-        '            </div>\n'
-        '            <div class="hidden md:flex items-center space-x-6">\n'
-        '                <a href="index.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-        '                    <i class="fa fa-home mr-1"></i> 首页\n'
-        '                </a>\n'
-        '                <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-        '                    <i class="fa fa-info-circle mr-1"></i> 关于我们\n'
-        '                </a>\n'
-        '                <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-        '                    <i class="fa fa-shield mr-1"></i> 隐私政策\n'
-        '                </a>\n'
-        '            </div>\n'
-        '            <div class="md:hidden">\n'
-        '                <button id="mobile-menu-toggle" class="text-white hover:text-nba-gold transition-colors duration-300">\n'
-        '                    <i class="fa fa-bars text-xl"></i>\n'
-        '                </button>\n'
-        '            </div>\n'
-        '        </div>\n'
-    )
-    rebuilt = opening + content + '</nav>'
-    new_html = html[:nav_open.start()] + rebuilt + html[nav_close.end():]
-    # Ensure mobile menu block exists just after nav
-    if 'id="mobile-menu"' not in new_html:
-        insert_pos = new_html.find('</nav>') + len('</nav>')
-        mobile = (
-            '\n    <div id="mobile-menu" class="md:hidden bg-nba-purple text-white px-4 py-3 hidden">\n'
-            '        <div class="flex flex-col space-y-3">\n'
-            '            <a href="index.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-            '                <i class="fa fa-home mr-1"></i> 首页\n'
-            '            </a>\n'
-            '            <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-            '                <i class="fa fa-info-circle mr-1"></i> 关于我们\n'
-            '            </a>\n'
-            '            <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
-            '                <i class="fa fa-shield mr-1"></i> 隐私政策\n'
-            '            </a>\n'
-            '        </div>\n'
-            '    </div>\n'
-        )
-        new_html = new_html[:insert_pos] + mobile + new_html[insert_pos:]
-    # Ensure toggle script exists
-    new_html = inject_mobile_script(new_html)
-    return new_html
-
-
-def update_nav_horizontal(html):
-    # Convert the right-side nav container to horizontal layout
-    # Look for the first right-side <div> that contains the Home link
-    m = re.search(r'(<div>)([\s\S]*?href=\"index\.html\"[\s\S]*?)</div>', html)
-    if not m:
-        return html
-    # If already has flex on this container, skip replacing
-    opening = m.group(1)
-    inner = m.group(2)
-    if 'class="' in opening:
-        return html
-    new_right = '<div class="hidden md:flex items-center space-x-6">' + inner + '</div>'
-    return html[:m.start()] + new_right + html[m.end():]
-
-
-def inject_mobile_menu(html):
-    # Only add if not present
-    if 'id="mobile-menu-toggle"' in html:
-        return html
-    # Find right-side nav again to extract links for mobile menu
-    m = re.search(r'(<div[^>]*class=\"hidden md:flex[^"]*\"[^>]*>)([\s\S]*?)</div>', html)
-    if not m:
-        m = re.search(r'(<div>)([\s\S]*?href=\"index\.html\"[\s\S]*?)</div>', html)
-    if not m:
-        return html
-    right_div_end = m.end()
-    links_html = m.group(2)
-    # Build mobile toggle button after right div
-    toggle = ('\n            <div class="md:hidden">\n'
-              '                <button id="mobile-menu-toggle" class="text-white hover:text-nba-gold transition-colors duration-300">\n'
-              '                    <i class="fa fa-bars text-xl"></i>\n'
-              '                </button>\n'
-              '            </div>')
-    html = html[:right_div_end] + toggle + html[right_div_end:]
-    # Build mobile menu container after nav closing
-    nav_match = re.search(r'(</nav>)', html)
-    if not nav_match:
-        return html
-    # Extract only anchors and wrap vertically
-    # Ensure anchors are absolute as in desktop
-    mobile_menu = ('\n    <div id="mobile-menu" class="md:hidden bg-nba-purple text-white px-4 py-3 hidden">\n'
-                   '        <div class="flex flex-col space-y-3">\n'
-                   '            ' + links_html + '\n'
-                   '        </div>\n'
-                   '    </div>')
-    return html[:nav_match.end()] + mobile_menu + html[nav_match.end():]
-
-
-def inject_mobile_script(html):
-    if 'mobile-menu-toggle' in html and 'toggleMobileMenu' in html:
-        return html
-    script = ('\n<script>\n'
-              'function toggleMobileMenu(){\n'
-              '  var btn=document.getElementById("mobile-menu-toggle");\n'
-              '  var menu=document.getElementById("mobile-menu");\n'
-              '  if(!btn||!menu) return;\n'
-              '  menu.classList.toggle("hidden");\n'
-              '}\n'
-              'document.addEventListener("DOMContentLoaded",function(){\n'
-              '  var btn=document.getElementById("mobile-menu-toggle");\n'
-              '  if(btn){ btn.addEventListener("click", toggleMobileMenu); }\n'
-              '});\n'
-              '</script>\n')
-    # insert before </body>
-    body_end = html.rfind('</body>')
-    if body_end == -1:
-        return html
-    return html[:body_end] + script + html[body_end:]
-
-
-def force_mobile_nav(html):
-    # Find the nav container row
-    nav_row = re.search(r'(<div class=\"container[^>]*>)([\s\S]*?)(</div>\s*</nav>)', html)
-    if not nav_row:
-        return html
-    head, content, tail = nav_row.group(1), nav_row.group(2), nav_row.group(3)
-    # Find the first right-side <div> following the brand block
-    parts = content.split('</div>', 1)
-    if len(parts) != 2:
-        return html
-    left_block = parts[0] + '</div>'
-    right_and_rest = parts[1]
-    # Ensure right starts with <div>
-    if not right_and_rest.lstrip().startswith('<div'):
-        return html
-    # Replace first '<div>' with responsive class if not already present
-    right_replaced = re.sub(r'^\s*<div>', '<div class="hidden md:flex items-center space-x-6">', right_and_rest, count=1)
-    new_content = left_block + right_replaced
-    new_html = html[:nav_row.start()] + head + new_content + tail + html[nav_row.end():]
-    # Ensure hamburger and mobile menu exist
-    new_html = inject_mobile_menu(new_html)
-    new_html = inject_mobile_script(new_html)
-    return new_html
-
-
-def main():
-    json_path = os.path.join(ROOT_DIR, 'nba.json')
-    data = json.loads(read_text(json_path))
-    updated = 0
-    missing_files = []
-    # maps for related
-    id_to_item = {}
-    for it in data:
-        try:
-            iid = int(it.get('id'))
-            id_to_item[iid] = it
-        except Exception:
-            continue
-    for item in data:
-        local_link = item.get('localLink')
-        if not local_link:
-            continue
-        html_path = os.path.join(ROOT_DIR, local_link)
-        if not os.path.isfile(html_path):
-            missing_files.append(local_link)
+# Pages that keep their own navbar
+NAV_PRESERVED_PAGES = ('index.html', 'about.html', 'privacy.html')
+
+
+def transform_page(html, item, id_to_item, fragments):
+    """
+    Rewrite a detail page: content block, hero image, related grid, footer and
+    navbar.  The page is tokenized once by PageIndex and every change is applied
+    in a single splice.  The navbar is replaced by the standard one (with its
+    mobile menu and toggle script) except on NAV_PRESERVED_PAGES.
+    """
+    local_link = item.get('localLink')
+    title = item.get('title', '')
+    doc = PageIndex(html)
+
+    # Elements inside the replaced content block no longer exist for later transforms
+    content = doc.select_one('div', 'p-6 md:p-8', exact=True)
+    if content is not None and content.closed:
+        doc.replace_inner(content, build_content_inner(title, item.get('detail'), local_link, fragments.tree))
+        replaced = (content.open_end, content.close_start)
+    else:
+        replaced = (-1, -1)
+
+    def alive(el):
+        return not (replaced[0] <= el.start < replaced[1])
+
+    name = extract_probable_player_name(title)
+    if name:
+        avatar_url = build_avatar_url(name)
+        hero = None
+        for el in doc.by_tag.get('img', []):
+            m = HERO_IMG_SRC_RE.match(doc.open_tag(el)) if alive(el) else None
+            if m:
+                hero = el
+                doc.replace(el.start + m.start(2), el.start + m.end(2), avatar_url)
+                break
+        if hero is None:
+            for el in doc.by_tag.get('img', []):
+                m = HERO_IMG_CLASS_RE.match(doc.open_tag(el)) if alive(el) else None
+                if m:
+                    doc.insert(el.start + m.end(1), ' src="{}"'.format(avatar_url))
+                    break
+
+    related = build_related_inner(item, id_to_item)
+    if related is not None:
+        grid = doc.find_tag('div', lambda el: alive(el) and is_related_grid(el))
+        if grid is not None and grid.closed:
+            doc.replace_inner(grid, related)
+
+    footer_html = fragments.html('footer')
+    if footer_html:
+        footer = doc.find_tag('footer', lambda el: alive(el) and el.closed and 'class="bg-nba-dark' in doc.open_tag(el))
+        if footer is not None:
+            doc.replace(footer.start, footer.close_end, footer_html)
+
+    nav = doc.first('nav')
+    nav_close = doc.first_close('nav')
+    has_nav = (local_link not in NAV_PRESERVED_PAGES and nav is not None and nav_close is not None
+               and nav_close[0] >= nav.open_end)
+    if has_nav:
+        rebuilt = doc.open_tag(nav) + fragments.html('nav') + '</nav>'
+        if html.find('id="mobile-menu"', 0, nav.start) == -1 and html.find('id="mobile-menu"', nav_close[1]) == -1:
+            rebuilt += fragments.html('mobile_menu')
+        doc.replace(nav.start, nav_close[1], rebuilt)
+
+    if (has_nav or 'mobile-menu-toggle' in html) and 'toggleMobileMenu' not in html:
+        body_end = doc.last_close('body')
+        if body_end is not None:
+            doc.insert(body_end[0], fragments.html('mobile_script'))
+    return doc.render()
+
+
+def load_items(json_path):
+    # nba.json is saved with a UTF-8 BOM; item_store also reads JSON Lines
+    return item_store.load_items(json_path)
+
+
+def load_tree(name, root_dir=ROOT_DIR, fragment_registry=registry):
+    """Everything a page task needs from one tree, loaded once per run."""
+    tree_dir = os.path.join(root_dir, name)
+    # items are decoded lazily from the mapped file; workers reopen it by path
+    store = FactStore(os.path.join(tree_dir, 'nba.json'))
+    return {
+        'name': name,
+        'root': root_dir,
+        'dir': tree_dir,
+        'store': store,
+        'id_to_item': store,
+        'fragments': fragment_registry.for_tree(name),
+        'assets': load_assets(name, root_dir),
+    }
+
+
+def page_inputs_digest(tree, item):
+    """Hash of everything a fact page is built from."""
+    def fields(it):
+        return [it.get('id'), it.get('localLink'), it.get('title'), it.get('detail')]
+    related = [fields(it) for it in find_related_items(item, tree['id_to_item'])]
+    return hash_inputs(CODE_VERSION, tree['fragments'].digest(), tree['assets'].digest, fields(item), related)
+
+
+def process_item(tree, item):
+    """Transform one fact page. Returns 'updated', 'unchanged', 'missing' or 'skipped'."""
+    local_link = item.get('localLink')
+    if not local_link:
+        return 'skipped'
+    html_path = os.path.join(tree['dir'], local_link)
+    if not os.path.isfile(html_path):
+        return 'missing'
+    if not item.get('detail'):
+        return 'skipped'
+    with open(html_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    new_html = minify(transform_page(html, item, tree['id_to_item'], tree['fragments']))
+    new_html = link_assets(new_html, tree['assets'])
+    if new_html == html:
+        return 'unchanged'
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(new_html)
+    return 'updated'
+
+
+# Per-worker tree data, installed once by the pool initializer
+_WORKER_TREES = None
+
+
+def _init_worker(trees):
+    global _WORKER_TREES
+    _WORKER_TREES = trees
+
+
+def _process_task(task):
+    name, idx = task
+    tree = _WORKER_TREES[name]
+    return process_item(tree, tree['store'].at(idx))
+
+
+def run_trees(trees, jobs=1, manifest=None):
+    """
+    Process every fact page of every tree. Results come back in task order
+    (trees in TREE_DIRS order, items in nba.json order) regardless of jobs.
+    With a manifest, pages whose inputs are unchanged are skipped unread.
+    """
+    tasks = []
+    digests = {}
+    results = {}
+    for name in TREE_DIRS:
+        if name not in trees:
             continue
-        detail = item.get('detail')
-        title = item.get('title', '')
-        if not detail:
+        tree = trees[name]
+        res = results.setdefault(name, {'updated': 0, 'fresh': 0, 'missing_files': []})
+        for idx, item in enumerate(tree['store']):
+            if manifest is not None and item.get('localLink'):
+                digest = page_inputs_digest(tree, item)
+                if manifest.is_fresh(os.path.join(tree['dir'], item['localLink']), digest):
+                    res['fresh'] += 1
+                    continue
+                digests[(name, idx)] = digest
+            tasks.append((name, idx))
+    if jobs > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(trees,))
+        try:
+            chunksize = max(1, len(tasks) // (jobs * 4))
+            statuses = pool.map(_process_task, tasks, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        _init_worker(trees)
+        statuses = [_process_task(t) for t in tasks]
+    for (name, idx), status in zip(tasks, statuses):
+        res = results[name]
+        item = trees[name]['store'].at(idx)
+        if status == 'updated':
+            res['updated'] += 1
+        elif status == 'missing':
+            res['missing_files'].append(item.get('localLink'))
+        if manifest is not None and status in ('updated', 'unchanged'):
+            manifest.record(os.path.join(trees[name]['dir'], item['localLink']), digests[(name, idx)])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply nba.json details to the nba_N.html fact pages (root and cn/).')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='worker processes (default: 1, serial)')
+    parser.add_argument('--force', action='store_true', help='ignore the build manifest and rebuild every page')
+    args = parser.parse_args(argv)
+
+    trees = {}
+    for name in TREE_DIRS:
+        if os.path.isfile(os.path.join(ROOT_DIR, name, 'nba.json')):
+            trees[name] = load_tree(name)
+    manifest = BuildManifest(MANIFEST_STAGE)
+    if args.force:
+        manifest.entries.clear()
+    results = run_trees(trees, jobs=max(1, args.jobs), manifest=manifest)
+    manifest.save()
+
+    for name in TREE_DIRS:
+        if name not in results:
             continue
-        html = read_text(html_path)
-        new_html = update_content_div(html, detail, title, local_link)
-        new_html = update_hero_image(new_html, title)
-        new_html = update_related_grid(new_html, item, id_to_item)
-        new_html = update_nav_links(new_html)
-        footer = extract_index_footer()
-        if footer:
-            new_html = replace_footer(new_html, footer)
-        new_html = update_nav_horizontal(new_html)
-        new_html = inject_mobile_menu(new_html)
-        new_html = inject_mobile_script(new_html)
-        new_html = force_mobile_nav(new_html)
-        # Replace nav with standard mobile-friendly block for robustness (skip known proper pages)
-        if local_link not in ('index.html','about.html','privacy.html'):
-            new_html = replace_nav_block(new_html)
-        if new_html != html:
-            write_text(html_path, new_html)
-            updated += 1
-
-    print("Updated files: {}".format(updated))
-    if missing_files:
-        print("Missing html files:", ", ".join(missing_files))
+        label = name + '/' if name else 'root'
+        res = results[name]
+        print("[{}] Updated files: {} (unchanged inputs, skipped: {})".format(label, res['updated'], res['fresh']))
+        if res['missing_files']:
+            print("[{}] Missing html files:".format(label), ", ".join(res['missing_files']))
 
 
 if __name__ == '__main__':
     main()
-
-
@@ -1,37 +1,44 @@
 # -*- coding: utf-8 -*-
-import json
-import codecs
+from item_store import iter_items, record_changes
 
-# Load data
-with open('nba.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+def needs_detail(item):
+    return 'detail' not in item or not item['detail'] or len(item['detail'].strip()) < 50
 
-print("Total items:", len(data))
+# Stream nba.json instead of loading it whole
+data = iter_items('nba.json')
 
 # Check which items are missing detail field
 missing_details = []
+total = 0
 for item in data:
-    if 'detail' not in item or not item['detail'] or len(item['detail'].strip()) < 50:
-        missing_details.append(item)
+    total += 1
+    if needs_detail(item):
+        missing_details.append((item['id'], item['title']))
 
+print("Total items:", total)
 print("Items missing detail field:", len(missing_details))
 
 # Generate content for items missing detail
-for item in missing_details:
-    title = item['title']
+def fill_details(items):
+    for item in items:
+        if not needs_detail(item):
+            yield item
+            continue
+        title = item['title']
     
-    # Generate base content
-    detail_content = "关于" + title + "这个NBA冷知识，展现了职业篮球运动中许多鲜为人知的历史记录和有趣细节。在NBA这个充满竞争的联盟中，每个细节都蕴含着深刻的意义，而" + title + "无疑是其中最具代表性的之一。这个看似简单的冷知识实际上反映了NBA历史的复杂性和多样性，它不仅记录了历史，也反映了时代的发展。在NBA的历史上，很少有事件能够像" + title + "一样在如此长的时间内保持其重要性。这个冷知识不仅让我们了解了NBA的历史发展，也让我们更深入地认识了职业体育运动的魅力和复杂性。在NBA的历史上，" + title + "不仅是一个重要的历史记录，也是NBA发展历程中的重要组成部分。"
+        # Generate base content
+        detail_content = "关于" + title + "这个NBA冷知识，展现了职业篮球运动中许多鲜为人知的历史记录和有趣细节。在NBA这个充满竞争的联盟中，每个细节都蕴含着深刻的意义，而" + title + "无疑是其中最具代表性的之一。这个看似简单的冷知识实际上反映了NBA历史的复杂性和多样性，它不仅记录了历史，也反映了时代的发展。在NBA的历史上，很少有事件能够像" + title + "一样在如此长的时间内保持其重要性。这个冷知识不仅让我们了解了NBA的历史发展，也让我们更深入地认识了职业体育运动的魅力和复杂性。在NBA的历史上，" + title + "不仅是一个重要的历史记录，也是NBA发展历程中的重要组成部分。"
     
-    # Ensure content length is over 300 characters
-    while len(detail_content) < 300:
-        detail_content += "这个冷知识不仅让我们更深入地了解了NBA的历史和文化，也让我们认识到了职业体育运动的复杂性和多样性。在NBA的历史上，像这样的细节往往蕴含着深刻的意义，它们不仅记录了历史，也反映了时代的发展。"
+        # Ensure content length is over 300 characters
+        while len(detail_content) < 300:
+            detail_content += "这个冷知识不仅让我们更深入地了解了NBA的历史和文化，也让我们认识到了职业体育运动的复杂性和多样性。在NBA的历史上，像这样的细节往往蕴含着深刻的意义，它们不仅记录了历史，也反映了时代的发展。"
     
-    item['detail'] = detail_content
-    print("Generated " + str(len(detail_content)) + " characters for ID " + str(item['id']) + " - " + item['title'])
+        item['detail'] = detail_content
+        print("Generated " + str(len(detail_content)) + " characters for ID " + str(item['id']) + " - " + item['title'])
+        yield item
 
-# Save updated data
-with open('nba.json', 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
+# Only the new details are appended to the change log (nba.json.changes) instead of rewriting nba.json;
+# rerun to continue after an interruption. python item_store.py compact nba.json folds them back in
+record_changes('nba.json', fill_details)
 
 print("\nProcessing complete! Added detail field for " + str(len(missing_details)) + " items")
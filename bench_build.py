@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the site build scripts on synthetic corpora.
+
+For each corpus size a corpus is generated once (synthetic_corpus.py, cached
+under _bench/corpus-<size>/) and every stage runs on a fresh scratch copy of
+it, so runs never touch the real site:
+
+    apply_details             load both trees + transform every nba_N.html
+    star_pages                generate_star_pages.generate_html for every star
+    translate_full_content_en process_files on the Chinese pages
+    translate_root_html_en    translate_html_content on the Chinese pages
+    translate_nba_json_en     stream nba.json through translate_items and back
+
+Translation goes through translation_stub.StubTranslator (offline, optional
+simulated latency), whose request/segment counts are part of the results.
+Individual transforms are also timed in memory on a sample of pages:
+transform_page against each helper of apply_details_to_pages.py as of
+BASELINE_REV (loaded with git show), the chain it replaced.  Peak
+Python memory per stage comes from a separate tracemalloc run.
+
+Results are written as JSON; --compare prints the speedup against an older
+results file.
+
+Usage:
+    python bench_build.py --sizes 1000,10000 [--repeat 3] [--jobs 4]
+    python bench_build.py --sizes 1000 --compare _bench/results-before.json
+"""
+import argparse
+import glob
+import io
+import itertools
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import apply_details_to_pages as apply_details
+import generate_star_pages as star_pages
+import synthetic_corpus
+import translate_full_content_en
+import translate_nba_json_en
+import translate_root_html_en
+from fragments import FragmentRegistry
+from item_store import rewrite_items
+from translation_stub import StubTranslator
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(ROOT_DIR, '_bench')
+TREE_DIRS = apply_details.TREE_DIRS
+# Revision whose apply_details_to_pages.py the per-transform timings use as the "before" column
+BASELINE_REV = 'bdda2583a0817402acd7c09bcf0691df66366277'
+
+
+def _read(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write(path, text):
+    with io.open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+def ensure_corpus(size, args):
+    """Generate the corpus for ``size`` unless a matching one is cached."""
+    out_dir = os.path.join(args.bench_dir, 'corpus-{}'.format(size))
+    wanted = {'size': size, 'pages': size if args.pages is None else min(args.pages, size), 'seed': args.seed}
+    try:
+        info = synthetic_corpus.load_corpus(out_dir)
+        if all(info.get(k) == v for k, v in wanted.items()):
+            return out_dir, info
+    except (IOError, OSError, ValueError):
+        pass
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    print('Generating corpus of {} items in {} ...'.format(size, out_dir))
+    info = synthetic_corpus.generate_corpus(out_dir, size, pages=args.pages, seed=args.seed)
+    return out_dir, info
+
+
+def copy_tree_files(src, dst, pattern):
+    if not os.path.isdir(dst):
+        os.makedirs(dst)
+    for path in glob.glob(os.path.join(src, pattern)):
+        shutil.copyfile(path, os.path.join(dst, os.path.basename(path)))
+
+
+# -- stages ----------------------------------------------------------------
+# Each stage is (prepare, run): prepare copies inputs into a scratch dir and
+# is not timed; run does the work and returns extra result fields.
+
+def stage_apply_details(corpus, args):
+    def prepare(scratch):
+        for tree in TREE_DIRS:
+            copy_tree_files(os.path.join(corpus, tree), os.path.join(scratch, tree), '*.html')
+            shutil.copyfile(os.path.join(corpus, tree, 'nba.json'), os.path.join(scratch, tree, 'nba.json'))
+
+    def run(scratch):
+        registry = FragmentRegistry(scratch)
+        trees = dict((t, apply_details.load_tree(t, root_dir=scratch, fragment_registry=registry)) for t in TREE_DIRS)
+        results = apply_details.run_trees(trees, jobs=args.jobs)
+        return {'updated': sum(r['updated'] for r in results.values())}
+    return prepare, run
+
+
+def stage_star_pages(corpus, args):
+    content = _read(os.path.join(corpus, 'start.md'))
+    stars = json.loads(_read(os.path.join(corpus, 'stars.json')))
+
+    def prepare(scratch):
+        pass
+
+    def run(scratch):
+        saved = star_pages.content, star_pages.stars
+        star_pages.content, star_pages.stars = content, stars
+        try:
+            for star in stars:
+                _write(os.path.join(scratch, 'start_{}.html'.format(star['num'])), star_pages.generate_html(star))
+        finally:
+            star_pages.content, star_pages.stars = saved
+        return {'pages': len(stars)}
+    return prepare, run
+
+
+def stage_translate_full(corpus, args, stub):
+    def prepare(scratch):
+        copy_tree_files(os.path.join(corpus, 'translate'), scratch, '*.html')
+
+    def run(scratch):
+        with stub.installed(translate_full_content_en):
+            changed = translate_full_content_en.process_files(sorted(glob.glob(os.path.join(scratch, '*.html'))))
+        return {'changed': len(changed)}
+    return prepare, run
+
+
+def stage_translate_root(corpus, args):
+    def prepare(scratch):
+        copy_tree_files(os.path.join(corpus, 'translate'), scratch, '*.html')
+
+    def run(scratch):
+        changed = 0
+        for path in sorted(glob.glob(os.path.join(scratch, '*.html'))):
+            original = _read(path)
+            updated = translate_root_html_en.translate_html_content(original)
+            if updated != original:
+                _write(path, updated)
+                changed += 1
+        return {'changed': changed}
+    return prepare, run
+
+
+def stage_translate_json(corpus, args, stub):
+    def prepare(scratch):
+        shutil.copyfile(os.path.join(corpus, 'translate', 'nba.json'), os.path.join(scratch, 'nba.json'))
+
+    def run(scratch):
+        path = os.path.join(scratch, 'nba.json')
+        counts = {'items': 0, 'fields': 0}
+        with stub.installed(translate_nba_json_en):
+            rewrite_items(path, lambda items: translate_nba_json_en.translate_items(items, counts))
+        return {'fields': counts['fields']}
+    return prepare, run
+
+
+def build_stages(corpus, args, stub):
+    stages = [
+        ('apply_details', stage_apply_details(corpus, args), None),
+        ('star_pages', stage_star_pages(corpus, args), None),
+        ('translate_full_content_en', stage_translate_full(corpus, args, stub), stub),
+        ('translate_root_html_en', stage_translate_root(corpus, args), None),
+        ('translate_nba_json_en', stage_translate_json(corpus, args, stub), stub),
+    ]
+    return [s for s in stages if not args.stages or s[0] in args.stages]
+
+
+def time_stage(name, prepare, run, stub, args):
+    timings = []
+    extra = {}
+    for _ in range(args.repeat):
+        scratch = tempfile.mkdtemp(prefix='bench-{}-'.format(name))
+        try:
+            prepare(scratch)
+            if stub is not None:
+                stub.reset()
+            started = time.perf_counter()
+            extra = run(scratch) or {}
+            timings.append(time.perf_counter() - started)
+            if stub is not None:
+                extra['translation'] = stub.stats()
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+    result = summarize(timings)
+    result.update(extra)
+    if args.memory:
+        scratch = tempfile.mkdtemp(prefix='bench-{}-'.format(name))
+        try:
+            prepare(scratch)
+            tracemalloc.start()
+            run(scratch)
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return result
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        'seconds': [round(t, 6) for t in timings],
+        'best': round(ordered[0], 6),
+        'median': round(ordered[len(ordered) // 2], 6),
+    }
+
+
+# -- per-transform timings -------------------------------------------------
+
+def load_baseline(rev=BASELINE_REV):
+    """apply_details_to_pages.py as of ``rev`` (read with git show) as a module, or None."""
+    try:
+        source = subprocess.check_output(['git', 'show', '{}:apply_details_to_pages.py'.format(rev)], cwd=ROOT_DIR)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    module = types.ModuleType('apply_details_baseline')
+    module.__file__ = os.path.join(ROOT_DIR, 'apply_details_to_pages.py')
+    exec(compile(source, 'apply_details_to_pages.py@' + rev[:7], 'exec'), module.__dict__)
+    return module
+
+
+def _baseline_steps(base):
+    """The baseline's chain of helpers, in the order its main() ran them, timed against transform_page."""
+    def footer(html, item, id_to_item):
+        footer_html = base.extract_index_footer()
+        return base.replace_footer(html, footer_html) if footer_html else html
+
+    def nav_block(html, item, id_to_item):
+        if item.get('localLink') in ('index.html', 'about.html', 'privacy.html'):
+            return html
+        return base.replace_nav_block(html)
+
+    return [
+        ('update_content_div', lambda h, it, m: base.update_content_div(h, it.get('detail'), it.get('title', ''), it.get('localLink'))),
+        ('update_hero_image', lambda h, it, m: base.update_hero_image(h, it.get('title', ''))),
+        ('update_related_grid', lambda h, it, m: base.update_related_grid(h, it, m)),
+        ('update_nav_links', lambda h, it, m: base.update_nav_links(h)),
+        ('replace_footer', footer),
+        ('update_nav_horizontal', lambda h, it, m: base.update_nav_horizontal(h)),
+        ('inject_mobile_menu', lambda h, it, m: base.inject_mobile_menu(h)),
+        ('inject_mobile_script', lambda h, it, m: base.inject_mobile_script(h)),
+        ('force_mobile_nav', lambda h, it, m: base.force_mobile_nav(h)),
+        ('replace_nav_block', nav_block),
+    ]
+
+
+def time_transforms(corpus, args, stub):
+    totals = {}
+
+    def add(name, seconds):
+        entry = totals.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        entry['seconds'] += seconds
+        entry['calls'] += 1
+
+    clock = time.perf_counter
+    registry = FragmentRegistry(corpus)
+    base = load_baseline()
+    if base is None:
+        print('git show {} failed: no baseline timings'.format(BASELINE_REV[:7]))
+    for tree in TREE_DIRS:
+        data = apply_details.load_tree(tree, root_dir=corpus, fragment_registry=registry)
+        prefix = 'apply_details[{}].'.format(tree or 'root')
+        steps = []
+        if base is not None:
+            # the baseline reads the footer from ROOT_DIR/index.html and takes a plain id -> item dict
+            base.ROOT_DIR = data['dir']
+            steps = _baseline_steps(base)
+            id_map = dict((it['id'], it) for it in data['store'])
+        for item in itertools.islice(data['store'], args.transform_pages):
+            path = os.path.join(data['dir'], item['localLink'])
+            if not os.path.isfile(path):
+                continue
+            original = _read(path)
+            html = original
+            for name, step in steps:
+                started = clock()
+                html = step(html, item, id_map)
+                add(prefix + 'baseline.' + name, clock() - started)
+            started = clock()
+            apply_details.transform_page(original, item, data['id_to_item'], data['fragments'])
+            add(prefix + 'transform_page', clock() - started)
+
+    tf = translate_full_content_en
+    pages = sorted(glob.glob(os.path.join(corpus, 'translate', '*.html')))[:args.transform_pages]
+    with stub.installed(tf):
+        stub.reset()
+        for path in pages:
+            html = _read(path)
+            for name, fn in (('update_lang_attr', tf.update_lang_attr),
+                             ('translate_attributes', tf.translate_attributes),
+                             ('translate_visible_text', tf.translate_visible_text)):
+                started = clock()
+                html = fn(html)
+                add('translate_full_content_en.' + name, clock() - started)
+        translation = stub.stats()
+    for path in pages:
+        html = _read(path)
+        started = clock()
+        translate_root_html_en.translate_html_content(html)
+        add('translate_root_html_en.translate_html_content', clock() - started)
+
+    for entry in totals.values():
+        entry['seconds'] = round(entry['seconds'], 6)
+        entry['per_call_us'] = round(entry['seconds'] / entry['calls'] * 1e6, 1) if entry['calls'] else 0
+    totals['translate_full_content_en.translation'] = translation
+    return totals
+
+
+# -- driver ----------------------------------------------------------------
+
+def run_benchmarks(args):
+    stub = StubTranslator(latency_ms=args.stub_latency_ms)
+    results = {
+        'meta': {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'jobs': args.jobs,
+            'stub_latency_ms': args.stub_latency_ms,
+        },
+        'runs': [],
+    }
+    for size in args.sizes:
+        corpus, info = ensure_corpus(size, args)
+        run = {'size': size, 'corpus': info, 'stages': {}}
+        for name, (prepare, stage_run), stage_stub in build_stages(corpus, args, stub):
+            run['stages'][name] = time_stage(name, prepare, stage_run, stage_stub, args)
+            print('[{}] {:<28} best {:.3f}s  median {:.3f}s{}'.format(
+                size, name, run['stages'][name]['best'], run['stages'][name]['median'],
+                '  peak {:.1f} MB'.format(run['stages'][name]['peak_bytes'] / 1e6) if 'peak_bytes' in run['stages'][name] else ''))
+        if args.transforms:
+            run['transforms'] = time_transforms(corpus, args, stub)
+        results['runs'].append(run)
+    results['meta']['maxrss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return results
+
+
+def compare(results, baseline):
+    """Print best-time speedups of ``results`` over ``baseline`` for matching sizes and stages."""
+    base_runs = dict((r['size'], r) for r in baseline.get('runs', []))
+    for run in results['runs']:
+        base = base_runs.get(run['size'])
+        if base is None:
+            continue
+        for section in ('stages', 'transforms'):
+            for name, entry in sorted(run.get(section, {}).items()):
+                old = base.get(section, {}).get(name)
+                if not old or 'seconds' not in entry or 'seconds' not in old:
+                    continue
+                new_t = entry['best'] if section == 'stages' else entry['seconds']
+                old_t = old['best'] if section == 'stages' else old['seconds']
+                if new_t:
+                    print('[{}] {:<60} {:>9.4f}s -> {:>9.4f}s  x{:.2f}'.format(run['size'], name, old_t, new_t, old_t / new_t))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the build scripts on synthetic corpora.')
+    parser.add_argument('--sizes', default='1000', help='comma separated corpus sizes, e.g. 1000,10000,100000')
+    parser.add_argument('--pages', type=int, default=None, help='cap nba_N.html pages per tree (default: one per item)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='worker processes for apply_details')
+    parser.add_argument('--stages', default='', help='comma separated stage names (default: all)')
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0, help='simulated latency per translation request')
+    parser.add_argument('--transform-pages', type=int, default=200, help='pages per tree for per-transform timings')
+    parser.add_argument('--no-transforms', dest='transforms', action='store_false')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip the tracemalloc peak run')
+    parser.add_argument('--bench-dir', default=BENCH_DIR, help='corpus cache and results directory (default: _bench/)')
+    parser.add_argument('--output', default=None, help='results file (default: _bench/results-<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='older results file to compare against')
+    args = parser.parse_args(argv)
+    args.sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    args.stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    args.repeat = max(1, args.repeat)
+
+    results = run_benchmarks(args)
+    output = args.output or os.path.join(args.bench_dir, 'results-{}.json'.format(time.strftime('%Y%m%d-%H%M%S')))
+    if not os.path.isdir(os.path.dirname(os.path.abspath(output))):
+        os.makedirs(os.path.dirname(os.path.abspath(output)))
+    _write(output, json.dumps(results, indent=1, sort_keys=True))
+    print('Results written to {}'.format(output))
+    if args.compare:
+        compare(results, json.loads(_read(args.compare)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Content-hash build manifest for incremental page builds.
+
+Each build stage (apply_details, star_pages, translate_*) keeps a section in
+.build-manifest.json that maps an output file to the hash of the inputs it was
+last built from, plus the output's size and mtime at that point.  A page is
+fresh when its input hash is unchanged and the file on disk has not been
+touched since, so it can be skipped without reading it.
+"""
+import hashlib
+import io
+import json
+import os
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(ROOT_DIR, '.build-manifest.json')
+
+
+def hash_inputs(*parts):
+    """Stable sha256 over JSON-serializable input parts."""
+    blob = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def hash_text(text):
+    if text is None:
+        return None
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def code_version(*paths):
+    """Hash of the transform sources; editing a transform invalidates every page it built."""
+    h = hashlib.sha256()
+    for path in paths:
+        if path.endswith(('.pyc', '.pyo')):
+            path = path[:-1]
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class BuildManifest(object):
+    """One stage's section of the manifest file."""
+
+    def __init__(self, stage, path=MANIFEST_PATH):
+        self.stage = stage
+        self.path = path
+        # outputs are keyed relative to the manifest's directory (the site root)
+        self.root = os.path.dirname(os.path.abspath(path))
+        self._all = {}
+        if os.path.isfile(path):
+            try:
+                with io.open(path, 'r', encoding='utf-8') as f:
+                    self._all = json.load(f)
+            except (ValueError, IOError):
+                self._all = {}
+        self.entries = self._all.setdefault(stage, {})
+        self.dirty = False
+
+    def _key(self, output_path):
+        return os.path.relpath(output_path, self.root).replace(os.sep, '/')
+
+    def is_fresh(self, output_path, digest):
+        entry = self.entries.get(self._key(output_path))
+        if not entry or entry.get('inputs') != digest:
+            return False
+        return entry.get('stat') == stat_key(output_path)
+
+    def record(self, output_path, digest, **extra):
+        """Remember ``digest`` for ``output_path``; ``extra`` fields are stored alongside."""
+        entry = {'inputs': digest, 'stat': stat_key(output_path)}
+        entry.update(extra)
+        self.entries[self._key(output_path)] = entry
+        self.dirty = True
+
+    def get(self, output_path):
+        return self.entries.get(self._key(output_path))
+
+    def forget(self, output_path):
+        if self.entries.pop(self._key(output_path), None) is not None:
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        # Re-read so stages saving one after another keep each other's sections
+        if os.path.isfile(self.path):
+            try:
+                with io.open(self.path, 'r', encoding='utf-8') as f:
+                    current = json.load(f)
+            except (ValueError, IOError):
+                current = {}
+        else:
+            current = {}
+        current[self.stage] = self.entries
+        tmp = self.path + '.tmp'
+        with io.open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(current, ensure_ascii=False, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def carry_stats(rewritten, path=MANIFEST_PATH):
+    """
+    Keep outputs fresh across an in-place rewrite by a later step (build_site's
+    css stage): ``rewritten`` maps each rewritten file to its stat_key() from
+    before.  Entries of every stage that matched that stat get the new one;
+    a file that was already stale stays stale.
+    """
+    if not rewritten or not os.path.isfile(path):
+        return
+    root = os.path.dirname(os.path.abspath(path))
+    try:
+        with io.open(path, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    except (ValueError, IOError):
+        return
+    changed = False
+    for output_path, before in rewritten.items():
+        key = os.path.relpath(output_path, root).replace(os.sep, '/')
+        for entries in current.values():
+            entry = entries.get(key)
+            if entry and entry.get('stat') == before:
+                entry['stat'] = stat_key(output_path)
+                changed = True
+    if changed:
+        tmp = path + '.tmp'
+        with io.open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(current, ensure_ascii=False, indent=1, sort_keys=True))
+        os.replace(tmp, path)
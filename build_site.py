@@ -0,0 +1,587 @@
+# -*- coding: utf-8 -*-
+"""
+Build the generated files of the site: the data shards the pages fetch, the
+parts of index.html made from the data, and the hashed assets every page
+links to.
+
+    cards        nba.json -> cards/manifest.json + cards/page-N.json (per tree)
+    grid         nba.json -> the first FIRST_CARDS cards in #facts-grid of index.html
+    search       nba.json -> search/manifest.json + search/s-N.json (search_index.py)
+    tags         nba.json -> the name tags in #famous-tags of index.html
+    icons        fa-* icons of the pages -> icons.<hash>.svg (icon_sprite.py)
+    css          classes of the pages -> tailwind.<hash>.css (tailwind_css.py)
+    scripts      third_party.json -> analytics, ads and favicon tags (third_party.py)
+    fingerprint  nba.json, cn/nba.json, BasketballGames-all.json -> <name>.<hash>.json
+                 + assets.json, and the references in the pages
+    gzip         .html/.json/.xml/.css/.svg -> .gz siblings (precompress.py)
+
+Run it after changing the data, a page or a page generator, and commit what
+it writes: the shards, hashed copies and rewritten pages are part of the
+site.  Only the .gz siblings stay out of git, so run it before publishing
+too.  The hashed names in the pages (nba.<hash>.json, icons.<hash>.svg, ...)
+are written by the stages alone, never by hand; --check builds a scratch
+copy and fails if that would change any file, e.g. after a data change
+committed without its build.
+
+Files are only rewritten when their content changed; the data is read with
+its change log applied (item_store.iter_items).
+
+Usage:
+    python build_site.py [--root DIR] [--only cards,grid,search,tags,icons,css,scripts,fingerprint,gzip]
+    python build_site.py --check
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from html import escape
+
+import precompress
+import icon_sprite
+import search_index
+import tailwind_css
+import third_party
+from build_manifest import stat_key, carry_stats
+from change_log import ChangeLog
+from fact_store import fact_id
+from item_store import convert, has_bom, iter_items
+from page_assets import HASH_GLOB, SPRITE, STYLESHEET
+from page_index import PageIndex
+from render_site import write_if_changed
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+TREE_DIRS = ('', 'cn')
+
+CARDS_DIR = 'cards'
+PAGE_SIZE = 24
+# card text length, as buildCard() in each tree's index.html cut it
+SUMMARY_CHARS = {'': 120, 'cn': 40}
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _short_hash(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+# -- cards -----------------------------------------------------------------
+
+def card_fields(item, summary_chars):
+    card = OrderedDict()
+    card['id'] = fact_id(item['id'])
+    card['title'] = item.get('title') or ''
+    card['localLink'] = item.get('localLink') or '#'
+    if item.get('image'):
+        card['image'] = item['image']
+    card['summary'] = (item.get('detail') or '')[:summary_chars] + '...'
+    return card
+
+
+def _has_card(item):
+    return fact_id(item.get('id')) is not None
+
+
+def load_cards(data_path, summary_chars):
+    """Card records of every item with a numeric id, newest (highest id) first."""
+    cards = [card_fields(item, summary_chars) for item in iter_items(data_path) if _has_card(item)]
+    cards.sort(key=lambda c: c['id'], reverse=True)
+    return cards
+
+
+def _remove_stale(out_dir, pattern, keep, stats):
+    for path in glob.glob(os.path.join(out_dir, pattern)):
+        if os.path.basename(path) not in keep:
+            os.remove(path)
+            stats['removed'] = stats.get('removed', 0) + 1
+
+
+def build_cards(root_dir, stats):
+    for tree in TREE_DIRS:
+        data_path = os.path.join(root_dir, tree, 'nba.json')
+        if not os.path.isfile(data_path):
+            continue
+        out_dir = os.path.join(root_dir, tree, CARDS_DIR)
+        cards = load_cards(data_path, SUMMARY_CHARS[tree])
+        pages = []
+        for n, start in enumerate(range(0, len(cards), PAGE_SIZE), 1):
+            name = 'page-{}.json'.format(n)
+            text = _dumps(cards[start:start + PAGE_SIZE])
+            pages.append(OrderedDict([('file', name), ('hash', _short_hash(text))]))
+            stats['written' if write_if_changed(os.path.join(out_dir, name), text) else 'same'] += 1
+        # shards left over from a larger corpus
+        _remove_stale(out_dir, 'page-*.json', set(p['file'] for p in pages), stats)
+        manifest = OrderedDict([('total', len(cards)), ('page_size', PAGE_SIZE), ('pages', pages)])
+        path = os.path.join(out_dir, 'manifest.json')
+        stats['written' if write_if_changed(path, _dumps(manifest)) else 'same'] += 1
+
+
+# -- search ----------------------------------------------------------------
+
+def iter_documents(data_path):
+    """(card position, title, detail) per item, streamed; positions follow load_cards' order."""
+    ids = sorted((item['id'] for item in iter_items(data_path) if _has_card(item)), reverse=True)
+    position = {}
+    for pos, item_id in enumerate(ids):
+        position.setdefault(item_id, pos)
+    for item in iter_items(data_path):
+        if _has_card(item) and item['id'] in position:
+            # duplicate ids: only the first item (first card position) is searchable
+            yield position.pop(item['id']), item.get('title') or '', item.get('detail') or ''
+
+
+def build_search(root_dir, stats):
+    for tree in TREE_DIRS:
+        data_path = os.path.join(root_dir, tree, 'nba.json')
+        if not os.path.isfile(data_path):
+            continue
+        out_dir = os.path.join(root_dir, tree, search_index.SEARCH_DIR)
+        buckets, shards = search_index.build_shards(iter_documents(data_path))
+        entries = []
+        for bucket in range(buckets):
+            if bucket not in shards:
+                entries.append(None)
+                continue
+            name = 's-{}.json'.format(bucket)
+            text = _dumps(shards[bucket])
+            entries.append(OrderedDict([('file', name), ('hash', _short_hash(text))]))
+            stats['written' if write_if_changed(os.path.join(out_dir, name), text) else 'same'] += 1
+        _remove_stale(out_dir, 's-*.json', set(e['file'] for e in entries if e), stats)
+        manifest = OrderedDict([('buckets', buckets), ('shards', entries)])
+        path = os.path.join(out_dir, 'manifest.json')
+        stats['written' if write_if_changed(path, _dumps(manifest)) else 'same'] += 1
+
+
+# -- index.html ------------------------------------------------------------
+
+def _find_div(page, div_id):
+    pattern = re.compile(r'\sid\s*=\s*"{}"'.format(re.escape(div_id)))
+    return page.find_tag('div', lambda el: pattern.search(el.attrs))
+
+
+def _fill_marked(page, el, begin_marker, end_marker, lines):
+    """
+    Put ``lines`` between ``begin_marker`` and ``end_marker`` at the end of
+    ``el``, one indentation level below its opening tag, replacing the block a
+    previous build wrote there.  Lines may span several lines themselves.
+    """
+    inner = page.inner(el)
+    begin = inner.find(begin_marker)
+    if begin != -1:
+        end = inner.find(end_marker, begin)
+        inner = inner[:begin] + (inner[end + len(end_marker):] if end != -1 else '')
+    # indentation of the line ``el`` opens on, and of the block inside it
+    line_start = page.html.rfind('\n', 0, el.start) + 1
+    indent = page.html[line_start:el.start]
+    if indent.strip():
+        indent = indent[:len(indent) - len(indent.lstrip())]
+    child = indent + '    '
+    block = ''.join(child + line.replace('\n', '\n' + child) + '\n'
+                    for line in [begin_marker] + list(lines) + [end_marker])
+    page.replace_inner(el, inner.rstrip() + '\n' + block + indent)
+
+
+def _update_pages(root_dir, stats, render):
+    """Rewrite each tree's index.html with ``render(html, data_path, tree)``."""
+    icons = icon_sprite.load_icons(root_dir)
+    for tree in TREE_DIRS:
+        data_path = os.path.join(root_dir, tree, 'nba.json')
+        page_path = os.path.join(root_dir, tree, 'index.html')
+        if not (os.path.isfile(data_path) and os.path.isfile(page_path)):
+            continue
+        with io.open(page_path, 'r', encoding='utf-8', newline='') as f:
+            html = f.read()
+        new_html = render(html, data_path, tree)
+        # icons of the new markup come from the sprite the page uses, as the icons stage would draw them
+        href = icon_sprite.sprite_href(new_html)
+        if href:
+            new_html = icon_sprite.link_page(new_html, href, icons)[0]
+        stats['written' if write_if_changed(page_path, new_html) else 'same'] += 1
+
+
+# -- first page of cards ---------------------------------------------------
+
+# what the first "Load more" click used to fetch; the loader resumes at data-cursor
+FIRST_CARDS = 12
+# buildCard() of each tree's index.html: badge, link text, end of the onerror handler
+CARD_TEXT = {'': ('Fun Facts', 'Read more', ';'), 'cn': ('冷门知识', '阅读更多', '')}
+CARD_HTML = (
+    '<a href="{link}" class="block">\n'
+    '    <div class="bg-white rounded-lg shadow-md overflow-hidden card-hover">\n'
+    '        <img src="{image}" alt="{alt}" class="w-full h-56 object-cover" '
+    'onerror="this.onerror=null;this.src=\'https://picsum.photos/seed/nba-{id}/600/400\'{onerror_end}">\n'
+    '        <div class="p-6">\n'
+    '            <span class="inline-block bg-nba-purple text-white text-xs font-semibold px-3 py-1 rounded-full mb-3">'
+    '{badge}</span>\n'
+    '            <h3 class="font-bold text-xl mb-3">{title}</h3>\n'
+    '            <p class="text-gray-600 mb-4">{summary}</p>\n'
+    '            <div class="flex items-center text-nba-purple font-medium">\n'
+    '                {more} <i class="fa fa-arrow-right ml-2"></i>\n'
+    '            </div>\n'
+    '        </div>\n'
+    '    </div>\n'
+    '</a>'
+)
+GRID_BEGIN = '<!-- cards from nba.json: python build_site.py --only grid -->'
+GRID_END = '<!-- /cards -->'
+CURSOR_ATTR_RE = re.compile(r'\s+data-cursor\s*=\s*"[^"]*"')
+
+
+def render_card(card, tree):
+    """The markup buildCard() makes for ``card`` (a load_cards record)."""
+    badge, more, onerror_end = CARD_TEXT[tree]
+    image = card.get('image') or 'https://picsum.photos/id/{}/600/400'.format((card['id'] or 1) % 1000)
+    return CARD_HTML.format(
+        link=escape(card['localLink'], quote=True), image=escape(image, quote=True),
+        alt=escape(card['title'], quote=True), id=card['id'] or 1, onerror_end=onerror_end, badge=badge,
+        title=escape(card['title'], quote=False), summary=escape(card['summary'], quote=False), more=more)
+
+
+def render_grid(html, cards, tree):
+    """``html`` with ``cards`` pre-rendered at the end of #facts-grid and their count in its data-cursor."""
+    page = PageIndex(html)
+    grid = _find_div(page, 'facts-grid')
+    if grid is None or not grid.closed:
+        return html
+    _fill_marked(page, grid, GRID_BEGIN, GRID_END, [render_card(card, tree) for card in cards])
+    open_tag = CURSOR_ATTR_RE.sub('', page.open_tag(grid))
+    page.replace(grid.start, grid.open_end, '{} data-cursor="{}">'.format(open_tag[:-1], len(cards)))
+    return page.render()
+
+
+def build_grid(root_dir, stats):
+    _update_pages(root_dir, stats, lambda html, data_path, tree: render_grid(
+        html, load_cards(data_path, SUMMARY_CHARS[tree])[:FIRST_CARDS], tree))
+
+
+# -- famous tags -----------------------------------------------------------
+
+# JavaScript's \s also matches U+FEFF; its \b after the ASCII 's' is an ASCII word boundary
+JS_SPACE = '[\\s\ufeff]'
+NAME_STOPWORDS = frozenset([
+    'The', 'A', 'An', 'First', 'Youngest', 'Oldest', 'Only', 'Why', 'How', 'NBA', 'Nba', 'Meaning', 'Average',
+    'Origin', 'Shortest', 'Longest', 'Rules', 'Timeout', 'Most', 'Least', 'In', 'On', 'At', 'Of',
+])
+POSSESSIVE_NAME_RE = re.compile(
+    r'^([A-Z][A-Za-z.\-]+(?:{0}+[A-Z][A-Za-z.\-]+){{0,2}})[\u2019\']s(?![A-Za-z0-9_])'.format(JS_SPACE))
+LEADING_NAME_RE = re.compile(
+    r'^([A-Z][A-Za-z.\-]+)(?:{0}+([A-Z][A-Za-z.\-]+))?(?:{0}+([A-Z][A-Za-z.\-]+))?'.format(JS_SPACE))
+CN_NAME_CUT_RE = re.compile('{0}|[\u201c\u201d"\'\uff1a:\uff0c,\u3002!\uff01?\uff1f\u2014-]|的|曾|是'.format(JS_SPACE))
+CN_NAME_CHAR_RE = re.compile('[\u4e00-\u9fa5A-Za-z]')
+JS_TRIM_CHARS = ' \t\n\v\f\r\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009' \
+                '\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+MAX_TAGS = {'': 36, 'cn': 60}
+TAG_CLASS = {
+    '': 'inline-flex items-center bg-nba-purple text-white hover:bg-purple-800 text-sm font-semibold '
+        'px-3 py-1 rounded-full transition-colors duration-200',
+    'cn': 'inline-block bg-nba-purple text-white text-sm font-semibold px-3 py-1 rounded-full '
+          'hover:bg-purple-700 transition-colors duration-300',
+}
+TAGS_BEGIN = '<!-- tags from nba.json: python build_site.py --only tags -->'
+TAGS_END = '<!-- /tags -->'
+
+
+def extract_name(title):
+    """Player name at the start of an English title ("Kobe's ...", "Michael Jordan ...")."""
+    if not isinstance(title, str) or not title:
+        return ''
+    t = title.strip(JS_TRIM_CHARS)
+    m = POSSESSIVE_NAME_RE.match(t)
+    if m:
+        return m.group(1)
+    m = LEADING_NAME_RE.match(t)
+    if m:
+        words = [w for w in m.groups() if w]
+        if words and words[0] not in NAME_STOPWORDS:
+            return ' '.join(words)
+    return ''
+
+
+def extract_name_cn(title):
+    """Leading part of a Chinese title, up to the first punctuation mark or 的/曾/是."""
+    if not isinstance(title, str) or not title:
+        return ''
+    cut = CN_NAME_CUT_RE.split(title)[0].strip(JS_TRIM_CHARS)
+    # JavaScript string length counts UTF-16 code units
+    if not cut or len(cut.encode('utf-16-le')) < 4:
+        return ''
+    if not CN_NAME_CHAR_RE.search(cut):
+        return ''
+    return cut
+
+
+def famous_tags(data_path, tree):
+    """[(name, href)] in file order, first link per name, at most MAX_TAGS[tree]."""
+    tags = []
+    seen = set()
+    for item in iter_items(data_path):
+        if tree == 'cn':
+            name = extract_name_cn(item.get('title'))
+            key = name
+        else:
+            name = extract_name(item.get('title'))
+            key = name.lower()
+        if not name or key in seen:
+            continue
+        seen.add(key)
+        tags.append((name, item.get('localLink') or '#'))
+        if len(tags) >= MAX_TAGS[tree]:
+            break
+    return tags
+
+
+def render_tags(html, tags, tree):
+    """``html`` with the generated tags (between the marker comments) at the end of #famous-tags."""
+    page = PageIndex(html)
+    wrap = _find_div(page, 'famous-tags')
+    if wrap is None or not wrap.closed:
+        return html
+    lines = ['<a href="{}" class="{}">{}</a>'.format(escape(href, quote=True), TAG_CLASS[tree], escape(name, quote=False))
+             for name, href in tags]
+    _fill_marked(page, wrap, TAGS_BEGIN, TAGS_END, lines)
+    return page.render()
+
+
+def build_tags(root_dir, stats):
+    _update_pages(root_dir, stats, lambda html, data_path, tree: render_tags(html, famous_tags(data_path, tree), tree))
+
+
+# -- fingerprints ----------------------------------------------------------
+
+# fetched by the pages under these names; the cards/ and search/ manifests stay
+# unhashed, they are the revalidated entry points to their hash-versioned shards
+FINGERPRINT_FILES = ('nba.json', 'cn/nba.json', 'BasketballGames-all.json')
+ASSET_MANIFEST = 'assets.json'
+CACHE_OPTION_RE = r'\s*,\s*\{\s*cache\s*:\s*[\'"]no-(?:store|cache)[\'"]\s*\}'
+
+
+def hashed_name(name, digest):
+    """nba.json -> nba.<digest>.json"""
+    stem, ext = os.path.splitext(name)
+    return '{}.{}{}'.format(stem, digest, ext)
+
+
+def _published_bytes(path):
+    """Contents of ``path`` as the pages should get it, pending change log entries folded in."""
+    if ChangeLog(path).fingerprint():
+        tmp = path + '.publish'
+        try:
+            convert(path, tmp, bom=has_bom(path))
+            with io.open(tmp, 'rb') as f:
+                return f.read()
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    with io.open(path, 'rb') as f:
+        return f.read()
+
+
+def _reference_re(name):
+    """A quoted ``name`` or an earlier hashed copy of it, and a following fetch() cache option."""
+    stem, ext = os.path.splitext(name)
+    return re.compile(r'([\'"`]){}(?:\.[0-9a-f]{{12}})?{}\1(?:{})?'.format(
+        re.escape(stem), re.escape(ext), CACHE_OPTION_RE))
+
+
+def fingerprint_pages(html, assets, tree):
+    """Point the references in a page of ``tree`` at the hashed copies in ``assets``."""
+    prefix = tree + '/' if tree else ''
+    for name, hashed in assets.items():
+        if not name.startswith(prefix) or '/' in name[len(prefix):]:
+            continue
+        local = name[len(prefix):]
+        if os.path.splitext(local)[0] not in html:
+            continue
+        target = hashed[len(prefix):]
+        html = _reference_re(local).sub(lambda m: m.group(1) + target + m.group(1), html)
+    return html
+
+
+def build_fingerprints(root_dir, stats):
+    assets = OrderedDict()
+    for name in FINGERPRINT_FILES:
+        path = os.path.join(root_dir, *name.split('/'))
+        if not os.path.isfile(path):
+            continue
+        data = _published_bytes(path)
+        hashed = hashed_name(name, _short_hash(data))
+        out_path = os.path.join(root_dir, *hashed.split('/'))
+        # a hashed copy never changes once written
+        if os.path.isfile(out_path):
+            stats['same'] += 1
+        else:
+            with io.open(out_path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(out_path + '.tmp', out_path)
+            stats['written'] += 1
+        stem, ext = os.path.splitext(os.path.basename(path))
+        _remove_stale(os.path.dirname(path), stem + '.' + HASH_GLOB + ext, {os.path.basename(out_path)}, stats)
+        assets[name] = hashed
+    path = os.path.join(root_dir, ASSET_MANIFEST)
+    stats['written' if write_if_changed(path, json.dumps(assets, indent=2) + '\n') else 'same'] += 1
+    for tree in TREE_DIRS:
+        for page_path in sorted(glob.glob(os.path.join(root_dir, tree, '*.html'))):
+            with io.open(page_path, 'r', encoding='utf-8', newline='') as f:
+                html = f.read()
+            new_html = fingerprint_pages(html, assets, tree)
+            if new_html != html and write_if_changed(page_path, new_html):
+                stats['written'] += 1
+
+
+# -- icons and stylesheet --------------------------------------------------
+
+def _write_hashed(root_dir, name, text, stats):
+    """Write ``text`` to ``name`` with its content hash, removing older copies. Returns the hashed name."""
+    hashed = hashed_name(name, _short_hash(text))
+    stats['written' if write_if_changed(os.path.join(root_dir, hashed), text) else 'same'] += 1
+    stem, ext = os.path.splitext(name)
+    _remove_stale(root_dir, stem + '.' + HASH_GLOB + ext, {hashed}, stats)
+    return hashed
+
+
+def _relink_pages(root_dir, stats, name, link):
+    """
+    Rewrite every page with ``link(html, href)``, ``href`` being the path of
+    ``name`` from the page's tree; the pages stay fresh in the build manifest.
+    """
+    rewritten = {}
+    for tree in TREE_DIRS:
+        href = ('../' if tree else '') + name
+        for page_path in sorted(glob.glob(os.path.join(root_dir, tree, '*.html'))):
+            with io.open(page_path, 'r', encoding='utf-8', newline='') as f:
+                html = f.read()
+            new_html = link(html, href)
+            if new_html == html:
+                continue
+            before = stat_key(page_path)
+            if write_if_changed(page_path, new_html):
+                rewritten[page_path] = before
+                stats['written'] += 1
+    carry_stats(rewritten, os.path.join(root_dir, '.build-manifest.json'))
+
+
+def build_icons(root_dir, stats):
+    icons = icon_sprite.load_icons(root_dir)
+    names = icon_sprite.used_icons(icon_sprite.source_paths(root_dir))
+    name = _write_hashed(root_dir, SPRITE, icon_sprite.sprite(icons, names), stats)
+    missing = set()
+
+    def link(html, href):
+        html, page_missing = icon_sprite.link_page(html, href, icons)
+        missing.update(page_missing)
+        return html
+    _relink_pages(root_dir, stats, name, link)
+    if missing:
+        print('[icons] not in {} (pages keep the Font Awesome stylesheet): {}; import them with '
+              'python icon_sprite.py'.format(icon_sprite.ICONS_FILE, ', '.join(sorted(missing))))
+
+
+def build_css(root_dir, stats):
+    paths = tailwind_css.source_paths(root_dir)
+    tailwind_css.check_classes(paths, root_dir)
+    css = tailwind_css.generate(tailwind_css.scan(paths))
+    name = _write_hashed(root_dir, STYLESHEET, css, stats)
+    _relink_pages(root_dir, stats, name, tailwind_css.link_page)
+
+
+# -- third-party scripts ---------------------------------------------------
+
+def build_scripts(root_dir, stats):
+    config = third_party.load_config(root_dir)
+    lines = third_party.render_tags(config)
+    _relink_pages(root_dir, stats, config.get('favicon') or '',
+                  lambda html, favicon: third_party.link_page(html, lines, config.get('favicon') and favicon))
+
+
+# -- precompression ---------------------------------------------------------
+
+def build_gzip(root_dir, stats):
+    counts = precompress.precompress(root_dir)
+    for key in ('written', 'same', 'removed'):
+        stats[key] = stats.get(key, 0) + counts[key]
+
+
+STAGES = OrderedDict([('cards', build_cards), ('grid', build_grid), ('search', build_search), ('tags', build_tags),
+                      ('icons', build_icons), ('css', build_css), ('scripts', build_scripts),
+                      ('fingerprint', build_fingerprints), ('gzip', build_gzip)])
+
+
+def build_site(root_dir=ROOT_DIR, stages=tuple(STAGES)):
+    stats = OrderedDict()
+    for stage in stages:
+        counts = {'written': 0, 'same': 0}
+        started = time.time()
+        STAGES[stage](root_dir, counts)
+        counts['seconds'] = round(time.time() - started, 3)
+        stats[stage] = counts
+    return stats
+
+
+# not part of the site, or not committed (see the module docstring)
+CHECK_IGNORE = shutil.ignore_patterns('.git', '_*', '__pycache__', '*.gz', '.build-manifest.json',
+                                      '.translation-memory.sqlite', '*.factidx', '*.lock')
+
+
+def _file_hashes(root_dir):
+    hashes = {}
+    for directory, dirs, files in os.walk(root_dir):
+        for name in files:
+            path = os.path.join(directory, name)
+            with io.open(path, 'rb') as f:
+                hashes[os.path.relpath(path, root_dir).replace(os.sep, '/')] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def check_site(root_dir=ROOT_DIR, stages=tuple(STAGES)):
+    """Files of ``root_dir`` a build would write, add or remove, found by building a scratch copy."""
+    tmp = tempfile.mkdtemp(prefix='build-site-check-')
+    try:
+        copy = os.path.join(tmp, 'site')
+        shutil.copytree(root_dir, copy, ignore=CHECK_IGNORE)
+        before = _file_hashes(copy)
+        build_site(copy, [stage for stage in stages if stage != 'gzip'])
+        after = _file_hashes(copy)
+    finally:
+        shutil.rmtree(tmp)
+    return sorted(name for name in set(before) | set(after) if before.get(name) != after.get(name))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the data files and generated page parts of the site.')
+    parser.add_argument('--root', default=ROOT_DIR, help='site root (default: this directory)')
+    parser.add_argument('--only', default=','.join(STAGES), help='comma separated stages: ' + ','.join(STAGES))
+    parser.add_argument('--check', action='store_true',
+                        help='build a scratch copy and fail if that changes any file (nothing here is written)')
+    args = parser.parse_args(argv)
+    stages = [s.strip() for s in args.only.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error('unknown stage(s): {}'.format(', '.join(unknown)))
+    if args.check:
+        stale = check_site(os.path.abspath(args.root), stages)
+        for name in stale:
+            print('out of date: ' + name)
+        if stale:
+            sys.exit('{} files differ from a fresh build; run python build_site.py and commit them'.format(len(stale)))
+        print('build output is up to date')
+        return
+    stats = build_site(os.path.abspath(args.root), stages)
+    for stage in stages:
+        s = stats[stage]
+        extra = ', removed: {}'.format(s['removed']) if s.get('removed') else ''
+        print('[{}] written: {}, unchanged: {}{} ({}s)'.format(stage, s['written'], s['same'], extra, s['seconds']))
+
+
+if __name__ == '__main__':
+    main()
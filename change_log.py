@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only change log for the item lists (nba.json, cn/nba.json).
+
+A small edit (one item's detail, a fixed title) used to cost a full rewrite of
+nba.json, and two scripts rewriting it at the same time silently lost one
+side's work.  Edits now go to ``nba.json.changes`` instead, one JSON line per
+item update:
+
+    {"id": 12, "set": {"detail": "..."}}
+
+- appends are single O_APPEND writes made under an exclusive file lock
+  (``nba.json.lock``) and fsync'ed; a torn last line from a crash is ignored
+  by readers and cut off before the next append;
+- readers (item_store.iter_items, FactStore) see the base file with the log
+  applied, later entries winning per field;
+- item_store.rewrite_items takes the same lock, writes the base with the log
+  folded in and empties the log, so ``python item_store.py compact nba.json``
+  is a rewrite with no changes.
+
+rewrite_items (and so ``compact``) is the only thing that empties the log:
+scripts that record their edits (item_store.record_changes) only append, so
+the log grows until the next rewrite or compaction.
+
+Readers do not lock: they read the log before opening the base, and applying
+an entry that a compaction already folded in sets the same values again.
+
+    log = ChangeLog('nba.json')
+    log.append(12, {'detail': text})
+    log.patches()        # {'12': {'detail': text}}
+"""
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOG_SUFFIX = '.changes'
+LOCK_SUFFIX = '.lock'
+
+
+class FileLock(object):
+    """
+    Exclusive lock between processes on ``path`` (created if missing).
+    Re-entrant within a process, so rewrite_items can clear the log it locked.
+    """
+    _held = {}  # path -> [fd, depth]
+
+    def __init__(self, path, poll=0.2):
+        self.path = os.path.abspath(path)
+        self.poll = poll
+
+    def _try_lock(self, fd):
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except (IOError, OSError):
+            return False
+
+    def acquire(self):
+        entry = FileLock._held.get(self.path)
+        if entry is not None:
+            entry[1] += 1
+            return self
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        started = time.time()
+        waited = False
+        while not self._try_lock(fd):
+            if not waited and time.time() - started > 1:
+                print('Waiting for {} (another script is writing)...'.format(self.path), file=sys.stderr)
+                waited = True
+            time.sleep(self.poll)
+        FileLock._held[self.path] = [fd, 1]
+        return self
+
+    def release(self):
+        entry = FileLock._held[self.path]
+        entry[1] -= 1
+        if entry[1]:
+            return
+        del FileLock._held[self.path]
+        fd = entry[0]
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def _write_all(fd, data):
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+class ChangeLog(object):
+    def __init__(self, data_path):
+        self.data_path = data_path
+        self.path = data_path + LOG_SUFFIX
+        self.lock_path = data_path + LOCK_SUFFIX
+
+    def lock(self):
+        return FileLock(self.lock_path)
+
+    def _cut_torn_tail(self):
+        # a crash mid-append leaves a line without its newline; drop it
+        with io.open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if not size:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            f.seek(0)
+            keep = f.read().rfind(b'\n') + 1
+            f.truncate(keep)
+
+    def extend(self, changes):
+        """Append ``(item_id, fields)`` updates in one locked, fsync'ed write. Returns how many."""
+        lines = []
+        for item_id, fields in changes:
+            if not fields:
+                continue
+            if 'id' in fields:
+                raise ValueError('the change log is keyed by id; item ids cannot be changed')
+            entry = OrderedDict([('id', item_id), ('set', fields)])
+            lines.append(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+        if not lines:
+            return 0
+        data = ''.join(lines).encode('utf-8')
+        with self.lock():
+            if os.path.exists(self.path):
+                self._cut_torn_tail()
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+            try:
+                _write_all(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        return len(lines)
+
+    def append(self, item_id, fields):
+        return self.extend([(item_id, fields)])
+
+    def entries(self):
+        """Yield ``(item_id, fields)`` for every complete line, oldest first."""
+        if not os.path.exists(self.path):
+            return
+        with io.open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # torn append
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line.decode('utf-8'), object_pairs_hook=OrderedDict)
+                yield entry.get('id'), entry.get('set') or {}
+
+    def patches(self):
+        """Net update per item: ``str(id) -> fields``, later entries winning per field."""
+        merged = OrderedDict()
+        for item_id, fields in self.entries():
+            merged.setdefault(str(item_id), OrderedDict()).update(fields)
+        return merged
+
+    def __len__(self):
+        return sum(1 for _ in self.entries())
+
+    def fingerprint(self):
+        """Hash of the log contents ('' when empty), for build digests."""
+        if not os.path.exists(self.path):
+            return ''
+        with io.open(self.path, 'rb') as f:
+            data = f.read()
+        return hashlib.sha1(data).hexdigest() if data else ''
+
+    def clear(self):
+        with self.lock():
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def apply_patch(item, patches):
+    """Update ``item`` in place with its entry in ``patches`` (from ChangeLog.patches()); returns it."""
+    fields = patches.get(str(item.get('id')))
+    if fields:
+        item.update(fields)
+    return item
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Edit buffer shared by the HTML rewriters.
+
+Edits are recorded as (start, end, replacement) against the original text and
+applied by render() in one left-to-right pass and a single ''.join, so a page
+with many edits is copied once instead of once per edit (html[:a] + x +
+html[b:] chains) or exploded into a list of characters.
+
+Offsets always refer to the original text, so edits can be added in any order.
+Edits are applied by (start, end): of edits starting at the same position,
+insertions come before replacements, and edits with the same span keep the
+order they were added in.  An edit that starts inside an earlier one is an
+overlap, which raises OverlapError or, with render(skip_overlaps=True), is
+dropped so the earlier edit wins.
+
+    buf = EditBuffer(html)
+    buf.replace(m.start(), m.end(), new)
+    buf.insert(body_end, script)
+    html = buf.render()
+"""
+
+
+class OverlapError(ValueError):
+    pass
+
+
+class EditBuffer(object):
+    def __init__(self, text):
+        self.text = text
+        self._edits = []
+
+    def __len__(self):
+        return len(self._edits)
+
+    def replace(self, start, end, replacement):
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError('edit {}:{} outside text of length {}'.format(start, end, len(self.text)))
+        self._edits.append((start, end, replacement))
+        return self
+
+    def insert(self, pos, text):
+        return self.replace(pos, pos, text)
+
+    def delete(self, start, end):
+        return self.replace(start, end, '')
+
+    def render(self, skip_overlaps=False):
+        """Apply all edits in a single splice over the original text."""
+        if not self._edits:
+            return self.text
+        # sort by span, keep insertion order for ties
+        edits = sorted(range(len(self._edits)), key=lambda i: (self._edits[i][0], self._edits[i][1], i))
+        text = self.text
+        parts = []
+        cursor = 0
+        for i in edits:
+            start, end, replacement = self._edits[i]
+            if start < cursor:
+                if skip_overlaps:
+                    continue
+                raise OverlapError('overlapping edits at {}:{}'.format(start, end))
+            parts.append(text[cursor:start])
+            parts.append(replacement)
+            cursor = end
+        parts.append(text[cursor:])
+        return ''.join(parts)
+
+
+def splice(text, start, end, replacement):
+    """``text[:start] + replacement + text[end:]`` for a one-off edit."""
+    return EditBuffer(text).replace(start, end, replacement).render()
@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+"""
+Indexed, memory-mapped access to the fact lists (nba.json, cn/nba.json).
+
+FactStore(path) keeps a compact binary index next to the data file
+(``nba.json.factidx``) with, for every item, its byte span in the data file,
+its id and its localLink, plus two open-addressing hash tables (by id and by
+localLink) and the smallest/largest id.  Both files are memory-mapped; an item
+is only decoded when it is first asked for, so looking up one fact costs one
+small json.loads instead of parsing the whole file.
+
+    store = FactStore('nba.json')
+    store[12], store.get(12), 12 in store     # by id, O(1)
+    store.by_link('nba_12.html')              # by localLink, O(1)
+    store.max_id, store.related(item)         # O(1), the 3 following ids
+    store.at(0), len(store)                   # by position
+    for fact in store: ...                    # file order
+
+Records are FactRecord objects with __slots__ and interned strings; they also
+answer the dict calls the page scripts use (item.get('title'), item['id']).
+
+The index is rebuilt when the data file's size or mtime no longer match its
+header (and kept in memory only when it cannot be written).  Pending edits in
+the file's change log (change_log.py) are applied to records as they are
+decoded; the log is read once, when the store is opened.  JSON arrays with
+or without a UTF-8 BOM and JSON Lines files are both supported.
+
+    python fact_store.py index nba.json cn/nba.json    # (re)build indexes
+    python fact_store.py get nba.json 12
+"""
+import argparse
+import codecs
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections import OrderedDict
+
+from change_log import ChangeLog
+from item_store import is_jsonl
+
+intern = sys.intern
+
+INDEX_SUFFIX = '.factidx'
+MAGIC = b'FACTIDX2'
+# magic, data size, data mtime (ns), count, id slots, link slots, links bytes, min id, max id
+HEADER = struct.Struct('<8sQQIIIIqq')
+# data offset, data length, id, link offset, link length, has id
+RECORD = struct.Struct('<QIqIHB')
+SLOT = struct.Struct('<I')
+CHUNK_SIZE = 1 << 16
+NO_ID = -(1 << 63)
+FIELDS = ('id', 'localLink', 'title', 'detail', 'image')
+
+
+class _Missing(object):
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<missing>'
+
+
+MISSING = _Missing()
+
+
+class FactRecord(object):
+    """One fact; the known fields are slots, anything else goes to ``extra``."""
+    __slots__ = FIELDS + ('extra',)
+
+    def __init__(self, data):
+        for key in FIELDS:
+            value = data.get(key, MISSING)
+            if key in ('localLink', 'image') and type(value) is str:
+                value = intern(value)
+            setattr(self, key, value)
+        extra = [(k, v) for k, v in data.items() if k not in FIELDS]
+        self.extra = OrderedDict(extra) if extra else None
+
+    def get(self, key, default=None):
+        if key in FIELDS:
+            value = getattr(self, key)
+            return default if value is MISSING else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, MISSING) is not MISSING
+
+    def keys(self):
+        return [k for k in FIELDS if getattr(self, k) is not MISSING] + (list(self.extra) if self.extra else [])
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def to_dict(self):
+        return OrderedDict(self.items())
+
+    def __repr__(self):
+        return 'FactRecord(id={!r}, localLink={!r})'.format(self.get('id'), self.get('localLink'))
+
+
+def fact_id(value):
+    """The item id ``value`` as an int (42 and '42' alike), None if missing; ValueError if not numeric."""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise ValueError(value)
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError('item id {!r} is not a number'.format(value))
+
+
+def related_ids(item_id, max_id, count=3):
+    """The ``count`` ids after ``item_id``, wrapping past ``max_id`` back to 1."""
+    return [((rid - 1) % max_id) + 1 if rid > max_id else rid
+            for rid in range(item_id + 1, item_id + 1 + count)]
+
+
+def _hash_int(value):
+    return (value * 2654435761) & 0xffffffff
+
+
+def _hash_bytes(value):
+    return zlib.crc32(value) & 0xffffffff
+
+
+def _table_size(count):
+    size = 8
+    while size < count * 2:
+        size *= 2
+    return size
+
+
+class _ArrayScanner(object):
+    """Decodes a binary JSON array file chunk by chunk, tracking the byte offset of the cursor."""
+
+    def __init__(self, f):
+        self.f = f
+        self.decode = codecs.getincrementaldecoder('utf-8')().decode
+        raw = f.read(CHUNK_SIZE)
+        skip = len(codecs.BOM_UTF8) if raw.startswith(codecs.BOM_UTF8) else 0
+        self.eof = not raw
+        self.buf = self.decode(raw[skip:], self.eof)
+        self.pos = 0
+        self.byte_pos = skip  # file offset of buf[pos]
+
+    def refill(self):
+        raw = self.f.read(CHUNK_SIZE)
+        self.eof = not raw
+        self.buf, self.pos = self.buf[self.pos:] + self.decode(raw, self.eof), 0
+
+    def peek(self, skip_chars):
+        """Skip ``skip_chars`` (all single-byte) and return the next character, '' at the end."""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in skip_chars:
+                pos += 1
+            self.byte_pos += pos - self.pos
+            self.pos = pos
+            if pos < len(buf) or self.eof:
+                return buf[pos] if pos < len(buf) else ''
+            self.refill()
+
+    def value(self, parse):
+        while True:
+            try:
+                item, end = parse(self.buf, self.pos)
+                # a value running to the end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    break
+            except ValueError:
+                if self.eof:
+                    raise
+            self.refill()
+        start = self.byte_pos
+        self.byte_pos += len(self.buf[self.pos:end].encode('utf-8'))
+        self.pos = end
+        return start, self.byte_pos, item
+
+
+def _scan_array(f):
+    """Yield ``(byte_start, byte_end, item)`` for each element of the JSON array in binary file ``f``."""
+    parse = json.JSONDecoder(object_pairs_hook=OrderedDict).raw_decode
+    scanner = _ArrayScanner(f)
+    if scanner.peek(' \t\r\n') != '[':
+        raise ValueError('expected a JSON array')
+    scanner.peek('[')
+    while True:
+        ch = scanner.peek(' \t\r\n,')
+        if ch == ']':
+            return
+        if not ch:
+            raise ValueError('unterminated JSON array')
+        yield scanner.value(parse)
+
+
+def _scan_jsonl(f):
+    offset = 0
+    for line in f:
+        start = offset
+        if not offset and line.startswith(codecs.BOM_UTF8):
+            start += len(codecs.BOM_UTF8)
+            line_body = line[len(codecs.BOM_UTF8):]
+        else:
+            line_body = line
+        text = line_body.strip()
+        if text:
+            start += line_body.index(text[:1])
+            yield start, start + len(text), json.loads(text.decode('utf-8'), object_pairs_hook=OrderedDict)
+        offset += len(line)
+
+
+def build_index(data_path):
+    """Scan ``data_path`` once and return the index file contents (bytes)."""
+    st = os.stat(data_path)
+    records, links = [], []
+    link_pos = 0
+    with io.open(data_path, 'rb') as f:
+        scan = _scan_jsonl(f) if is_jsonl(data_path) else _scan_array(f)
+        for start, end, item in scan:
+            try:
+                item_id = fact_id(item.get('id'))
+            except ValueError as e:
+                raise ValueError('{}, item at byte {}: {}'.format(data_path, start, e))
+            has_id = item_id is not None
+            link = (item.get('localLink') or '').encode('utf-8')
+            records.append((start, end - start, item_id if has_id else NO_ID, link_pos, len(link), 1 if has_id else 0))
+            links.append(link)
+            link_pos += len(link)
+    ids = [r[2] for r in records if r[5]]
+    count = len(records)
+    id_slots = _table_size(count)
+    link_slots = _table_size(count)
+    id_table = [0] * id_slots
+    link_table = [0] * link_slots
+    for idx, rec in enumerate(records):
+        if rec[5]:
+            _insert(id_table, _hash_int(rec[2]), idx, lambda other: records[other][2] == rec[2])
+        if rec[4]:
+            _insert(link_table, _hash_bytes(links[idx]), idx, lambda other: links[other] == links[idx])
+    mtime = st.st_mtime_ns
+    parts = [HEADER.pack(MAGIC, st.st_size, mtime, count, id_slots, link_slots, link_pos,
+                         min(ids) if ids else 0, max(ids) if ids else 0)]
+    parts.extend(RECORD.pack(*rec) for rec in records)
+    parts.append(struct.pack('<{}I'.format(id_slots), *id_table))
+    parts.append(struct.pack('<{}I'.format(link_slots), *link_table))
+    parts.extend(links)
+    return b''.join(parts)
+
+
+def _insert(table, h, idx, same):
+    # linear probing; slots hold record index + 1, the first occurrence of a key wins
+    mask = len(table) - 1
+    slot = h & mask
+    while table[slot]:
+        if same(table[slot] - 1):
+            return
+        slot = (slot + 1) & mask
+    table[slot] = idx + 1
+
+
+def _map(path):
+    with io.open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class FactStore(object):
+    """Lazy, indexed view of one fact list; behaves as a read-only mapping id -> FactRecord."""
+
+    def __init__(self, path, index_path=None):
+        self.path = os.path.abspath(path)
+        self.index_path = index_path or self.path + INDEX_SUFFIX
+        self._open()
+
+    def _open(self):
+        self._data = _map(self.path)
+        index = self._load_index()
+        (_, _, _, self.count, self._id_slots, self._link_slots, links_size,
+         self.min_id, self.max_id) = HEADER.unpack_from(index, 0)
+        self._index = index
+        self._records_at = HEADER.size
+        self._ids_at = self._records_at + self.count * RECORD.size
+        self._links_table_at = self._ids_at + self._id_slots * SLOT.size
+        self._links_at = self._links_table_at + self._link_slots * SLOT.size
+        self._cache = {}
+        self._patches = ChangeLog(self.path).patches()
+        # items whose localLink was changed in the log: new link -> position
+        self._moved = {}
+        for key, fields in self._patches.items():
+            if fields.get('localLink') and key.lstrip('-').isdigit():
+                pos = self.position(int(key))
+                if pos is not None:
+                    self._moved[fields['localLink']] = pos
+
+    def _load_index(self):
+        st = os.stat(self.path)
+        mtime = st.st_mtime_ns
+        if os.path.isfile(self.index_path):
+            index = _map(self.index_path)
+            if len(index) >= HEADER.size:
+                magic, size, stamp = HEADER.unpack_from(index, 0)[:3]
+                if magic == MAGIC and size == st.st_size and stamp == mtime:
+                    return index
+        data = build_index(self.path)
+        try:
+            tmp = self.index_path + '.tmp'
+            with io.open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self.index_path)
+        except (IOError, OSError):
+            return data  # read-only location: keep the index in memory
+        return _map(self.index_path)
+
+    # pickled (e.g. into worker processes) by path; the maps are reopened there
+    def __getstate__(self):
+        return {'path': self.path, 'index_path': self.index_path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self.index_path = state['index_path']
+        self._open()
+
+    def close(self):
+        for m in (self._data, self._index):
+            if isinstance(m, mmap.mmap):
+                m.close()
+
+    # -- records -------------------------------------------------------------
+
+    def _record(self, pos):
+        return RECORD.unpack_from(self._index, self._records_at + pos * RECORD.size)
+
+    def at(self, pos):
+        """The item at position ``pos`` in file order, decoded on first use."""
+        item = self._cache.get(pos)
+        if item is None:
+            if not 0 <= pos < self.count:
+                raise IndexError(pos)
+            offset, length, item_id, _, _, has_id = self._record(pos)
+            raw = self._data[offset:offset + length].decode('utf-8')
+            data = json.loads(raw, object_pairs_hook=OrderedDict)
+            if self._patches and has_id:
+                data.update(self._patches.get(str(item_id), ()))
+            item = self._cache[pos] = FactRecord(data)
+        return item
+
+    def _link(self, pos):
+        link_off, link_len = self._record(pos)[3:5]
+        start = self._links_at + link_off
+        return bytes(self._index[start:start + link_len])
+
+    def _probe(self, table_at, slots, h, matches):
+        mask = slots - 1
+        slot = h & mask
+        while True:
+            ref = SLOT.unpack_from(self._index, table_at + slot * SLOT.size)[0]
+            if not ref:
+                return None
+            if matches(ref - 1):
+                return ref - 1
+            slot = (slot + 1) & mask
+
+    def position(self, item_id):
+        """File position of the item with ``item_id`` (an int or a numeric string), or None."""
+        try:
+            item_id = fact_id(item_id)
+        except ValueError:
+            return None
+        if item_id is None or not self.count:
+            return None
+        return self._probe(self._ids_at, self._id_slots, _hash_int(item_id),
+                           lambda pos: self._record(pos)[5] and self._record(pos)[2] == item_id)
+
+    def get(self, item_id, default=None):
+        pos = self.position(item_id)
+        return default if pos is None else self.at(pos)
+
+    def __getitem__(self, item_id):
+        pos = self.position(item_id)
+        if pos is None:
+            raise KeyError(item_id)
+        return self.at(pos)
+
+    def __contains__(self, item_id):
+        return self.position(item_id) is not None
+
+    def by_link(self, local_link, default=None):
+        if not local_link or not self.count:
+            return default
+        if local_link in self._moved:
+            return self.at(self._moved[local_link])
+        key = local_link.encode('utf-8')
+        pos = self._probe(self._links_table_at, self._link_slots, _hash_bytes(key),
+                          lambda p: self._link(p) == key)
+        if pos is None or (self._moved and self.at(pos).localLink != local_link):
+            return default
+        return self.at(pos)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for pos in range(self.count):
+            yield self.at(pos)
+
+    def keys(self):
+        return [rec[2] for rec in (self._record(p) for p in range(self.count)) if rec[5]]
+
+    def __bool__(self):
+        return self.count > 0
+
+    # -- neighbours ----------------------------------------------------------
+
+    def related(self, item, count=3):
+        """Existing items for the ``count`` ids after ``item`` (as the related-cards grid uses them)."""
+        gid = fact_id(item.get('id'))
+        if gid is None or not self.count:
+            return []
+        return [self.at(p) for p in (self.position(i) for i in related_ids(gid, self.max_id, count)) if p is not None]
+
+    def neighbours(self, item_id):
+        """(previous, next) items by id, or None at either end."""
+        item_id = fact_id(item_id)
+        return self.get(item_id - 1), self.get(item_id + 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or query fact list indexes.')
+    sub = parser.add_subparsers(dest='command')
+    p_index = sub.add_parser('index', help='(re)build the index of each data file')
+    p_index.add_argument('paths', nargs='+')
+    p_get = sub.add_parser('get', help='print one item by id or localLink')
+    p_get.add_argument('path')
+    p_get.add_argument('key')
+    args = parser.parse_args(argv)
+    if args.command == 'index':
+        for path in args.paths:
+            store = FactStore(path)
+            print('{}: {} items, ids {}..{} -> {}'.format(path, len(store), store.min_id, store.max_id,
+                                                          store.index_path))
+    elif args.command == 'get':
+        store = FactStore(args.path)
+        item = store.get(int(args.key)) if args.key.isdigit() else store.by_link(args.key)
+        if item is None:
+            parser.exit(1, 'not found: {}\n'.format(args.key))
+        print(json.dumps(item.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fragment registry: navbar, mobile menu, toggle script and footer.
+
+Fragments are built once per run for each language tree (root = English,
+cn/ = Chinese).  The footer is taken from that tree's index.html, the rest is
+rendered from the templates below with the tree's labels.  Every fragment
+carries a content hash so the build manifest can invalidate pages when a
+shared fragment changes.
+"""
+import hashlib
+import io
+import os
+import re
+from collections import namedtuple
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+Fragment = namedtuple('Fragment', 'name html hash')
+
+# Tree directory -> labels used inside the shared fragments and the detail page chrome
+TREE_LABELS = {
+    '': {
+        'lang': 'en',
+        'brand': 'NBA Fun Facts',
+        'home': 'Home',
+        'about': 'About',
+        'privacy': 'Privacy Policy',
+        'fact': 'Fun Fact',
+        'read_time': '3 min read',
+        'tip': 'Tip',
+        'tip_text': 'Consistent fundamentals and focus determine steady game performance.',
+    },
+    'cn': {
+        'lang': 'zh',
+        'brand': 'NBA冷门知识库',
+        'home': '首页',
+        'about': '关于我们',
+        'privacy': '隐私政策',
+        'fact': '冷知识',
+        'read_time': '3 分钟阅读',
+        'tip': '小贴士',
+        'tip_text': '持续的基本功与专注力，决定了稳定的比赛表现。',
+    },
+}
+
+FOOTER_RE = re.compile(r'(\<footer[\s\S]*?class=\"bg-nba-dark[\s\S]*?\</footer\>)')
+
+NAV_TEMPLATE = (
+    '\n        <div class="container mx-auto px-4 py-3 flex justify-between items-center">\n'
+    '            <div class="flex items-center space-x-2">\n'
+    '                <i class="fa fa-basketball-ball text-2xl text-nba-gold"></i>\n'
+    '                <h1 class="text-xl font-bold">{brand}</h1>\n'
+    '            </div>\n'
+    '            <div class="hidden md:flex items-center space-x-6">\n'
+    '                <a href="index.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
+    '                    <i class="fa fa-home mr-1"></i> {home}\n'
+    '                </a>\n'
+    '                <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
+    '                    <i class="fa fa-info-circle mr-1"></i> {about}\n'
+    '                </a>\n'
+    '                <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
+    '                    <i class="fa fa-shield mr-1"></i> {privacy}\n'
+    '                </a>\n'
+    '            </div>\n'
+    '            <div class="md:hidden">\n'
+    '                <button id="mobile-menu-toggle" class="text-white hover:text-nba-gold transition-colors duration-300">\n'
+    '                    <i class="fa fa-bars text-xl"></i>\n'
+    '                </button>\n'
+    '            </div>\n'
+    '        </div>\n'
+)
+
+# About/Privacy links appended to a desktop nav that only has Home
+NAV_LINKS_TEMPLATE = (
+    '\n                <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
+    '                    <i class="fa fa-info-circle mr-1"></i> {about}\n'
+    '                </a>\n'
+    '                <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
+    '                    <i class="fa fa-shield mr-1"></i> {privacy}\n'
+    '                </a>'
+)
+
+MOBILE_TOGGLE_TEMPLATE = (
+    '\n            <div class="md:hidden">\n'
+    '                <button id="mobile-menu-toggle" class="text-white hover:text-nba-gold transition-colors duration-300">\n'
+    '                    <i class="fa fa-bars text-xl"></i>\n'
+    '                </button>\n'
+    '            </div>'
+)
+
+MOBILE_MENU_TEMPLATE = (
+    '\n    <div id="mobile-menu" class="md:hidden bg-nba-purple text-white px-4 py-3 hidden">\n'
+    '        <div class="flex flex-col space-y-3">\n'
+    '            <a href="index.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
+    '                <i class="fa fa-home mr-1"></i> {home}\n'
+    '            </a>\n'
+    '            <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
+    '                <i class="fa fa-info-circle mr-1"></i> {about}\n'
+    '            </a>\n'
+    '            <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">\n'
+    '                <i class="fa fa-shield mr-1"></i> {privacy}\n'
+    '            </a>\n'
+    '        </div>\n'
+    '    </div>\n'
+)
+
+MOBILE_SCRIPT = (
+    '\n<script>\n'
+    'function toggleMobileMenu(){\n'
+    '  var btn=document.getElementById("mobile-menu-toggle");\n'
+    '  var menu=document.getElementById("mobile-menu");\n'
+    '  if(!btn||!menu) return;\n'
+    '  menu.classList.toggle("hidden");\n'
+    '}\n'
+    'document.addEventListener("DOMContentLoaded",function(){\n'
+    '  var btn=document.getElementById("mobile-menu-toggle");\n'
+    '  if(btn){ btn.addEventListener("click", toggleMobileMenu); }\n'
+    '});\n'
+    '</script>\n'
+)
+
+
+def _fragment(name, html):
+    digest = hashlib.sha256(html.encode('utf-8')).hexdigest()[:16] if html is not None else None
+    return Fragment(name, html, digest)
+
+
+def extract_footer(tree_dir):
+    """Canonical footer of a tree: the bg-nba-dark <footer> of its index.html."""
+    try:
+        with io.open(os.path.join(tree_dir, 'index.html'), 'r', encoding='utf-8') as f:
+            src = f.read()
+    except (IOError, OSError):
+        return None
+    m = FOOTER_RE.search(src)
+    return m.group(1) if m else None
+
+
+class FragmentSet(object):
+    """The fragments of one language tree; index by name, e.g. fragments['nav'].html."""
+
+    def __init__(self, tree, fragments):
+        self.tree = tree
+        self.labels = TREE_LABELS[tree]
+        self.lang = self.labels['lang']
+        self._fragments = dict((f.name, f) for f in fragments)
+
+    def __getitem__(self, name):
+        return self._fragments[name]
+
+    def html(self, name):
+        return self._fragments[name].html
+
+    def digest(self):
+        """Combined hash of all fragments, for cache keys."""
+        h = hashlib.sha256()
+        for name in sorted(self._fragments):
+            h.update('{}={};'.format(name, self._fragments[name].hash).encode('utf-8'))
+        return h.hexdigest()[:16]
+
+
+class FragmentRegistry(object):
+    """Loads each tree's fragments on first use and keeps them for the rest of the run."""
+
+    def __init__(self, root_dir=ROOT_DIR):
+        self.root_dir = root_dir
+        self._sets = {}
+
+    def for_tree(self, tree):
+        fragments = self._sets.get(tree)
+        if fragments is None:
+            fragments = self._sets[tree] = self._load(tree)
+        return fragments
+
+    def _load(self, tree):
+        labels = TREE_LABELS[tree]
+        return FragmentSet(tree, [
+            _fragment('nav', NAV_TEMPLATE.format(**labels)),
+            _fragment('nav_links', NAV_LINKS_TEMPLATE.format(**labels)),
+            _fragment('mobile_toggle', MOBILE_TOGGLE_TEMPLATE),
+            _fragment('mobile_menu', MOBILE_MENU_TEMPLATE.format(**labels)),
+            _fragment('mobile_script', MOBILE_SCRIPT),
+            _fragment('footer', extract_footer(os.path.join(self.root_dir, tree))),
+        ])
+
+
+# Process-wide registry shared by the generators and patchers
+registry = FragmentRegistry()
@@ -1,7 +1,19 @@
+import os
 import re
 
-# 读取start.md文件
-with open('start.md', 'r', encoding='utf-8') as f:
+import fragments as fragments_module
+import html_minify
+import page_assets
+from build_manifest import BuildManifest, code_version, hash_inputs
+from fragments import registry
+from html_minify import minify
+from page_assets import link_assets, load_assets
+
+MANIFEST_STAGE = 'star_pages'
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 读取start.md文件（相对脚本目录，便于被其他构建脚本导入）
+with open(os.path.join(ROOT_DIR, 'start.md'), 'r', encoding='utf-8') as f:
     content = f.read()
 
 # 定义12位明星的数据
@@ -123,6 +135,8 @@ def extract_star_content(num):
 # 生成HTML模板
 def generate_html(star):
     fun_fact, details = extract_star_content(star['num'])
+    # 导航栏、移动端菜单、页脚与脚本统一取自片段注册表
+    fragments = registry.for_tree('')
     
     # 处理details，转换为HTML列表
     details_html = ''
@@ -201,45 +215,8 @@ def generate_html(star):
 </head>
 <body class="bg-gray-100 font-sans">
     <!-- 导航栏 -->
-    <nav class="bg-nba-purple text-white shadow-md">
-        <div class="container mx-auto px-4 py-3 flex justify-between items-center">
-            <div class="flex items-center space-x-2">
-                <i class="fa fa-basketball-ball text-2xl text-nba-gold"></i>
-                <h1 class="text-xl font-bold">NBA Fun Facts</h1>
-            </div>
-            <div class="hidden md:flex items-center space-x-6">
-                <a href="index.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">
-                    <i class="fa fa-home mr-1"></i> Home
-                </a>
-                <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">
-                    <i class="fa fa-info-circle mr-1"></i> About
-                </a>
-                <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">
-                    <i class="fa fa-shield mr-1"></i> Privacy Policy
-                </a>
-            </div>
-            <div class="md:hidden">
-                <button id="mobile-menu-toggle" class="text-white hover:text-nba-gold transition-colors duration-300">
-                    <i class="fa fa-bars text-xl"></i>
-                </button>
-            </div>
-        </div>
-</nav>
-
-    <div id="mobile-menu" class="md:hidden bg-nba-purple text-white px-4 py-3 hidden">
-        <div class="flex flex-col space-y-3">
-            <a href="index.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">
-                <i class="fa fa-home mr-1"></i> Home
-            </a>
-            <a href="about.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">
-                <i class="fa fa-info-circle mr-1"></i> About
-            </a>
-            <a href="privacy.html" class="text-white hover:text-nba-gold transition-colors duration-300 flex items-center">
-                <i class="fa fa-shield mr-1"></i> Privacy Policy
-            </a>
-        </div>
-    </div>
-
+    <nav class="bg-nba-purple text-white shadow-md">{fragments.html('nav')}</nav>
+{fragments.html('mobile_menu')}
     <!-- 主内容区 -->
     <main class="container mx-auto px-4 py-8">
         <div class="max-w-4xl mx-auto bg-white rounded-lg shadow-lg overflow-hidden">
@@ -302,97 +279,40 @@ def generate_html(star):
     </main>
 
     <!-- 页脚 -->
-    <footer class="bg-nba-dark text-white pt-16 pb-8">
-        <div class="container mx-auto px-4">
-            <div class="grid grid-cols-1 md:grid-cols-4 gap-8 mb-12">
-                <div>
-                    <div class="flex items-center space-x-2 mb-4">
-                        <i class="fa fa-basketball-ball text-2xl text-nba-gold"></i>
-                        <span class="font-bold text-xl">NBA Fun Facts</span>
-                    </div>
-                    <p class="text-gray-400 mb-4">Explore lesser-known NBA stories and become a true hoops expert</p>
-                    <div class="flex space-x-4">
-                        <a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">
-                            <i class="fa fa-facebook"></i>
-                        </a>
-                        <a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">
-                            <i class="fa fa-twitter"></i>
-                        </a>
-                        <a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">
-                            <i class="fa fa-instagram"></i>
-                        </a>
-                        <a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">
-                            <i class="fa fa-youtube-play"></i>
-                        </a>
-                    </div>
-                </div>
-                
-                <div>
-                    <h4 class="font-bold text-lg mb-4">Quick Links</h4>
-                    <ul class="space-y-2">
-                        <li><a href="index.html" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">Home</a></li>
-                        <li><a href="index.html#facts" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">Fun Facts</a></li>
-                        <li><a href="about.html" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">About</a></li>
-                        <li><a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">Contact Us</a></li>
-                    </ul>
-                </div>
-                
-                <div>
-                    <h4 class="font-bold text-lg mb-4">Categories</h4>
-                    <ul class="space-y-2">
-                        <li><a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">Player Stories</a></li>
-                        <li><a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">Team History</a></li>
-                        <li><a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">Stats Trivia</a></li>
-                        <li><a href="#" class="text-gray-400 hover:text-nba-gold transition-colors duration-300">Rules Fun Facts</a></li>
-                    </ul>
-                </div>
-                
-                <div>
-                    <h4 class="font-bold text-lg mb-4">Contact Us</h4>
-                    <ul class="space-y-2">
-                        <li class="flex items-center text-gray-400">
-                            <i class="fa fa-envelope mr-2"></i> hcf@foxmail.com
-                        </li>
-                        <li class="flex items-center text-gray-400">
-                            <i class="fa fa-twitter mr-2"></i> @nbacoldfacts
-                        </li>
-                        <li class="flex items-center text-gray-400">
-                            <i class="fa fa-map-marker mr-2"></i> Longhua District, Shenzhen
-                        </li>
-                    </ul>
-                </div>
-            </div>
-            
-            <div class="border-t border-gray-700 pt-8 text-center text-gray-400 text-sm">
-                <p>© 2023 NBA Fun Facts - For learning and communication only; not affiliated with the NBA</p>
-            </div>
-        </div>
-    </footer>
-
-<script>
-function toggleMobileMenu(){{
-  var btn=document.getElementById("mobile-menu-toggle");
-  var menu=document.getElementById("mobile-menu");
-  if(!btn||!menu) return;
-  menu.classList.toggle("hidden");
-}}
-document.addEventListener("DOMContentLoaded",function(){{
-  var btn=document.getElementById("mobile-menu-toggle");
-  if(btn){{ btn.addEventListener("click", toggleMobileMenu); }}
-}});
-</script>
-</body>
+    {fragments.html('footer')}
+{fragments.html('mobile_script')}</body>
 </html>'''
     return html_template
 
-# 生成所有页面（4-12，因为1-3已经手动创建）
-for star in stars[3:]:
-    html = generate_html(star)
-    filename = f"start_{star['num']}.html"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(html)
-    print(f'Generated {filename}')
+def star_inputs_digest(star, base):
+    """Hash of ``base`` (code and fragments), the star's data, its start.md section and the related cards it links to."""
+    related = [[n, stars[n-1]['name'], stars[n-1]['title'], stars[n-1]['image_id']] for n in star['related']]
+    return hash_inputs(base, star, extract_star_content(star['num']), related)
+
+
+def main(force=False):
+    manifest = BuildManifest(MANIFEST_STAGE)
+    assets = load_assets('', ROOT_DIR)
+    base = hash_inputs(code_version(__file__, fragments_module.__file__, html_minify.__file__, page_assets.__file__),
+                       registry.for_tree('').digest(), assets.digest)
+    # 生成所有页面（4-12，因为1-3已经手动创建）
+    for star in stars[3:]:
+        filename = f"start_{star['num']}.html"
+        path = os.path.join(ROOT_DIR, filename)
+        digest = star_inputs_digest(star, base)
+        if not force and manifest.is_fresh(path, digest):
+            print(f'Skipped {filename} (unchanged)')
+            continue
+        html = link_assets(minify(generate_html(star)), assets)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        manifest.record(path, digest)
+        print(f'Generated {filename}')
+    manifest.save()
 
-print('All pages generated successfully!')
+    print('All pages generated successfully!')
 
 
+if __name__ == '__main__':
+    import sys
+    main(force='--force' in sys.argv[1:])
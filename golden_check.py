@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Golden-output equivalence harness for the page rewrite engines.
+
+    snapshot  run the reference engine of a pipeline over its inputs and store
+              every output under _golden/<pipeline>/<source>/
+    check     run a candidate engine over the same inputs, compare each page
+              with the snapshot and time candidate against reference
+
+Pipelines and their reference engines:
+
+    apply_details    apply_details_to_pages:transform_page
+                     (the old step-by-step chain matched it on every page
+                     with a navbar; it built the mobile menu of pages without
+                     one from their old links instead of the standard menu)
+    translate_root   translate_root_html_en:translate_html_content
+                     (the old sequential passes are
+                     translate_root_html_en:legacy_translate_html_content;
+                     they differ only where list order hid a longer phrase)
+
+Sources: ``real`` is the site itself (root and cn/ trees), ``synthetic`` a
+corpus from synthetic_corpus.py (cached under _bench/corpus-<size>/).
+
+Each page is reported as ``identical`` (same bytes), ``dom-equal`` (only
+whitespace between tags or attribute order differ) or ``different``; check
+exits non-zero when any page is ``different`` or missing from the snapshot.
+
+Usage:
+    python golden_check.py snapshot --pipeline apply_details --source real,synthetic
+    python golden_check.py check --pipeline apply_details --candidate apply_details_to_pages:transform_page
+"""
+import argparse
+import difflib
+import glob
+import hashlib
+import importlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from html.parser import HTMLParser
+
+import apply_details_to_pages as apply_details
+import synthetic_corpus
+from fragments import FragmentRegistry
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(ROOT_DIR, '_golden')
+BENCH_DIR = os.path.join(ROOT_DIR, '_bench')
+TREE_DIRS = apply_details.TREE_DIRS
+SOURCES = ('real', 'synthetic')
+WS_RE = re.compile(r'\s+')
+
+
+def _read(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write(path, text):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with io.open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+def _sha(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def resolve(spec):
+    """'module:function' -> callable."""
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError('engine must be given as module:function, got {!r}'.format(spec))
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# -- inputs ----------------------------------------------------------------
+# A case is (key, args): key is the page path relative to the source root,
+# args the positional arguments of the engine after loading.
+
+def source_root(source, args):
+    if source == 'real':
+        return ROOT_DIR
+    corpus = args.corpus or os.path.join(BENCH_DIR, 'corpus-{}'.format(args.size))
+    if not os.path.isfile(os.path.join(corpus, 'corpus.json')):
+        print('Generating synthetic corpus of {} items in {} ...'.format(args.size, corpus))
+        synthetic_corpus.generate_corpus(corpus, args.size, pages=args.pages)
+    return corpus
+
+
+def apply_details_cases(root):
+    registry = FragmentRegistry(root)
+    for tree in TREE_DIRS:
+        if not os.path.isfile(os.path.join(root, tree, 'nba.json')):
+            continue
+        data = apply_details.load_tree(tree, root_dir=root, fragment_registry=registry)
+        for item in data['store']:
+            local_link = item.get('localLink')
+            path = os.path.join(data['dir'], local_link or '')
+            # Same selection as process_item: pages with a file and a detail
+            if not local_link or not item.get('detail') or not os.path.isfile(path):
+                continue
+            key = '/'.join(p for p in (tree, local_link) if p)
+            yield key, (_read(path), item, data['id_to_item'], data['fragments'])
+
+
+def translate_root_cases(root):
+    # Root pages are the production input; the Chinese pages exercise every phrase
+    paths = sorted(glob.glob(os.path.join(root, '*.html')))
+    for sub in ('cn', 'translate'):
+        paths += sorted(glob.glob(os.path.join(root, sub, '*.html')))
+    for path in paths:
+        key = os.path.relpath(path, root).replace(os.sep, '/')
+        yield key, (_read(path),)
+
+
+PIPELINES = {
+    'apply_details': {
+        'reference': 'apply_details_to_pages:transform_page',
+        'candidate': 'apply_details_to_pages:transform_page',
+        'cases': apply_details_cases,
+    },
+    'translate_root': {
+        'reference': 'translate_root_html_en:translate_html_content',
+        'candidate': 'translate_root_html_en:translate_html_content',
+        'cases': translate_root_cases,
+    },
+}
+
+
+# -- comparison ------------------------------------------------------------
+
+class _DomEvents(HTMLParser):
+    """Flattens a document into comparable events, ignoring insignificant whitespace."""
+
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=False)
+        self.events = []
+
+    def handle_starttag(self, tag, attrs):
+        self.events.append(('start', tag, tuple(sorted((k, v or '') for k, v in attrs))))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self.events.append(('end', tag))
+
+    def handle_data(self, data):
+        text = WS_RE.sub(' ', data).strip()
+        if text:
+            self.events.append(('text', text))
+
+    def handle_entityref(self, name):
+        self.handle_data('&{};'.format(name))
+
+    def handle_charref(self, name):
+        self.handle_data('&#{};'.format(name))
+
+    def handle_comment(self, data):
+        self.events.append(('comment', WS_RE.sub(' ', data).strip()))
+
+    def handle_decl(self, decl):
+        self.events.append(('decl', decl.lower()))
+
+
+def dom_events(html):
+    parser = _DomEvents()
+    parser.feed(html)
+    parser.close()
+    # Adjacent text events split by entity refs are one text node
+    merged = []
+    for ev in parser.events:
+        if ev[0] == 'text' and merged and merged[-1][0] == 'text':
+            merged[-1] = ('text', merged[-1][1] + ' ' + ev[1])
+        else:
+            merged.append(ev)
+    return merged
+
+
+def compare_outputs(expected, actual, context=3, max_lines=20):
+    """Return (status, detail) for one page."""
+    if expected == actual:
+        return 'identical', None
+    first = next((i for i, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+    detail = {
+        'first_byte_diff': len(expected[:first].encode('utf-8')),
+        'expected_bytes': len(expected.encode('utf-8')),
+        'actual_bytes': len(actual.encode('utf-8')),
+    }
+    exp_dom, act_dom = dom_events(expected), dom_events(actual)
+    if exp_dom == act_dom:
+        return 'dom-equal', detail
+    idx = next((i for i, (a, b) in enumerate(zip(exp_dom, act_dom)) if a != b), min(len(exp_dom), len(act_dom)))
+    detail['first_dom_diff'] = {
+        'event': idx,
+        'expected': list(exp_dom[idx]) if idx < len(exp_dom) else None,
+        'actual': list(act_dom[idx]) if idx < len(act_dom) else None,
+    }
+    diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(), 'expected', 'actual', n=context, lineterm='')
+    detail['diff'] = [line for _, line in zip(range(max_lines), diff)]
+    return 'different', detail
+
+
+# -- commands --------------------------------------------------------------
+
+def snapshot_dir(args, pipeline, source):
+    return os.path.join(args.golden_dir, pipeline, source)
+
+
+def snapshot(args, pipeline, source):
+    spec = PIPELINES[pipeline]
+    engine = resolve(args.reference or spec['reference'])
+    out_dir = snapshot_dir(args, pipeline, source)
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    index = {}
+    started = time.perf_counter()
+    for key, case in spec['cases'](source_root(source, args)):
+        output = engine(*case)
+        _write(os.path.join(out_dir, 'pages', key), output)
+        index[key] = _sha(output)
+    elapsed = time.perf_counter() - started
+    meta = {'engine': args.reference or spec['reference'], 'pages': index, 'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    _write(os.path.join(out_dir, 'index.json'), json.dumps(meta, indent=1, sort_keys=True))
+    print('[{}/{}] snapshot of {} pages by {} ({:.2f}s)'.format(pipeline, source, len(index), meta['engine'], elapsed))
+    return meta
+
+
+def check(args, pipeline, source):
+    spec = PIPELINES[pipeline]
+    out_dir = snapshot_dir(args, pipeline, source)
+    index_path = os.path.join(out_dir, 'index.json')
+    if not os.path.isfile(index_path):
+        print('[{}/{}] no snapshot; run "snapshot" first'.format(pipeline, source))
+        return {'pipeline': pipeline, 'source': source, 'error': 'no snapshot'}
+    meta = json.loads(_read(index_path))
+    reference = resolve(meta['engine'])
+    candidate_spec = args.candidate or spec['candidate']
+    candidate = resolve(candidate_spec)
+    clock = time.perf_counter
+
+    counts = {'identical': 0, 'dom-equal': 0, 'different': 0, 'missing': 0}
+    pages = {}
+    ref_time = cand_time = 0.0
+    for key, case in spec['cases'](source_root(source, args)):
+        started = clock()
+        reference(*case)
+        ref_time += clock() - started
+        started = clock()
+        output = candidate(*case)
+        cand_time += clock() - started
+        if key not in meta['pages']:
+            status, detail = 'missing', None
+        elif _sha(output) == meta['pages'][key]:
+            status, detail = 'identical', None
+        else:
+            status, detail = compare_outputs(_read(os.path.join(out_dir, 'pages', key)), output)
+        counts[status] += 1
+        if status != 'identical':
+            pages[key] = {'status': status, 'detail': detail}
+
+    speedup = ref_time / cand_time if cand_time else None
+    report = {
+        'pipeline': pipeline,
+        'source': source,
+        'reference': meta['engine'],
+        'candidate': candidate_spec,
+        'counts': counts,
+        'reference_seconds': round(ref_time, 6),
+        'candidate_seconds': round(cand_time, 6),
+        'speedup': round(speedup, 3) if speedup else None,
+        'pages': pages,
+    }
+    print('[{}/{}] {}: identical {identical}, dom-equal {dom-equal}, different {different}, missing {missing}; '
+          'reference {:.3f}s, candidate {:.3f}s, speedup x{}'.format(
+              pipeline, source, candidate_spec, ref_time, cand_time, report['speedup'], **counts))
+    shown = 0
+    for key in sorted(pages):
+        if shown >= args.show:
+            break
+        entry = pages[key]
+        if entry['status'] == 'dom-equal' and not args.verbose:
+            continue
+        shown += 1
+        print('  {} [{}] first byte diff at {}'.format(key, entry['status'], (entry['detail'] or {}).get('first_byte_diff')))
+        for line in (entry['detail'] or {}).get('diff', []):
+            print('    ' + line)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Snapshot reference output and check candidate engines against it.')
+    parser.add_argument('command', choices=('snapshot', 'check'))
+    parser.add_argument('--pipeline', default=','.join(sorted(PIPELINES)), help='comma separated: apply_details,translate_root')
+    parser.add_argument('--source', default=','.join(SOURCES), help='comma separated: real,synthetic')
+    parser.add_argument('--reference', default=None, help='snapshot engine as module:function (default: the pipeline reference)')
+    parser.add_argument('--candidate', default=None, help='engine to check as module:function')
+    parser.add_argument('--size', type=int, default=1000, help='synthetic corpus size (default: 1000)')
+    parser.add_argument('--pages', type=int, default=None, help='cap synthetic pages per tree')
+    parser.add_argument('--corpus', default=None, help='use this synthetic corpus directory')
+    parser.add_argument('--golden-dir', default=GOLDEN_DIR, help='snapshot directory (default: _golden/)')
+    parser.add_argument('--report', default=None, help='write the check report as JSON')
+    parser.add_argument('--show', type=int, default=5, help='differing pages to print per pipeline')
+    parser.add_argument('--verbose', '-v', action='store_true', help='also print dom-equal pages')
+    args = parser.parse_args(argv)
+
+    pipelines = [p.strip() for p in args.pipeline.split(',') if p.strip()]
+    sources = [s.strip() for s in args.source.split(',') if s.strip()]
+    for name in pipelines:
+        if name not in PIPELINES:
+            parser.error('unknown pipeline {!r}'.format(name))
+    for name in sources:
+        if name not in SOURCES:
+            parser.error('unknown source {!r}'.format(name))
+
+    reports = []
+    for pipeline in pipelines:
+        for source in sources:
+            if args.command == 'snapshot':
+                snapshot(args, pipeline, source)
+            else:
+                reports.append(check(args, pipeline, source))
+    if args.command == 'check':
+        if args.report:
+            _write(args.report, json.dumps(reports, ensure_ascii=False, indent=1))
+        failed = any(r.get('error') or r['counts']['different'] or r['counts']['missing'] for r in reports)
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
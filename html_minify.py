@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Whitespace and comment minifier for the generated pages.
+
+The fact and star pages are written with the indentation of their Python
+templates, section comments (<!-- 渐变分隔线 -->) and blank lines, 20-40%
+of their bytes.  minify() drops the comments and collapses the text between
+tags without changing what the browser renders:
+
+- a run of HTML whitespace (space, tab, CR, LF, FF; never U+00A0 or U+3000)
+  becomes one space, and is dropped entirely next to a block-level tag
+  (BLOCK_TAGS) and anywhere in <head>, where it is not rendered.  Next to
+  anything else, <script>, <style> and <br> included, it stays one space,
+  so the words around an inline script keep their space;
+- comments go, except IE conditional comments;
+- the contents of <script>, <style> (including text/tailwindcss), <pre>,
+  <textarea> and of any element whose class or style keeps whitespace
+  (whitespace-pre, whitespace-pre-line, ...) are copied byte for byte, as are
+  the tags themselves.
+
+minify() is idempotent.  apply_details_to_pages, generate_star_pages and
+render_site pass every page they write through it; existing files can be
+minified in place with
+
+    python html_minify.py nba_1.html cn/nba_*.html
+
+The examples in minify() run with ``python -m doctest html_minify.py``.
+"""
+import argparse
+import glob
+import io
+import re
+
+from page_index import CLASS_ATTR_RE, TOKEN_RE, VOID_TAGS
+
+HTML_SPACE_RE = re.compile('[ \t\r\n\f]+')
+# whitespace next to these is not rendered (block boxes and the document's own tags); tags
+# that can sit in a line of text (script, style, br, ...) are not here
+BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'body', 'dd', 'details', 'div', 'dl', 'dt', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'head', 'header', 'hr', 'html',
+    'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead',
+    'tr', 'ul',
+])
+# elements whose whole content is kept as is
+RAW_TAGS = frozenset(['script', 'style', 'textarea'])
+PRESERVE_TAGS = frozenset(['pre'])
+STYLE_ATTR_RE = re.compile(r'\sstyle\s*=\s*"[^"]*white-space\s*:\s*(?:pre|break-spaces)', re.IGNORECASE)
+
+
+def _keeps_whitespace(tag, attrs):
+    if tag in PRESERVE_TAGS:
+        return True
+    m = CLASS_ATTR_RE.search(attrs)
+    if m and any(c.startswith('whitespace-pre') or c == 'whitespace-break-spaces' for c in m.group(1).split()):
+        return True
+    return bool(STYLE_ATTR_RE.search(attrs))
+
+
+def _element_end(html, tag, pos):
+    """End offset of the close tag matching an open ``tag`` whose content starts at ``pos``."""
+    if tag in RAW_TAGS:
+        close = re.compile(r'</' + tag + r'\s*>', re.IGNORECASE).search(html, pos)
+        return close.end() if close else len(html)
+    depth = 1
+    for m in TOKEN_RE.finditer(html, pos):
+        if m.group(2) and m.group(2).lower() == tag:
+            if m.group(1):
+                depth -= 1
+                if not depth:
+                    return m.end()
+            elif not m.group(3).rstrip().endswith('/'):
+                depth += 1
+    return len(html)
+
+
+def _collapse(text, after_block, before_block):
+    text = HTML_SPACE_RE.sub(' ', text)
+    if after_block:
+        text = text.lstrip(' ')
+    if before_block:
+        text = text.rstrip(' ')
+    return text
+
+
+def minify(html):
+    r"""
+    ``html`` without comments and unrendered whitespace.
+
+    >>> minify('<p>\n  foo <script>x()</script>\n  bar<br>\n  baz\n</p>')
+    '<p>foo <script>x()</script> bar<br> baz</p>'
+    >>> minify('<head>\n  <title>T</title>\n  <script src="a.js"></script>\n</head>')
+    '<head><title>T</title><script src="a.js"></script></head>'
+    """
+    out = []
+    text = []              # text since the last kept token; dropped comments join its parts
+    after_block = True     # the start of the document counts as a block boundary
+    in_head = False        # nothing between the tags of <head> is rendered
+    pos = 0
+    search = TOKEN_RE.search
+    while True:
+        m = search(html, pos)
+        if not m:
+            break
+        text.append(html[pos:m.start()])
+        pos = m.end()
+        token = m.group(0)
+        tag = m.group(2)
+        if not tag and not token.startswith(('<!--[if', '<!--<![endif]')):
+            continue  # comment
+        name = tag.lower() if tag else None
+        is_block = name is None or name in BLOCK_TAGS
+        out.append(_collapse(''.join(text), after_block or in_head, is_block or in_head))
+        text = []
+        out.append(token)
+        after_block = is_block
+        if name == 'head':
+            in_head = not m.group(1)
+        if tag and not m.group(1):
+            if name not in VOID_TAGS and (name in RAW_TAGS or _keeps_whitespace(name, m.group(3))):
+                end = _element_end(html, name, pos)
+                out.append(html[pos:end])
+                pos = end
+                # the close tag of a kept element is the last thing emitted
+                after_block = name in BLOCK_TAGS
+    text.append(html[pos:])
+    out.append(_collapse(''.join(text), after_block, True))
+    return ''.join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Minify HTML files in place (comments and inter-tag whitespace).')
+    parser.add_argument('paths', nargs='+', help='files or glob patterns')
+    args = parser.parse_args(argv)
+    before = after = count = 0
+    for pattern in args.paths:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with io.open(path, 'r', encoding='utf-8', newline='') as f:
+                html = f.read()
+            small = minify(html)
+            before += len(html.encode('utf-8'))
+            after += len(small.encode('utf-8'))
+            if small != html:
+                with io.open(path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(small)
+                count += 1
+    print('Minified {} files: {} -> {} bytes'.format(count, before, after))
+
+
+if __name__ == '__main__':
+    main()
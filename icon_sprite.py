@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+SVG sprite for the Font Awesome icons of the site.
+
+Every page loaded the whole font-awesome@4.7.0 stylesheet from jsDelivr (a
+render-blocking cross-origin request) and then its webfont, for about twenty
+icons.  build_site.py's icons stage replaces both with one small cached file:
+
+- the glyphs of the icons the site uses live in fa-icons.json, imported once
+  from the Font Awesome 4.7.0 SVG webfont and CSS (the glyph shapes and the
+  class name -> codepoint table):
+
+      python icon_sprite.py --font fontawesome-webfont.svg --css font-awesome.css
+
+  importing again after a page starts using a new icon;
+- sprite() writes the used glyphs as <symbol id="fa-home"> elements of
+  icons.<hash>.svg;
+- link_page() turns each ``<i class="fa fa-home mr-1"></i>`` (markup and JS
+  strings alike) into ``<svg class="fa-icon mr-1" ...><use
+  href="icons.<hash>.svg#fa-home"></use></svg>`` and drops the Font Awesome
+  <link> once no icon of the page needs it.  The .fa-icon rule of
+  tailwind_css.CUSTOM_CSS sizes the icons like the font did (1em high, on
+  the baseline, in the current color).  The page generators call it through
+  page_assets.link_assets(), so the <i> markup of fragments.py and the
+  templates never reaches a page.
+
+fa-icons.json records a name that is not a Font Awesome 4.7 icon as null (such
+as fa-basketball-ball, a 5.x name): the font had no glyph for it either, so
+its <i> is left as is.  A page using an icon missing from fa-icons.json keeps
+the stylesheet link until the glyphs are imported again.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import re
+from collections import OrderedDict
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+ICONS_FILE = 'fa-icons.json'
+SOURCE_GLOBS = ('templates/*.html', 'build_site.py', 'fragments.py', 'generate_star_pages.py')
+# font units: 1em is 1792, the baseline is 1536 below the top
+UNITS_PER_EM = 1792
+ASCENT = 1536
+ICON_CLASS = 'fa-icon'
+
+NAME_RE = re.compile(r'(?<![\w-])fa-([a-z0-9]+(?:-[a-z0-9]+)*)')
+# modifiers of the fa class itself, not icons
+MODIFIERS = frozenset(['lg', '2x', '3x', '4x', '5x', 'fw', 'ul', 'li', 'border', 'pull-left', 'pull-right',
+                       'spin', 'pulse', 'rotate-90', 'rotate-180', 'rotate-270', 'flip-horizontal',
+                       'flip-vertical', 'inverse', 'stack', 'stack-1x', 'stack-2x', 'icon'])
+GLYPH_RE = re.compile(r'<glyph\s([^>]*?)/?>', re.DOTALL)
+ATTR_RE = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+CSS_ICON_RE = re.compile(r'((?:\.fa-[a-z0-9-]+:before,?)+)\{content:"\\([0-9a-f]+)"\}')
+
+ICON_TAG_RE = re.compile(r'<i(\s[^<>]*)?>\s*</i>')
+CLASS_RE = re.compile(r'\sclass="([^"]*)"')
+USE_RE = re.compile(r'<use href="((?:\.\./)*)icons\.[0-9a-f]{12}\.svg#')
+FA_LINK_RE = re.compile(r'[ \t]*<link\s[^>]*font-awesome[^>]*>[ \t]*\n?')
+
+
+# -- import ------------------------------------------------------------------
+
+def font_glyphs(font_svg, css):
+    """{icon name: (advance width, path)} from the Font Awesome SVG webfont and its CSS."""
+    by_code = {}
+    for m in GLYPH_RE.finditer(font_svg):
+        attrs = dict(ATTR_RE.findall(m.group(1)))
+        code = attrs.get('unicode', '')
+        entity = re.match(r'^&#x([0-9a-fA-F]+);$', code)
+        if entity:
+            code = int(entity.group(1), 16)
+        elif len(code) == 1:
+            code = ord(code)
+        else:
+            continue
+        by_code[code] = (int(float(attrs.get('horiz-adv-x', 1536))), attrs.get('d', ''))
+    glyphs = {}
+    for selectors, code in CSS_ICON_RE.findall(css):
+        for name in re.findall(r'\.fa-([a-z0-9-]+):before', selectors):
+            if int(code, 16) in by_code:
+                glyphs[name] = by_code[int(code, 16)]
+    return glyphs
+
+
+def used_icons(paths):
+    """Icon names (without fa-) mentioned in the files at ``paths``."""
+    names = set()
+    for path in paths:
+        with io.open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            names.update(NAME_RE.findall(f.read()))
+    return set(n for n in names if n not in MODIFIERS)
+
+
+def source_paths(root_dir):
+    paths = []
+    for tree in ('', 'cn'):
+        paths.extend(sorted(glob.glob(os.path.join(root_dir, tree, '*.html'))))
+    for pattern in SOURCE_GLOBS:
+        paths.extend(sorted(glob.glob(os.path.join(root_dir, pattern))))
+    return paths
+
+
+def load_icons(root_dir):
+    path = os.path.join(root_dir, ICONS_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def import_icons(root_dir, font_path, css_path):
+    """Update fa-icons.json with the glyph of every icon the site uses."""
+    with io.open(font_path, 'r', encoding='utf-8') as f:
+        font_svg = f.read()
+    with io.open(css_path, 'r', encoding='utf-8') as f:
+        css = f.read()
+    glyphs = font_glyphs(font_svg, css)
+    icons = OrderedDict()
+    for name in sorted(used_icons(source_paths(root_dir))):
+        if name in glyphs:
+            width, d = glyphs[name]
+            icons[name] = OrderedDict([('width', width), ('d', d)])
+        else:
+            icons[name] = None
+    with io.open(os.path.join(root_dir, ICONS_FILE), 'w', encoding='utf-8', newline='') as f:
+        f.write(json.dumps(icons, indent=1, ensure_ascii=False) + '\n')
+    return icons
+
+
+# -- output ------------------------------------------------------------------
+
+def sprite(icons, names):
+    """The sprite with a <symbol id="fa-NAME"> for each of ``names`` that has a glyph."""
+    symbols = []
+    for name in sorted(names):
+        glyph = icons.get(name)
+        if glyph:
+            symbols.append('<symbol id="fa-{}" viewBox="0 0 {} {}"><path transform="matrix(1 0 0 -1 0 {})" '
+                           'd="{}"/></symbol>'.format(name, glyph['width'], UNITS_PER_EM, ASCENT, glyph['d']))
+    return '<svg xmlns="http://www.w3.org/2000/svg">\n{}\n</svg>\n'.format('\n'.join(symbols))
+
+
+def _icon_svg(attrs, name, classes, glyph, href):
+    width = '{:.3f}'.format(float(glyph['width']) / UNITS_PER_EM).rstrip('0').rstrip('.')
+    attrs = CLASS_RE.sub(lambda m: ' class="{}"'.format(' '.join([ICON_CLASS] + classes)), attrs, 1)
+    return '<svg{} width="{}em" height="1em" aria-hidden="true"><use href="{}#fa-{}"></use></svg>'.format(
+        attrs, width, href, name)
+
+
+def sprite_href(html):
+    """Path of the sprite the icons of ``html`` already use, or None."""
+    m = re.search(r'<use href="((?:\.\./)*icons\.[0-9a-f]{12}\.svg)#', html)
+    return m.group(1) if m else None
+
+
+def link_page(html, href, icons):
+    """
+    ``html`` with its Font Awesome icons drawn from the sprite at ``href``.
+    Returns (html, names of icons it kept as <i> because fa-icons.json lacks them).
+    """
+    html = USE_RE.sub('<use href="{}#'.format(href), html)
+    missing = set()
+
+    def replace(m):
+        attrs = m.group(1) or ''
+        cls = CLASS_RE.search(attrs)
+        tokens = cls.group(1).split() if cls else []
+        names = [t[3:] for t in tokens if t.startswith('fa-') and t[3:] not in MODIFIERS]
+        others = [t for t in tokens if t != 'fa' and not t.startswith('fa-')]
+        if 'fa' not in tokens or len(names) != 1 or len(others) + len(names) + 1 != len(tokens):
+            if 'fa' in tokens:
+                missing.update(names or ['?'])
+            return m.group(0)
+        name = names[0]
+        if name not in icons:
+            missing.add(name)
+            return m.group(0)
+        if icons[name] is None:
+            return m.group(0)  # no such glyph in Font Awesome 4.7: the font drew nothing either
+        return _icon_svg(attrs, name, others, icons[name], href)
+
+    html = ICON_TAG_RE.sub(replace, html)
+    if not missing:
+        html = FA_LINK_RE.sub('', html)
+    return html, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import the glyphs of the icons the site uses into ' + ICONS_FILE)
+    parser.add_argument('--font', required=True, help='Font Awesome 4.7.0 fontawesome-webfont.svg')
+    parser.add_argument('--css', required=True, help='Font Awesome 4.7.0 font-awesome.css or .min.css')
+    parser.add_argument('--root', default=ROOT_DIR)
+    args = parser.parse_args(argv)
+    icons = import_icons(os.path.abspath(args.root), args.font, args.css)
+    missing = sorted(n for n, g in icons.items() if g is None)
+    print('{} icons written to {}'.format(len(icons) - len(missing), ICONS_FILE))
+    if missing:
+        print('not in Font Awesome 4.7: ' + ', '.join('fa-' + n for n in missing))
+
+
+if __name__ == '__main__':
+    main()
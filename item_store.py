@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming storage for the item lists (nba.json, cn/nba.json, ...).
+
+The scripts used to json.load the whole file and json.dump all of it back for
+every change.  Here items are read one at a time and written one at a time,
+so a pipeline of generators processes any number of items in constant memory:
+
+    iter_items(path)              yield items (OrderedDict) from a JSON array
+                                  or a JSON Lines file, UTF-8 BOM tolerated
+    ItemWriter(path)              write items as the same indent=2 array (or
+                                  JSON Lines for *.jsonl); atomic on close
+    rewrite_items(path, step)     stream the file through ``step`` (an item
+                                  iterator -> item iterator) and replace it
+    record_changes(path, step)    run ``step`` the same way but only append
+                                  the fields it changed to the change log
+
+Readers see the file with its change log (change_log.py) applied; a rewrite
+folds the log into the file, as does
+
+    python item_store.py compact nba.json
+
+rewrite_items can start at a given item id (earlier items are copied
+unchanged) and, when ``step`` fails part way, copies the unprocessed items
+through so the file stays complete and reports the id to resume from.
+
+The array writer produces exactly what json.dump(items, ensure_ascii=False,
+indent=2) did; JSON Lines holds one compact item per line and converts back
+losslessly:
+
+    python item_store.py convert nba.json nba.jsonl
+    python item_store.py convert nba.jsonl nba.json --bom
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import sys
+from collections import OrderedDict
+
+from change_log import ChangeLog, apply_patch
+
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+BOM = '\ufeff'
+CHUNK_SIZE = 1 << 16
+
+
+def is_jsonl(path):
+    return path.lower().endswith(JSONL_EXTENSIONS)
+
+
+def has_bom(path):
+    if not os.path.exists(path):
+        return False
+    with io.open(path, 'rb') as f:
+        return f.read(3) == b'\xef\xbb\xbf'
+
+
+def _iter_jsonl(f, decode):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield decode(line)
+
+
+def _iter_array(f, decoder):
+    """Incrementally decode the elements of a top-level JSON array."""
+    buf = f.read(CHUNK_SIZE).lstrip(BOM).lstrip()
+    eof = False
+    if not buf.startswith('['):
+        raise ValueError('expected a JSON array')
+    pos = 1
+    while True:
+        # skip whitespace and the separating comma
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+        if pos >= len(buf):
+            raise ValueError('unterminated JSON array')
+        if buf[pos] == ']':
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # a value running to the end of the buffer may continue in the next chunk
+                if end < len(buf) or eof:
+                    break
+            except ValueError:
+                if eof:
+                    raise
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+        yield item
+        pos = end
+
+
+def iter_items(path, changes=True):
+    """Yield the items of ``path`` one by one (key order kept), with its change log applied."""
+    # the log is read before the file is opened, see change_log
+    patches = ChangeLog(path).patches() if changes else None
+    with io.open(path, 'r', encoding='utf-8-sig') as f:
+        if is_jsonl(path):
+            items = _iter_jsonl(f, lambda s: json.loads(s, object_pairs_hook=OrderedDict))
+        else:
+            items = _iter_array(f, json.JSONDecoder(object_pairs_hook=OrderedDict))
+        for item in items:
+            yield apply_patch(item, patches) if patches else item
+
+
+def load_items(path):
+    return list(iter_items(path))
+
+
+class ItemWriter(object):
+    """
+    Writes items to ``path + '.tmp'`` and moves it over ``path`` on close();
+    abort() (or an exception inside ``with``) leaves ``path`` untouched.
+    """
+
+    def __init__(self, path, bom=False, indent=2):
+        self.path = path
+        self.jsonl = is_jsonl(path)
+        self.indent = indent
+        self.count = 0
+        self._tmp = path + '.tmp'
+        self._f = io.open(self._tmp, 'w', encoding='utf-8', newline='')
+        if bom and not self.jsonl:
+            self._f.write(BOM)
+
+    def write(self, item):
+        if self.jsonl:
+            self._f.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')) + '\n')
+        else:
+            text = json.dumps(item, ensure_ascii=False, indent=self.indent, separators=(',', ': '))
+            pad = ' ' * self.indent
+            self._f.write(('[\n' if not self.count else ',\n') + pad + text.replace('\n', '\n' + pad))
+        self.count += 1
+
+    def close(self):
+        if not self.jsonl:
+            self._f.write('\n]' if self.count else '[]')
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._f.close()
+        os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _same_id(item, item_id):
+    return str(item.get('id')) == str(item_id)
+
+
+def rewrite_items(path, step, start_id=None, out_path=None):
+    """
+    Stream the items of ``path`` through ``step`` into ``out_path`` (default:
+    replace ``path``).  Items before the one with id ``start_id`` are copied
+    unchanged.  If ``step`` raises, every item it had not yet passed on is
+    copied through unchanged, the file is still written, and the exception is
+    re-raised with ``resume_id`` set to the first unprocessed item.
+    Returns the number of items written.
+
+    Holds the file's lock throughout; the change log is folded into the
+    result and, when ``path`` itself is replaced, emptied.
+    """
+    log = ChangeLog(path)
+    with log.lock():
+        return _rewrite_locked(path, step, start_id, out_path, log)
+
+
+def _rewrite_locked(path, step, start_id, out_path, log):
+    source = iter_items(path)
+    writer = ItemWriter(out_path or path, bom=has_bom(path))
+
+    def finish():
+        writer.close()
+        if out_path is None or os.path.abspath(out_path) == os.path.abspath(path):
+            log.clear()
+
+    try:
+        if start_id is not None:
+            for item in source:
+                if _same_id(item, start_id):
+                    source = itertools.chain([item], source)
+                    break
+                writer.write(item)
+            else:
+                raise ValueError('no item with id {} in {}'.format(start_id, path))
+    except BaseException:
+        writer.abort()
+        raise
+
+    # items taken from the source but not yet written, by identity
+    in_flight = OrderedDict()
+
+    def feed():
+        for item in source:
+            in_flight[id(item)] = item
+            yield item
+
+    try:
+        for item in step(feed()):
+            in_flight.pop(id(item), None)
+            writer.write(item)
+    except BaseException as e:
+        try:
+            unprocessed = list(in_flight.values())
+            for item in itertools.chain(unprocessed, source):
+                writer.write(item)
+            finish()
+        except BaseException:
+            writer.abort()
+            raise
+        e.resume_id = unprocessed[0].get('id') if unprocessed else None
+        raise
+    finish()
+    return writer.count
+
+
+def record_changes(path, step, flush_every=50):
+    """
+    Stream the items of ``path`` through ``step`` like rewrite_items, but
+    leave the file alone and append the fields ``step`` changed to its change
+    log (every ``flush_every`` changed items, and on failure).  Items are
+    matched by id, so ``step`` may yield new dicts, but it must keep their
+    order; items it drops are forgotten once a later item comes out.  A
+    rerun after an interruption sees the recorded changes.  Returns the
+    changed item count.
+    """
+    log = ChangeLog(path)
+    before = OrderedDict()  # id -> fields as fed, for the items still inside ``step``
+    pending = []
+    changed = [0]
+
+    def feed():
+        for item in iter_items(path):
+            before[item.get('id')] = dict(item)
+            yield item
+
+    def flush():
+        changed[0] += log.extend(pending)
+        del pending[:]
+
+    try:
+        for item in step(feed()):
+            item_id = item.get('id')
+            if item_id not in before:
+                raise ValueError('step yielded item id {!r}, which it was not given (the change log is keyed '
+                                 'by id)'.format(item_id))
+            while True:
+                fed_id, old = before.popitem(last=False)
+                if fed_id == item_id:
+                    break
+            fields = OrderedDict((k, v) for k, v in item.items() if k not in old or old[k] != v)
+            if fields:
+                pending.append((item_id, fields))
+                if len(pending) >= flush_every:
+                    flush()
+    finally:
+        flush()
+    return changed[0]
+
+
+def compact(path):
+    """Fold the change log of ``path`` into the file. Returns (log entries, items)."""
+    entries = len(ChangeLog(path))
+    if not entries:
+        return 0, None
+    return entries, rewrite_items(path, lambda items: items)
+
+
+def argv_option(name, argv=None):
+    """Value following ``name`` (e.g. '--resume-from') in ``argv`` (default sys.argv), else None."""
+    argv = sys.argv[1:] if argv is None else argv
+    if name in argv:
+        i = argv.index(name)
+        if i + 1 < len(argv):
+            return argv[i + 1]
+    return None
+
+
+def report_interrupted(error):
+    resume_id = getattr(error, 'resume_id', None)
+    if resume_id is not None:
+        print('Stopped before id {}; the file is complete. Rerun with --resume-from {} to continue.'.format(
+            resume_id, resume_id))
+
+
+def convert(src, dst, bom=False):
+    with ItemWriter(dst, bom=bom) as writer:
+        for item in iter_items(src):
+            writer.write(item)
+    return writer.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert item lists and fold their change logs.')
+    sub = parser.add_subparsers(dest='command')
+    p_convert = sub.add_parser('convert', help='convert between JSON array and JSON Lines')
+    p_convert.add_argument('src')
+    p_convert.add_argument('dst')
+    p_convert.add_argument('--bom', action='store_true', help='write a UTF-8 BOM (JSON array output only)')
+    p_compact = sub.add_parser('compact', help='fold each file\'s change log into it')
+    p_compact.add_argument('paths', nargs='+')
+    args = parser.parse_args(argv)
+    if args.command == 'convert':
+        count = convert(args.src, args.dst, bom=args.bom)
+        print('Wrote {} items to {}'.format(count, args.dst))
+    elif args.command == 'compact':
+        for path in args.paths:
+            entries, count = compact(path)
+            if entries:
+                print('{}: folded {} changes, {} items written'.format(path, entries, count))
+            else:
+                print('{}: no pending changes'.format(path))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
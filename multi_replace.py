@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled multi-pattern literal replacement.
+
+MultiReplacer is built once from a (pattern, replacement) table and rewrites a
+text in a single scan with leftmost-longest semantics: at each position the
+longest pattern starting there wins, matches never overlap, and replacements
+are never rescanned.  So the table no longer has to be ordered "longer first",
+and the cost per text does not grow with the number of patterns.
+
+The patterns are stored in a character trie.  A regex character class of all
+first characters jumps straight to the next position where a match can start
+(the skip runs in C), and from there the trie is walked for at most the length
+of the longest pattern.  The text is rebuilt once through an EditBuffer.
+
+    replacer = MultiReplacer([('冷门知识点', 'Fun Facts'), ('冷门知识', 'Fun Facts')])
+    html = replacer.sub(html)
+    replacer.hits    # pattern -> number of replacements so far
+"""
+import re
+from collections import OrderedDict
+
+from edit_buffer import EditBuffer
+
+_END = None  # trie key marking the end of a pattern
+
+
+class MultiReplacer(object):
+    def __init__(self, pairs):
+        # first entry wins for duplicate patterns, as with sequential replaces
+        self.table = OrderedDict()
+        for pattern, replacement in pairs:
+            if pattern and pattern not in self.table:
+                self.table[pattern] = replacement
+        self.trie = {}
+        for pattern in self.table:
+            node = self.trie
+            for ch in pattern:
+                node = node.setdefault(ch, {})
+            node[_END] = pattern
+        firsts = sorted(set(p[0] for p in self.table))
+        self._first_re = re.compile('[' + ''.join(re.escape(c) for c in firsts) + ']') if firsts else None
+        self.hits = OrderedDict((p, 0) for p in self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+    def finditer(self, text):
+        """Yield ``(start, end, pattern)`` for the leftmost-longest, non-overlapping matches."""
+        if self._first_re is None:
+            return
+        search = self._first_re.search
+        trie = self.trie
+        n = len(text)
+        m = search(text, 0)
+        while m is not None:
+            start = m.start()
+            node = trie
+            found = None
+            j = start
+            while j < n:
+                node = node.get(text[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    found = (j, node[_END])
+            if found is None:
+                m = search(text, start + 1)
+            else:
+                yield start, found[0], found[1]
+                m = search(text, found[0])
+
+    def sub(self, text):
+        """Replace every match in one pass; counts go to ``hits``."""
+        buf = EditBuffer(text)
+        table, hits = self.table, self.hits
+        for start, end, pattern in self.finditer(text):
+            buf.replace(start, end, table[pattern])
+            hits[pattern] += 1
+        return buf.render()
+
+    def reset_hits(self):
+        for pattern in self.hits:
+            self.hits[pattern] = 0
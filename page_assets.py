@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Hashed assets of the pages, for the page generators.
+
+build_site.py's icons, css and scripts stages rewrite every page to draw its
+icons from icons.<hash>.svg, load tailwind.<hash>.css and carry the
+third-party block.  apply_details_to_pages.py, generate_star_pages.py and
+render_site.py link each page they write the same way, so a regenerated page
+does not come out with the Font Awesome <i> tags and CDN tags of its template
+until the next build.  load_assets() resolves the hashed names, the icon table
+and the third-party tags once per tree; link_assets() only rewrites the page.
+A page using an icon or class the current sprite or stylesheet lacks still
+needs ``python build_site.py``.
+"""
+import glob
+import hashlib
+import os
+from collections import namedtuple
+
+import icon_sprite
+import tailwind_css
+import third_party
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SPRITE = 'icons.svg'
+STYLESHEET = 'tailwind.css'
+HASH_GLOB = '[0-9a-f]' * 12
+
+# Hrefs are relative to the pages of one tree; tags is None without a third_party.json
+PageAssets = namedtuple('PageAssets', 'sprite stylesheet icons tags favicon digest')
+
+
+def current(root_dir, name):
+    """The hashed copy of ``name`` in ``root_dir`` (icons.svg -> icons.<hash>.svg), or None."""
+    stem, ext = os.path.splitext(name)
+    paths = glob.glob(os.path.join(root_dir, stem + '.' + HASH_GLOB + ext))
+    return os.path.basename(max(paths, key=os.path.getmtime)) if paths else None
+
+
+def load_assets(tree, root_dir=ROOT_DIR):
+    """The assets the pages of ``tree`` link to, with a digest for cache keys."""
+    prefix = '../' if tree else ''
+    sprite = current(root_dir, SPRITE)
+    stylesheet = current(root_dir, STYLESHEET)
+    tags = favicon = None
+    if os.path.isfile(os.path.join(root_dir, third_party.CONFIG_FILE)):
+        config = third_party.load_config(root_dir)
+        tags = third_party.render_tags(config)
+        favicon = config.get('favicon') and prefix + config['favicon']
+    h = hashlib.sha256()
+    for part in (sprite, stylesheet, favicon, tags and '\n'.join(tags)):
+        h.update('{!r};'.format(part).encode('utf-8'))
+    return PageAssets(sprite and prefix + sprite, stylesheet and prefix + stylesheet,
+                      icon_sprite.load_icons(root_dir) if sprite else {}, tags, favicon, h.hexdigest()[:16])
+
+
+def link_assets(html, assets):
+    """``html`` linked to the sprite, stylesheet and third-party tags of ``assets`` (load_assets())."""
+    if assets.sprite:
+        html = icon_sprite.link_page(html, assets.sprite, assets.icons)[0]
+    if assets.stylesheet:
+        html = tailwind_css.link_page(html, assets.stylesheet)
+    if assets.tags is not None:
+        html = third_party.link_page(html, assets.tags, assets.favicon)
+    return html
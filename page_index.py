@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Single-pass element index for the generated HTML pages.
+
+The page is tokenized once: every element gets its open/close span and class
+tokens recorded, so transforms can look blocks up by class selector instead of
+re-running their own regexes over the whole document.  Edits are collected
+against the original text in an EditBuffer and applied in one final splice by
+render().
+
+Closing tags are matched per tag name by depth counting, and the bodies of <script>/<style> and comments are
+skipped so markup inside template strings is never mistaken for page structure.
+"""
+import re
+from edit_buffer import EditBuffer
+
+TOKEN_RE = re.compile(r'<!--[\s\S]*?-->|<(/?)([a-zA-Z][a-zA-Z0-9:-]*)([^>]*)>')
+CLASS_ATTR_RE = re.compile(r'\sclass\s*=\s*"([^"]*)"', re.IGNORECASE)
+RAW_TEXT_TAGS = ('script', 'style')
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr',
+])
+
+
+class Element(object):
+    __slots__ = ('tag', 'start', 'open_end', 'close_start', 'close_end', 'attrs', 'class_attr', 'classes')
+
+    def __init__(self, tag, start, open_end, attrs):
+        self.tag = tag
+        self.start = start
+        self.open_end = open_end
+        self.close_start = -1
+        self.close_end = -1
+        self.attrs = attrs
+        m = CLASS_ATTR_RE.search(attrs)
+        self.class_attr = m.group(1) if m else None
+        self.classes = frozenset(self.class_attr.split()) if self.class_attr else frozenset()
+
+    @property
+    def closed(self):
+        return self.close_start != -1
+
+    def __repr__(self):
+        return '<Element {} class="{}" {}:{}>'.format(self.tag, self.class_attr or '', self.start, self.close_end)
+
+
+class PageIndex(object):
+    """Tokenize ``html`` once and answer element lookups from the recorded spans."""
+
+    def __init__(self, html):
+        self.html = html
+        self.elements = []
+        self.by_tag = {}
+        self.by_class = {}
+        self.closing = {}
+        self._buffer = EditBuffer(html)
+        self._scan()
+
+    def _scan(self):
+        html = self.html
+        open_stacks = {}
+        pos = 0
+        search = TOKEN_RE.search
+        while True:
+            m = search(html, pos)
+            if not m:
+                break
+            pos = m.end()
+            name = m.group(2)
+            if not name:
+                continue  # comment
+            tag = name.lower()
+            if m.group(1):
+                self.closing.setdefault(tag, []).append((m.start(), m.end()))
+                stack = open_stacks.get(tag)
+                if stack:
+                    el = stack.pop()
+                    el.close_start = m.start()
+                    el.close_end = m.end()
+                continue
+            el = Element(tag, m.start(), m.end(), m.group(3))
+            self.elements.append(el)
+            self.by_tag.setdefault(tag, []).append(el)
+            for token in el.classes:
+                self.by_class.setdefault(token, []).append(el)
+            if tag in RAW_TEXT_TAGS:
+                end_re = re.compile(r'</' + tag + r'\s*>', re.IGNORECASE)
+                close = end_re.search(html, pos)
+                if close:
+                    el.close_start = close.start()
+                    el.close_end = close.end()
+                    self.closing.setdefault(tag, []).append((close.start(), close.end()))
+                    pos = close.end()
+                continue
+            if tag in VOID_TAGS or m.group(3).rstrip().endswith('/'):
+                continue
+            open_stacks.setdefault(tag, []).append(el)
+
+    def select(self, tag, class_selector, exact=False):
+        """
+        Return all ``tag`` elements whose class tokens include every token of
+        ``class_selector`` (a space separated class string), in document order.
+        With ``exact=True`` the class attribute must equal ``class_selector``.
+        """
+        tokens = class_selector.split()
+        if not tokens:
+            return [el for el in self.by_tag.get(tag, [])]
+        # Narrow by the rarest token, then check the rest
+        candidates = min((self.by_class.get(t, []) for t in tokens), key=len)
+        result = []
+        for el in candidates:
+            if el.tag != tag:
+                continue
+            if exact:
+                if el.class_attr == class_selector:
+                    result.append(el)
+            elif all(t in el.classes for t in tokens):
+                result.append(el)
+        return result
+
+    def select_one(self, tag, class_selector, exact=False):
+        found = self.select(tag, class_selector, exact=exact)
+        return found[0] if found else None
+
+    def first(self, tag):
+        found = self.by_tag.get(tag)
+        return found[0] if found else None
+
+    def find_tag(self, tag, predicate):
+        for el in self.by_tag.get(tag, []):
+            if predicate(el):
+                return el
+        return None
+
+    def first_close(self, tag):
+        found = self.closing.get(tag)
+        return found[0] if found else None
+
+    def last_close(self, tag):
+        found = self.closing.get(tag)
+        return found[-1] if found else None
+
+    def open_tag(self, el):
+        return self.html[el.start:el.open_end]
+
+    def inner(self, el):
+        return self.html[el.open_end:el.close_start]
+
+    # -- edits -------------------------------------------------------------
+
+    def replace(self, start, end, text):
+        self._buffer.replace(start, end, text)
+
+    def insert(self, pos, text):
+        self._buffer.insert(pos, text)
+
+    def replace_inner(self, el, text):
+        self.replace(el.open_end, el.close_start, text)
+
+    def render(self):
+        """Apply all collected edits in a single splice over the original text."""
+        return self._buffer.render()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Precompressed .gz siblings for the HTML, JSON, XML, CSS and SVG files of the site.
+
+Every page and data file was compressed per request by the server, if at all.
+This writes ``<file>.gz`` next to each one at maximum effort (zopfli when the
+``zopfli`` package is installed, else gzip level 9), so a static server with
+gzip_static-style support serves the bytes as they are:
+
+    python precompress.py [--root DIR] [--jobs N] [--force]
+
+or as the last stage of ``python build_site.py``.  The .gz files are
+reproducible (no name or timestamp in the header).  A file whose content hash
+is unchanged since its .gz was written is skipped; the "gzip" section of
+.build-manifest.json holds, per .gz, that hash and the original and compressed
+sizes.  A .gz that would not be smaller than its file is not written, and .gz
+files whose source is gone are removed.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import multiprocessing
+import os
+
+from build_manifest import BuildManifest
+
+try:
+    from zopfli import gzip as zopfli_gzip
+except ImportError:
+    zopfli_gzip = None
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_STAGE = 'gzip'
+EXTENSIONS = ('.html', '.json', '.xml', '.css', '.svg')
+# sources, caches and scratch output rather than served files
+SKIP_DIRS = ('templates', '__pycache__', 'node_modules')
+COMPRESSOR = 'zopfli' if zopfli_gzip is not None else 'gzip-9'
+
+
+def gzip_bytes(data):
+    if zopfli_gzip is not None:
+        return zopfli_gzip.compress(data)
+    buf = io.BytesIO()
+    with gzip.GzipFile(filename='', mode='wb', fileobj=buf, compresslevel=9, mtime=0) as f:
+        f.write(data)
+    return buf.getvalue()
+
+
+def iter_sources(root_dir):
+    """Files to compress under ``root_dir``, skipping dot/underscore directories and SKIP_DIRS."""
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(('.', '_')) and d not in SKIP_DIRS)
+        for name in sorted(filenames):
+            if name.endswith(EXTENSIONS) and not name.startswith('.'):
+                yield os.path.join(dirpath, name)
+
+
+def _digest(data):
+    return '{}:{}'.format(COMPRESSOR, hashlib.sha256(data).hexdigest())
+
+
+def _compress_file(src):
+    """Worker: write ``src + '.gz'`` (or remove it when it would not be smaller). Returns sizes."""
+    with io.open(src, 'rb') as f:
+        data = f.read()
+    packed = gzip_bytes(data)
+    out = src + '.gz'
+    if len(packed) >= len(data):
+        if os.path.exists(out):
+            os.remove(out)
+        return src, len(data), None
+    with io.open(out + '.tmp', 'wb') as f:
+        f.write(packed)
+    os.replace(out + '.tmp', out)
+    return src, len(data), len(packed)
+
+
+def _remove_orphans(root_dir, sources, manifest):
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith(('.', '_')) and d not in SKIP_DIRS]
+        for name in filenames:
+            if name.endswith(tuple(ext + '.gz' for ext in EXTENSIONS)):
+                path = os.path.join(dirpath, name)
+                if path[:-3] not in sources:
+                    os.remove(path)
+                    manifest.forget(path)
+                    removed += 1
+    return removed
+
+
+def precompress(root_dir=ROOT_DIR, jobs=None, force=False):
+    """
+    Bring the .gz siblings under ``root_dir`` up to date with ``jobs`` worker
+    processes (default: one per CPU).  Returns counts and total sizes.
+    """
+    manifest = BuildManifest(MANIFEST_STAGE, os.path.join(root_dir, '.build-manifest.json'))
+    if force:
+        manifest.entries.clear()
+    stats = {'written': 0, 'same': 0, 'removed': 0, 'bytes': 0, 'gzip_bytes': 0}
+    sources = set()
+    tasks = []
+    digests = {}
+    for src in iter_sources(root_dir):
+        sources.add(src)
+        with io.open(src, 'rb') as f:
+            digest = _digest(f.read())
+        # also fresh when no .gz was written for it and none has appeared since
+        if manifest.is_fresh(src + '.gz', digest):
+            entry = manifest.get(src + '.gz')
+            stats['same'] += 1
+            stats['bytes'] += entry['size']
+            stats['gzip_bytes'] += entry['gzip'] or entry['size']
+            continue
+        digests[src] = digest
+        tasks.append(src)
+
+    jobs = jobs or multiprocessing.cpu_count()
+    if jobs > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(tasks)))
+        try:
+            results = pool.map(_compress_file, tasks, max(1, len(tasks) // (jobs * 4)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_compress_file(t) for t in tasks]
+
+    for src, size, packed in results:
+        # files left uncompressed are recorded too, so they are not retried every build
+        manifest.record(src + '.gz', digests[src], size=size, gzip=packed)
+        stats['written'] += 1
+        stats['bytes'] += size
+        stats['gzip_bytes'] += packed or size
+    stats['removed'] = _remove_orphans(root_dir, sources, manifest)
+    manifest.save()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write .gz siblings for the HTML, JSON, XML, CSS and SVG files of the site.')
+    parser.add_argument('--root', default=ROOT_DIR, help='site root (default: this directory)')
+    parser.add_argument('--jobs', '-j', type=int, default=0, help='worker processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='ignore the build manifest and recompress every file')
+    args = parser.parse_args(argv)
+    stats = precompress(os.path.abspath(args.root), jobs=args.jobs or None, force=args.force)
+    print('[gzip] written: {}, unchanged: {}, removed: {}; {} -> {} bytes ({})'.format(
+        stats['written'], stats['same'], stats['removed'], stats['bytes'], stats['gzip_bytes'], COMPRESSOR))
+
+
+if __name__ == '__main__':
+    main()
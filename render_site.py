@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Render the whole site from its data in one pass with the compiled templates.
+
+    nba.json / cn/nba.json      -> nba_N.html, cn/nba_N.html   (templates/fact.html)
+    start.md                    -> start_N.html                (templates/star.html)
+    BasketballGames-all.json    -> game_N.html                 (templates/game.html)
+
+Every page extends templates/base.html, which owns the head, navbar, mobile
+menu, footer and shared script (taken from the fragment registry).  Templates
+are compiled once per process, so the per-page cost is building the view
+model and joining strings.  Pages are minified (html_minify) and linked to
+the hashed sprite, stylesheet and third-party tags (page_assets), which are
+copied next to them.  Output goes to --out (default _site/) and a file is
+only rewritten when its content changed.
+
+Usage:
+    python render_site.py [--out DIR] [--only fact,star,game]
+"""
+import argparse
+import glob
+import io
+import os
+import time
+
+from apply_details_to_pages import (
+    build_avatar_url,
+    extract_probable_player_name,
+    find_related_items,
+    load_items,
+    split_sentences,
+)
+from fact_store import FactStore, fact_id
+from fragments import TREE_LABELS, registry
+from html_minify import minify
+from page_assets import HASH_GLOB, SPRITE, STYLESHEET, current, link_assets, load_assets
+from template_engine import loader
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT = os.path.join(ROOT_DIR, '_site')
+GAMES_JSON = os.path.join(ROOT_DIR, 'BasketballGames-all.json')
+TREE_DIRS = ('', 'cn')
+KINDS = ('fact', 'star', 'game')
+
+# Per-tree page labels, on top of the fragment labels (fact, tip, ...) of fragments.TREE_LABELS
+PAGE_LABELS = {
+    '': {
+        'html_lang': 'en',
+        'title_suffix': ' - NBA Fun Facts',
+        'favicon': 'favicon.ico',
+        'related': 'Related Fun Facts',
+    },
+    'cn': {
+        'html_lang': 'zh-CN',
+        'title_suffix': ' - NBA冷门知识点',
+        'favicon': '../favicon.ico',
+        'related': '相关冷门知识点',
+    },
+}
+
+
+def page_labels(tree):
+    labels = dict(TREE_LABELS[tree])
+    labels.update(PAGE_LABELS[tree])
+    return labels
+
+
+def fragment_context(tree):
+    fragments = registry.for_tree(tree)
+    return dict((name, fragments.html(name) or '') for name in
+                ('nav', 'mobile_menu', 'footer', 'mobile_script'))
+
+
+def write_if_changed(path, content):
+    try:
+        with io.open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except (IOError, OSError):
+        pass
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with io.open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+    return True
+
+
+def copy_if_changed(src, dst):
+    with open(src, 'rb') as f:
+        data = f.read()
+    try:
+        with open(dst, 'rb') as f:
+            if f.read() == data:
+                return False
+    except (IOError, OSError):
+        pass
+    with open(dst, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def copy_assets(out_dir, stats):
+    """Copy the current hashed sprite and stylesheet and the favicon into ``out_dir``, dropping older hashed copies."""
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    names = [current(ROOT_DIR, name) for name in (SPRITE, STYLESHEET)]
+    for name in (SPRITE, STYLESHEET):
+        stem, ext = os.path.splitext(name)
+        for path in glob.glob(os.path.join(out_dir, stem + '.' + HASH_GLOB + ext)):
+            if os.path.basename(path) not in names:
+                os.remove(path)
+    names.append(PAGE_LABELS['']['favicon'])
+    for name in names:
+        if name and os.path.isfile(os.path.join(ROOT_DIR, name)):
+            changed = copy_if_changed(os.path.join(ROOT_DIR, name), os.path.join(out_dir, name))
+            stats['written' if changed else 'same'] += 1
+
+
+def render_page(template, ctx, assets):
+    """Minified page of ``template`` linked to ``assets`` (page_assets.load_assets())."""
+    ctx['page']['stylesheet'] = assets.stylesheet
+    return link_assets(minify(template.render(ctx)), assets)
+
+
+# -- view models -----------------------------------------------------------
+
+def fact_card(item, idx):
+    seed = (fact_id(item.get('id')) or (idx + 1)) % 1000
+    detail = item.get('detail', '') or ''
+    return {
+        'href': item.get('localLink', '#'),
+        'img': 'https://picsum.photos/id/{}/600/300'.format(seed),
+        'title': item.get('title', ''),
+        'summary': detail[:19] + '...',
+    }
+
+
+def fact_context(tree, item, id_to_item):
+    labels = page_labels(tree)
+    title = item.get('title', '') or ''
+    detail = (item.get('detail', '') or '').strip()
+    name = extract_probable_player_name(title)
+    parts = (split_sentences(detail, tree) or [detail]) if detail else []
+    quote = parts[0] if parts else ''
+    if len(quote) > 60:
+        quote = quote[:60] + '...'
+    related = find_related_items(item, id_to_item)
+    return {
+        'page': {
+            'html_lang': labels['html_lang'],
+            'title': title + labels['title_suffix'],
+            'favicon': labels['favicon'],
+            'heading': title,
+            'hero_src': build_avatar_url(name) if name else
+                        'https://picsum.photos/id/{}/1200/400'.format((fact_id(item.get('id')) or 1) % 1000),
+            'badge_name': name or labels['fact'],
+            'lead': parts[0] if parts else '',
+            'paragraphs': parts[1:],
+            'quote': quote,
+        },
+        'labels': labels,
+        'related': [fact_card(it, idx) for idx, it in enumerate(related)],
+    }
+
+
+def star_context(star_pages, star):
+    labels = page_labels('')
+    fun_fact, details = star_pages.extract_star_content(star['num'])
+    detail_list = [d.strip('- ').strip() for d in details.split('\n') if d.strip().startswith('-')]
+
+    def headshot(s, size):
+        return {
+            'headshot': 'https://cdn.nba.com/headshots/nba/latest/1040x760/{}.png'.format(s['image_id']),
+            'fallback': 'https://picsum.photos/id/{}/{}'.format(s['image_id'], size),
+        }
+
+    view = dict(star, fun_fact=fun_fact, details=[d for d in detail_list if d])
+    view.update(headshot(star, '1200/400'))
+    related = []
+    for num in star['related']:
+        rel = star_pages.stars[num - 1]
+        card = {'href': 'start_{}.html'.format(num), 'name': rel['name'],
+                'heading': rel['title'][:50], 'summary': rel['title'][:60]}
+        card.update(headshot(rel, '600/300'))
+        related.append(card)
+    return {
+        'page': {
+            'html_lang': labels['html_lang'],
+            'title': star['title'] + labels['title_suffix'],
+            'favicon': labels['favicon'],
+        },
+        'labels': labels,
+        'star': view,
+        'related': related,
+    }
+
+
+def game_context(game):
+    labels = page_labels('')
+    # Same title formatting as game-detail.html: dash-separated words, capitalized
+    title = ' '.join(w[:1].upper() + w[1:] for w in (game.get('name') or '').split('-'))
+    return {
+        'page': {
+            'html_lang': labels['html_lang'],
+            'title': title + labels['title_suffix'],
+            'favicon': labels['favicon'],
+        },
+        'game': {
+            'title': title,
+            'src': game.get('link') or game.get('href') or '',
+            'detail': game.get('detail') or 'No detailed information available for this game.',
+        },
+    }
+
+
+# -- render passes ---------------------------------------------------------
+
+def render_facts(out_dir, stats):
+    template = loader.get('fact.html')
+    for tree in TREE_DIRS:
+        store = FactStore(os.path.join(ROOT_DIR, tree, 'nba.json'))
+        fragments = fragment_context(tree)
+        assets = load_assets(tree)
+        for item in store:
+            local_link = item.get('localLink')
+            if not local_link:
+                continue
+            ctx = fact_context(tree, item, store)
+            ctx['fragments'] = fragments
+            html = render_page(template, ctx, assets)
+            stats['written' if write_if_changed(os.path.join(out_dir, tree, local_link), html) else 'same'] += 1
+
+
+def render_stars(out_dir, stats):
+    import generate_star_pages as star_pages
+    template = loader.get('star.html')
+    fragments = fragment_context('')
+    assets = load_assets('')
+    for star in star_pages.stars:
+        ctx = star_context(star_pages, star)
+        ctx['fragments'] = fragments
+        html = render_page(template, ctx, assets)
+        path = os.path.join(out_dir, 'start_{}.html'.format(star['num']))
+        stats['written' if write_if_changed(path, html) else 'same'] += 1
+
+
+def render_games(out_dir, stats):
+    template = loader.get('game.html')
+    fragments = fragment_context('')
+    assets = load_assets('')
+    games = load_items(GAMES_JSON)
+    for game in games:
+        ctx = game_context(game)
+        ctx['fragments'] = fragments
+        html = render_page(template, ctx, assets)
+        path = os.path.join(out_dir, 'game_{}.html'.format(game.get('id')))
+        stats['written' if write_if_changed(path, html) else 'same'] += 1
+
+
+RENDERERS = {'fact': render_facts, 'star': render_stars, 'game': render_games, 'assets': copy_assets}
+
+
+def render_site(out_dir=DEFAULT_OUT, kinds=KINDS):
+    stats = {}
+    for kind in list(kinds) + ['assets']:
+        counts = {'written': 0, 'same': 0}
+        started = time.time()
+        RENDERERS[kind](out_dir, counts)
+        counts['seconds'] = round(time.time() - started, 3)
+        stats[kind] = counts
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render fact, star and game pages from the site data.')
+    parser.add_argument('--out', default=DEFAULT_OUT, help='output directory (default: _site/)')
+    parser.add_argument('--only', default=','.join(KINDS), help='comma separated page kinds: fact,star,game')
+    args = parser.parse_args(argv)
+    kinds = [k.strip() for k in args.only.split(',') if k.strip()]
+    unknown = [k for k in kinds if k not in RENDERERS]
+    if unknown:
+        parser.error('unknown page kind(s): {}'.format(', '.join(unknown)))
+    stats = render_site(os.path.abspath(args.out), kinds)
+    for kind in kinds + ['assets']:
+        s = stats[kind]
+        print('[{}] written: {}, unchanged: {} ({}s)'.format(kind, s['written'], s['same'], s['seconds']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Prebuilt inverted index for the search box on index.html and cn/index.html.
+
+The search used to fetch the whole nba.json and run indexOf over every title.
+Instead build_site.py's search stage writes, per tree:
+
+    search/manifest.json     bucket count, shard files and hashes
+    search/s-N.json          {token: [doc, score, doc, score, ...]}  (doc deltas)
+
+Tokens are lowercased latin/digit words (accents folded, one-letter words
+and a few stopwords dropped) and, for CJK runs, character bigrams plus every
+single character, so a one-character query (丹) finds the character anywhere
+(乔丹).  Title occurrences weigh TITLE_WEIGHT, detail occurrences 1, at most
+MAX_FIELD_HITS counted per field.
+
+A token lives in bucket fnv1a(key) % buckets, where the key is its first
+CJK character or its first two latin characters.  Every token sharing a
+key is in the same shard, so a query token is looked up, as exact token or as
+prefix ("jor" -> jordan), in exactly one shard.  The bucket count grows with
+the index so shards stay around SHARD_BYTES: a query downloads a few small
+shards whatever the corpus size.
+
+Document numbers are positions in the cards shards (build_site.py, id
+descending), so the client renders hits with the card data it already has.
+query() here is the reference for the JavaScript lookup in the pages; a
+query with no usable term (only one-letter words or stopwords) gives None,
+and both fall back to matching the titles:
+
+    python search_index.py cn 乔丹
+    python search_index.py '' jordan --root _bench/corpus-10000
+"""
+import argparse
+import io
+import json
+import os
+import re
+import unicodedata
+from collections import OrderedDict, defaultdict
+
+SEARCH_DIR = 'search'
+SHARD_BYTES = 32 * 1024
+TITLE_WEIGHT = 3
+MAX_FIELD_HITS = 3
+MAX_RESULTS = 30
+STOPWORDS = frozenset('a an and are as at be by for from in is it of on or the to was were with'.split())
+
+CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+TOKEN_RE = re.compile('([{0}]+)|([a-z0-9]+)'.format(CJK))
+CJK_RE = re.compile('[{0}]'.format(CJK))
+
+
+def fold(text):
+    """Lowercase and strip accents (NFKD), as the client does."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text, unigrams=False):
+    """Tokens of ``text``; ``unigrams`` adds every CJK character (index side, not queries)."""
+    tokens = []
+    for cjk, word in TOKEN_RE.findall(fold(text or '')):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+                if unigrams:
+                    tokens.extend(cjk)
+        elif len(word) > 1 and word not in STOPWORDS:
+            tokens.append(word)
+    return tokens
+
+
+def token_key(token):
+    return token[:1] if CJK_RE.match(token) else token[:2]
+
+
+def fnv1a(text):
+    """32-bit FNV-1a over UTF-16 code units (what JavaScript's charCodeAt gives)."""
+    h = 0x811c9dc5
+    data = bytearray(text.encode('utf-16-le'))
+    for i in range(0, len(data), 2):
+        h ^= data[i] | (data[i + 1] << 8)
+        h = (h * 16777619) & 0xffffffff
+    return h
+
+
+def bucket_of(token, buckets):
+    return fnv1a(token_key(token)) % buckets
+
+
+def _field_scores(text, weight, scores):
+    hits = defaultdict(int)
+    for token in tokenize(text, unigrams=True):
+        hits[token] += 1
+    for token, n in hits.items():
+        scores[token] += weight * min(n, MAX_FIELD_HITS)
+
+
+def build_postings(docs):
+    """``docs``: (doc, title, detail) in any order -> {token: [(doc, score), ...]} sorted by doc."""
+    postings = defaultdict(list)
+    for doc, title, detail in docs:
+        scores = defaultdict(int)
+        _field_scores(title, TITLE_WEIGHT, scores)
+        _field_scores(detail, 1, scores)
+        for token, score in scores.items():
+            postings[token].append((doc, score))
+    for pairs in postings.values():
+        pairs.sort()
+    return postings
+
+
+def encode_postings(pairs):
+    flat = []
+    last = 0
+    for doc, score in pairs:
+        flat.extend((doc - last, score))
+        last = doc
+    return flat
+
+
+def decode_postings(flat):
+    doc = 0
+    for i in range(0, len(flat), 2):
+        doc += flat[i]
+        yield doc, flat[i + 1]
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def build_shards(docs):
+    """Return (bucket count, {bucket: {token: encoded postings}}) for the documents."""
+    encoded = dict((token, encode_postings(pairs)) for token, pairs in build_postings(docs).items())
+    size = sum(len(_dumps(token)) + len(_dumps(flat)) + 2 for token, flat in encoded.items())
+    buckets = 1
+    while size > SHARD_BYTES * buckets:
+        buckets *= 2
+    shards = defaultdict(OrderedDict)
+    for token in sorted(encoded):
+        shards[bucket_of(token, buckets)][token] = encoded[token]
+    return buckets, shards
+
+
+def query(lookup, text, limit=MAX_RESULTS):
+    """
+    Document numbers for ``text``.  A document matches a query token through
+    the token itself or any token it prefixes, and must match at least half
+    of the query tokens (CJK queries rarely line up with every bigram of the
+    text: 迈克尔乔丹 vs 迈克尔・乔丹).  Ranked by tokens matched, then score,
+    then lowest document number (newest).  ``lookup(token)`` returns the
+    shard dict of the token's bucket.  None if ``text`` has no usable term.
+    """
+    terms = list(OrderedDict.fromkeys(tokenize(text)))
+    if not terms:
+        return None
+    matched = defaultdict(int)
+    total = defaultdict(int)
+    for term in terms:
+        best = {}
+        for token, flat in lookup(term).items():
+            if token.startswith(term):
+                for doc, score in decode_postings(flat):
+                    if score > best.get(doc, 0):
+                        best[doc] = score
+        for doc, score in best.items():
+            matched[doc] += 1
+            total[doc] += score
+    need = (len(terms) + 1) // 2
+    ranked = sorted((doc for doc, n in matched.items() if n >= need),
+                    key=lambda doc: (-matched[doc], -total[doc], doc))
+    return ranked[:limit]
+
+
+def title_matches(cards, text, limit=MAX_RESULTS):
+    """Card positions whose title contains ``text`` (case-insensitive), for queries without a usable term."""
+    text = text.strip().lower()
+    return [doc for doc, card in enumerate(cards) if text in (card.get('title') or '').lower()][:limit]
+
+
+def load_lookup(search_dir):
+    with io.open(os.path.join(search_dir, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    cache = {}
+
+    def lookup(term):
+        bucket = bucket_of(term, manifest['buckets'])
+        if bucket not in cache:
+            shard = manifest['shards'][bucket]
+            cache[bucket] = {}
+            if shard:
+                with io.open(os.path.join(search_dir, shard['file']), encoding='utf-8') as f:
+                    cache[bucket] = json.load(f)
+        return cache[bucket]
+    return lookup
+
+
+def main(argv=None):
+    from build_site import ROOT_DIR, load_cards
+    parser = argparse.ArgumentParser(description='Query the prebuilt search index of a tree.')
+    parser.add_argument('tree', help="'' for the English root, cn for the Chinese tree")
+    parser.add_argument('text')
+    parser.add_argument('--root', default=ROOT_DIR)
+    args = parser.parse_args(argv)
+    tree_dir = os.path.join(args.root, args.tree)
+    docs = query(load_lookup(os.path.join(tree_dir, SEARCH_DIR)), args.text)
+    cards = load_cards(os.path.join(tree_dir, 'nba.json'), 0)
+    if docs is None:
+        docs = title_matches(cards, args.text)
+    for doc in docs:
+        print('{:>6}  {}'.format(cards[doc]['id'], cards[doc]['title']))
+    if not docs:
+        print('no results')
+
+
+if __name__ == '__main__':
+    main()
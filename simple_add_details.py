@@ -1,41 +1,49 @@
 # -*- coding: utf-8 -*-
-import json
+from item_store import iter_items, record_changes
 
-# 加载数据
-with open('nba.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+def needs_detail(item):
+    return 'detail' not in item or not item['detail'] or len(item['detail'].strip()) < 50
 
-print(f"总共有 {len(data)} 条数据")
+# 流式读取nba.json，不整体加载
+data = iter_items('nba.json')
 
 # 检查哪些条目缺少detail字段
 missing_details = []
+total = 0
 for item in data:
-    if 'detail' not in item or not item['detail'] or len(item['detail'].strip()) < 50:
-        missing_details.append(item)
+    total += 1
+    if needs_detail(item):
+        missing_details.append((item['id'], item['title']))
 
+print(f"总共有 {total} 条数据")
 print(f"缺少detail字段的条目数量: {len(missing_details)}")
 
 # 显示前10个缺少detail的条目
 print("\n前10个缺少detail的条目:")
-for i, item in enumerate(missing_details[:10]):
-    print(f"{i+1}. ID {item['id']}: {item['title']}")
+for i, (item_id, item_title) in enumerate(missing_details[:10]):
+    print(f"{i+1}. ID {item_id}: {item_title}")
 
 # 为缺少detail的条目生成内容
-for item in missing_details:
-    title = item['title']
+def fill_details(items):
+    for item in items:
+        if not needs_detail(item):
+            yield item
+            continue
+        title = item['title']
     
-    # 生成基础内容
-    detail_content = f"关于{title}这个NBA冷知识，展现了职业篮球运动中许多鲜为人知的历史记录和有趣细节。在NBA这个充满竞争的联盟中，每个细节都蕴含着深刻的意义，而{title}无疑是其中最具代表性的之一。这个看似简单的冷知识实际上反映了NBA历史的复杂性和多样性，它不仅记录了历史，也反映了时代的发展。在NBA的历史上，很少有事件能够像{title}一样在如此长的时间内保持其重要性。这个冷知识不仅让我们了解了NBA的历史发展，也让我们更深入地认识了职业体育运动的魅力和复杂性。在NBA的历史上，{title}不仅是一个重要的历史记录，也是NBA发展历程中的重要组成部分。"
+        # 生成基础内容
+        detail_content = f"关于{title}这个NBA冷知识，展现了职业篮球运动中许多鲜为人知的历史记录和有趣细节。在NBA这个充满竞争的联盟中，每个细节都蕴含着深刻的意义，而{title}无疑是其中最具代表性的之一。这个看似简单的冷知识实际上反映了NBA历史的复杂性和多样性，它不仅记录了历史，也反映了时代的发展。在NBA的历史上，很少有事件能够像{title}一样在如此长的时间内保持其重要性。这个冷知识不仅让我们了解了NBA的历史发展，也让我们更深入地认识了职业体育运动的魅力和复杂性。在NBA的历史上，{title}不仅是一个重要的历史记录，也是NBA发展历程中的重要组成部分。"
     
-    # 确保内容长度超过300字
-    while len(detail_content) < 300:
-        detail_content += "这个冷知识不仅让我们更深入地了解了NBA的历史和文化，也让我们认识到了职业体育运动的复杂性和多样性。在NBA的历史上，像这样的细节往往蕴含着深刻的意义，它们不仅记录了历史，也反映了时代的发展。"
+        # 确保内容长度超过300字
+        while len(detail_content) < 300:
+            detail_content += "这个冷知识不仅让我们更深入地了解了NBA的历史和文化，也让我们认识到了职业体育运动的复杂性和多样性。在NBA的历史上，像这样的细节往往蕴含着深刻的意义，它们不仅记录了历史，也反映了时代的发展。"
     
-    item['detail'] = detail_content
-    print(f"已为 ID {item['id']} - {item['title']} 生成 {len(detail_content)} 字的detail内容")
+        item['detail'] = detail_content
+        print(f"已为 ID {item['id']} - {item['title']} 生成 {len(detail_content)} 字的detail内容")
+        yield item
 
-# 保存更新后的数据
-with open('nba.json', 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
+# 只把新生成的detail追加到变更日志 nba.json.changes，不整体改写nba.json；
+# 中断后重新运行即可继续。python item_store.py compact nba.json 可合并回文件
+record_changes('nba.json', fill_details)
 
 print(f"\n处理完成！已为 {len(missing_details)} 个条目添加了detail字段")
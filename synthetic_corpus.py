@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic large corpus for benchmarking the site build scripts.
+
+Builds a throw-away site tree of any size from the real data, so every stage
+runs on the same kind of input it sees in production, just more of it:
+
+    <out>/nba.json, nba_N.html          English tree (root skeleton page)
+    <out>/cn/nba.json, cn/nba_N.html    Chinese tree (cn/ skeleton page)
+    <out>/index.html, cn/index.html     copied, the footer source for fragments
+    <out>/translate/*.html, nba.json    untranslated Chinese inputs for translate_*
+    <out>/start.md, stars.json          big star collection for generate_star_pages
+    <out>/corpus.json                   what was generated
+
+Text is sampled sentence by sentence from the real nba.json files with a fixed
+seed, so two runs with the same arguments produce identical corpora.
+
+Usage:
+    python synthetic_corpus.py --size 10000 --out /tmp/corpus-10k [--pages 2000]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import re
+import shutil
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SKELETON_PAGE = 'nba_5.html'
+EN_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+# start.md sections are located with one regex scan each, keep the default bounded
+DEFAULT_MAX_STARS = 2000
+
+
+def _read(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write(path, text):
+    with io.open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+def _load_items(path):
+    return json.loads(_read(path).lstrip('\ufeff'))
+
+
+def _dump_items(path, items, bom=False):
+    text = json.dumps(items, ensure_ascii=False, indent=2, separators=(',', ': '))
+    _write(path, ('\ufeff' if bom else '') + text)
+
+
+def _html_escape(s):
+    return s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+class SentencePool(object):
+    """Sentences and titles of one language, sampled with a fixed seed."""
+
+    def __init__(self, items, lang, seed):
+        self.rng = random.Random(seed)
+        self.titles = [it.get('title') or '' for it in items if it.get('title')]
+        sentences = []
+        for it in items:
+            detail = it.get('detail') or ''
+            if lang == 'zh':
+                sentences += [p.strip() + '。' for p in detail.split('。') if p.strip()]
+            else:
+                sentences += [p.strip() for p in EN_SENTENCE_RE.split(detail) if p.strip()]
+        self.sentences = sentences
+        self.lang = lang
+
+    def detail(self, lo=8, hi=14):
+        parts = [self.rng.choice(self.sentences) for _ in range(self.rng.randint(lo, hi))]
+        return ''.join(parts) if self.lang == 'zh' else ' '.join(parts)
+
+    def title(self, n):
+        base = self.titles[(n - 1) % len(self.titles)]
+        if n <= len(self.titles):
+            return base
+        return '{}（{}）'.format(base, n) if self.lang == 'zh' else '{} #{}'.format(base, n)
+
+
+def make_items(pool, size):
+    return [{
+        'localLink': 'nba_{}.html'.format(i),
+        'id': i,
+        'title': pool.title(i),
+        'detail': pool.detail(),
+        'image': 'https://picsum.photos/id/{}/600/400'.format(i % 1000),
+    } for i in range(1, size + 1)]
+
+
+def make_page(skeleton, skeleton_title, title):
+    """A page for ``title`` cut from the real skeleton; content and related grid are stale on purpose."""
+    return skeleton.replace(_html_escape(skeleton_title), _html_escape(title)).replace(skeleton_title, title)
+
+
+def write_tree(tree_dir, source_dir, items, page_count):
+    if not os.path.isdir(tree_dir):
+        os.makedirs(tree_dir)
+    source_items = _load_items(os.path.join(source_dir, 'nba.json'))
+    skeleton_item = [it for it in source_items if it.get('localLink') == SKELETON_PAGE][0]
+    skeleton = _read(os.path.join(source_dir, SKELETON_PAGE))
+    shutil.copyfile(os.path.join(source_dir, 'index.html'), os.path.join(tree_dir, 'index.html'))
+    for item in items[:page_count]:
+        _write(os.path.join(tree_dir, item['localLink']), make_page(skeleton, skeleton_item['title'], item['title']))
+    # nba.json is saved with a UTF-8 BOM in the real tree
+    _dump_items(os.path.join(tree_dir, 'nba.json'), items, bom=True)
+
+
+def make_start_md(star_count, rng):
+    """A start.md with ``star_count`` sections in the real format, plus the matching stars list."""
+    import generate_star_pages as star_pages
+    real = star_pages.stars
+    # Reuse the real paragraphs and detail bullets of each base star
+    sections = []
+    for star in real:
+        fun_fact, details = star_pages.extract_star_content(star['num'])
+        sections.append((fun_fact, [d for d in details.split('\n') if d.strip()]))
+    stars = []
+    out = ['# NBA Stars Fun Facts Collection\n\n']
+    for n in range(1, star_count + 1):
+        base = real[(n - 1) % len(real)]
+        fun_fact, details = sections[(n - 1) % len(real)]
+        suffix = '' if n <= len(real) else ' {}'.format(n)
+        star = {
+            'num': n,
+            'name': base['name'] + suffix,
+            'name_short': base['name_short'],
+            'title': base['title'] + suffix,
+            'image_id': base['image_id'],
+            'related': [rng.randint(1, star_count) for _ in range(3)],
+        }
+        stars.append(star)
+        out.append('## {}. {}\n\n**Fun Fact: {}**\n\n{}\n\n**More Details:**\n{}\n\n---\n\n'.format(
+            n, star['name'], star['title'], fun_fact, '\n'.join(details)))
+    out.append('## Summary\n\nSynthetic corpus.\n')
+    return ''.join(out), stars
+
+
+def generate_corpus(out_dir, size, pages=None, translate_pages=None, stars=None, seed=0):
+    """Write a corpus of ``size`` items to ``out_dir`` and return its description."""
+    pages = size if pages is None else min(pages, size)
+    translate_pages = min(size, 1000) if translate_pages is None else min(translate_pages, size)
+    star_count = stars if stars is not None else max(12, min(size // 20, DEFAULT_MAX_STARS))
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    zh_items = make_items(SentencePool(_load_items(os.path.join(ROOT_DIR, 'cn', 'nba.json')), 'zh', seed), size)
+    en_items = make_items(SentencePool(_load_items(os.path.join(ROOT_DIR, 'nba.json')), 'en', seed + 1), size)
+    write_tree(out_dir, ROOT_DIR, en_items, pages)
+    write_tree(os.path.join(out_dir, 'cn'), os.path.join(ROOT_DIR, 'cn'), zh_items, pages)
+
+    # Untranslated inputs: Chinese pages and items as they were before translation
+    translate_dir = os.path.join(out_dir, 'translate')
+    write_tree(translate_dir, os.path.join(ROOT_DIR, 'cn'), zh_items, translate_pages)
+    os.remove(os.path.join(translate_dir, 'index.html'))
+
+    start_md, star_list = make_start_md(star_count, random.Random(seed + 2))
+    _write(os.path.join(out_dir, 'start.md'), start_md)
+    _write(os.path.join(out_dir, 'stars.json'), json.dumps(star_list, ensure_ascii=False, indent=1))
+
+    info = {
+        'size': size,
+        'pages': pages,
+        'translate_pages': translate_pages,
+        'stars': star_count,
+        'seed': seed,
+        'start_md_bytes': len(start_md.encode('utf-8')),
+    }
+    _write(os.path.join(out_dir, 'corpus.json'), json.dumps(info, indent=1))
+    return info
+
+
+def load_corpus(out_dir):
+    return json.loads(_read(os.path.join(out_dir, 'corpus.json')))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic site corpus for benchmarks.')
+    parser.add_argument('--size', type=int, default=1000, help='items per nba.json (default: 1000)')
+    parser.add_argument('--out', required=True, help='output directory')
+    parser.add_argument('--pages', type=int, default=None, help='nba_N.html pages per tree (default: one per item)')
+    parser.add_argument('--translate-pages', type=int, default=None, help='Chinese pages for the translate stages (default: min(size, 1000))')
+    parser.add_argument('--stars', type=int, default=None, help='star sections in start.md (default: size/20, 12..2000)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    info = generate_corpus(args.out, args.size, args.pages, args.translate_pages, args.stars, args.seed)
+    print('Generated corpus in {}: {}'.format(args.out, json.dumps(info, sort_keys=True)))
+
+
+if __name__ == '__main__':
+    main()
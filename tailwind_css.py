@@ -0,0 +1,752 @@
+# -*- coding: utf-8 -*-
+"""
+Static Tailwind stylesheet for the site, generated offline.
+
+Every page loaded https://cdn.tailwindcss.com, which scans the DOM and
+compiles CSS in the browser on each view (a render-blocking script plus JIT
+work on the main thread), configured by an inline tailwind.config with the
+``nba`` palette.  build_site.py's css stage replaces that with one static
+file:
+
+- scan() collects class candidates from the pages, the templates and the
+  Python modules that write markup (Tailwind's own approach: every token that
+  names a utility counts, so classes in JS and Python strings are found too);
+- generate() emits preflight and the CSS of each known utility (the Tailwind
+  v3 core utilities the site uses, with the default theme plus the ``nba``
+  colors and the Inter font stack), variants included: sm/md/lg/xl/2xl,
+  hover, focus, active, first-letter ...;
+- link_page() swaps the CDN script, tailwind.config and the
+  text/tailwindcss block for a <link> to the stylesheet.  The shared custom
+  utilities (CUSTOM_CSS: card-hover, text-shadow, fa-icon) live in the stylesheet;
+  rules of a page's block that differ from them stay in the page as a plain
+  <style> after the link, so they still win as before.
+
+Tokens that are not utilities this module knows are ignored, as the CDN
+ignores them, and it knows only the utilities and theme values the site uses.
+check_classes() (run by the css stage and by ``python tailwind_css.py``)
+fails when a class attribute or classList call names a class that gets no
+rule here and that neither CUSTOM_CSS nor a <style> of the pages defines, so
+a page using a new utility breaks the build instead of rendering unstyled:
+add the utility here then.
+"""
+import argparse
+import glob
+import io
+import os
+import re
+import sys
+from collections import OrderedDict
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# files whose markup may carry classes (pages are scanned per tree)
+SOURCE_GLOBS = ('templates/*.html', 'apply_details_to_pages.py', 'build_site.py', 'fragments.py',
+                'generate_star_pages.py')
+
+# -- theme (Tailwind v3 defaults + the pages' tailwind.config) -------------
+# only the values the site uses: check_classes() fails when a page needs more
+
+SCREENS = OrderedDict([('sm', '640px'), ('md', '768px'), ('lg', '1024px'), ('xl', '1280px'), ('2xl', '1536px')])
+FONT_SANS = 'Inter, system-ui, sans-serif'
+FONT_MONO = 'ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", "Courier New", monospace'
+SPACING_KEYS = ('0.5 1 1.5 2 2.5 3 3.5 4 5 6 7 8 9 10 11 12 14 16 20 24 28 32 36 40 44 48 52 56 60 64 72 80 96'
+                .split())
+SPACING = OrderedDict([('0', '0px'), ('px', '1px')])
+SPACING.update((k, '{:g}rem'.format(float(k) / 4)) for k in SPACING_KEYS)
+
+PALETTE = {
+    'gray': '#f9fafb #f3f4f6 #e5e7eb #d1d5db #9ca3af #6b7280 #4b5563 #374151 #1f2937 #111827 #030712',
+    'yellow': '#fefce8 #fef9c3 #fef08a #fde047 #facc15 #eab308 #ca8a04 #a16207 #854d0e #713f12 #422006',
+    'purple': '#faf5ff #f3e8ff #e9d5ff #d8b4fe #c084fc #a855f7 #9333ea #7e22ce #6b21a8 #581c87 #3b0764',
+}
+SHADES = '50 100 200 300 400 500 600 700 800 900 950'.split()
+COLORS = {'black': '#000', 'white': '#fff',
+          'nba-purple': '#552583', 'nba-gold': '#FDB927', 'nba-dark': '#171717', 'nba-light': '#F5F5F5'}
+for _family, _values in PALETTE.items():
+    COLORS.update(('{}-{}'.format(_family, shade), value) for shade, value in zip(SHADES, _values.split()))
+SPECIAL_COLORS = {'transparent': 'transparent', 'current': 'currentColor', 'inherit': 'inherit'}
+
+FONT_SIZE = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'), '5xl': ('3rem', '1'), '6xl': ('3.75rem', '1'),
+}
+FONT_WEIGHT = {'normal': '400', 'medium': '500', 'semibold': '600', 'bold': '700'}
+LINE_HEIGHT = {'none': '1', 'tight': '1.25', 'snug': '1.375', 'normal': '1.5', 'relaxed': '1.625', 'loose': '2',
+               '3': '.75rem', '4': '1rem', '5': '1.25rem', '6': '1.5rem', '7': '1.75rem', '8': '2rem',
+               '9': '2.25rem', '10': '2.5rem'}
+MAX_WIDTH = {'none': 'none', 'xs': '20rem', 'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem',
+             '2xl': '42rem', '3xl': '48rem', '4xl': '56rem', '5xl': '64rem', '6xl': '72rem', '7xl': '80rem',
+             'full': '100%', 'prose': '65ch'}
+BORDER_RADIUS = {'none': '0px', 'sm': '0.125rem', '': '0.25rem', 'md': '0.375rem', 'lg': '0.5rem',
+                 'xl': '0.75rem', '2xl': '1rem', 'full': '9999px'}
+BORDER_WIDTH = {'': '1px', '0': '0px', '2': '2px', '4': '4px', '8': '8px'}
+SHADOW = {
+    'sm': ('0 1px 2px 0 rgb(0 0 0 / 0.05)', '0 1px 2px 0 var(--tw-shadow-color)'),
+    '': ('0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)',
+         '0 1px 3px 0 var(--tw-shadow-color), 0 1px 2px -1px var(--tw-shadow-color)'),
+    'md': ('0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)',
+           '0 4px 6px -1px var(--tw-shadow-color), 0 2px 4px -2px var(--tw-shadow-color)'),
+    'lg': ('0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)',
+           '0 10px 15px -3px var(--tw-shadow-color), 0 4px 6px -4px var(--tw-shadow-color)'),
+}
+BLUR = {'none': '0', 'sm': '4px', '': '8px', 'md': '12px', 'lg': '16px', 'xl': '24px'}
+OPACITY = '0 5 10 15 20 25 30 35 40 45 50 55 60 65 70 75 80 85 90 95 100'.split()
+Z_INDEX = '0 10 20 30 40 50 auto'.split()
+DURATION = '0 75 100 150 200 300 500 700 1000'.split()
+TRANSITION = {
+    'all': 'all',
+    'colors': 'color, background-color, border-color, text-decoration-color, fill, stroke',
+}
+GRADIENT_DIRECTIONS = {'t': 'to top', 'tr': 'to top right', 'r': 'to right', 'br': 'to bottom right',
+                       'b': 'to bottom', 'bl': 'to bottom left', 'l': 'to left', 'tl': 'to top left'}
+SIDES = {'t': ('top',), 'r': ('right',), 'b': ('bottom',), 'l': ('left',),
+         'x': ('left', 'right'), 'y': ('top', 'bottom')}
+
+# -- static CSS ----------------------------------------------------------------
+
+PREFLIGHT = '''*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}
+::before,::after{--tw-content:''}
+html,:host{line-height:1.5;-webkit-text-size-adjust:100%%;-moz-tab-size:4;tab-size:4;font-family:%(sans)s;font-feature-settings:normal;font-variation-settings:normal;-webkit-tap-highlight-color:transparent}
+body{margin:0;line-height:inherit}
+hr{height:0;color:inherit;border-top-width:1px}
+abbr:where([title]){-webkit-text-decoration:underline dotted;text-decoration:underline dotted}
+h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}
+a{color:inherit;text-decoration:inherit}
+b,strong{font-weight:bolder}
+code,kbd,samp,pre{font-family:%(mono)s;font-feature-settings:normal;font-variation-settings:normal;font-size:1em}
+small{font-size:80%%}
+sub,sup{font-size:75%%;line-height:0;position:relative;vertical-align:baseline}
+sub{bottom:-0.25em}
+sup{top:-0.5em}
+table{text-indent:0;border-color:inherit;border-collapse:collapse}
+button,input,optgroup,select,textarea{font-family:inherit;font-feature-settings:inherit;font-variation-settings:inherit;font-size:100%%;font-weight:inherit;line-height:inherit;letter-spacing:inherit;color:inherit;margin:0;padding:0}
+button,select{text-transform:none}
+button,input:where([type='button']),input:where([type='reset']),input:where([type='submit']){-webkit-appearance:button;background-color:transparent;background-image:none}
+:-moz-focusring{outline:auto}
+:-moz-ui-invalid{box-shadow:none}
+progress{vertical-align:baseline}
+::-webkit-inner-spin-button,::-webkit-outer-spin-button{height:auto}
+[type='search']{-webkit-appearance:textfield;outline-offset:-2px}
+::-webkit-search-decoration{-webkit-appearance:none}
+::-webkit-file-upload-button{-webkit-appearance:button;font:inherit}
+summary{display:list-item}
+blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}
+fieldset{margin:0;padding:0}
+legend{padding:0}
+ol,ul,menu{list-style:none;margin:0;padding:0}
+dialog{padding:0}
+textarea{resize:vertical}
+input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}
+button,[role="button"]{cursor:pointer}
+:disabled{cursor:default}
+img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}
+img,video{max-width:100%%;height:auto}
+[hidden]:where(:not([hidden="until-found"])){display:none}
+*,::before,::after,::backdrop{--tw-ring-inset: ;--tw-ring-offset-width:0px;--tw-ring-offset-color:#fff;--tw-ring-color:rgb(59 130 246 / 0.5);--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;--tw-shadow:0 0 #0000;--tw-shadow-colored:0 0 #0000;--tw-gradient-from-position: ;--tw-gradient-via-position: ;--tw-gradient-to-position: ;--tw-blur: ;--tw-backdrop-blur: }
+''' % {'sans': FONT_SANS, 'mono': FONT_MONO}
+
+# the @layer utilities block the generated pages shared (templates/base.html),
+# and the icons of icon_sprite.py: 1em high on the baseline, like the glyphs of the font
+CUSTOM_CSS = '''.text-shadow {
+    text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.5);
+}
+.card-hover {
+    transition: transform 0.3s ease, box-shadow 0.3s ease;
+}
+.card-hover:hover {
+    transform: translateY(-5px);
+    box-shadow: 0 10px 25px -5px rgba(0, 0, 0, 0.1), 0 10px 10px -5px rgba(0, 0, 0, 0.04);
+}
+.fa-icon {
+    display: inline-block;
+    vertical-align: -0.143em;
+    fill: currentColor;
+}
+'''
+
+# -- class names -------------------------------------------------------------
+
+CANDIDATE_RE = re.compile(r'[A-Za-z0-9_:./\[\]%#!-]+')
+# pseudo-class and pseudo-element variants, in Tailwind's order
+PSEUDO_VARIANTS = OrderedDict([('first-letter', '::first-letter'), ('hover', ':hover'), ('focus', ':focus')])
+CHILDREN = ' > :not([hidden]) ~ :not([hidden])'
+# where unknown_classes() looks for class names, and for the classes a <style> defines
+CLASS_ATTR_RE = re.compile(r'class(?:Name)?\s*=\s*["\'`]([^"\'`]*)["\'`]')
+CLASS_LIST_RE = re.compile(r'classList\.(?:add|remove|toggle)\(([^)]*)\)')
+STYLE_RE = re.compile(r'<style[^>]*>([\s\S]*?)</style>')
+CSS_CLASS_RE = re.compile(r'\.(-?[A-Za-z_][\w-]*)')
+# classes of the pages that are not Tailwind's: Font Awesome's fa and fa-* (icon_sprite.py), and
+# the typography plugin's prose, which the CDN build never loaded either
+FOREIGN_CLASSES = frozenset(['fa', 'prose', 'lg:prose-xl'])
+
+
+def css_escape(name):
+    out = []
+    for i, ch in enumerate(name):
+        if ch.isalnum() and ord(ch) < 128 or ch in '-_':
+            if i == 0 and ch.isdigit():
+                out.append('\\3{} '.format(ch))
+            else:
+                out.append(ch)
+        else:
+            out.append('\\' + ch)
+    return ''.join(out)
+
+
+def split_variants(token):
+    """'md:hover:bg-x' -> (['md', 'hover'], 'bg-x'); colons inside [...] do not split."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(token):
+        if ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+        elif ch == ':' and not depth:
+            parts.append(token[start:i])
+            start = i + 1
+    return parts, token[start:]
+
+
+# -- values ----------------------------------------------------------------
+
+def _arbitrary(value):
+    if len(value) > 2 and value[0] == '[' and value[-1] == ']':
+        return value[1:-1].replace('_', ' ')
+    return None
+
+
+def _fraction(value):
+    m = re.match(r'^(\d+)/(\d+)$', value)
+    if not m or not int(m.group(2)):
+        return None
+    return '{:.6f}'.format(100.0 * int(m.group(1)) / int(m.group(2))).rstrip('0').rstrip('.') + '%'
+
+
+def _rgb(hex_color):
+    h = hex_color.lstrip('#')
+    if len(h) == 3:
+        h = ''.join(c * 2 for c in h)
+    return '{} {} {}'.format(int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
+
+
+def _color(value):
+    """(hex or keyword, alpha or None) for 'nba-gold' / 'white/95' / 'transparent', else None."""
+    alpha = None
+    if '/' in value:
+        value, alpha = value.rsplit('/', 1)
+        if alpha.isdigit():
+            alpha = '{:g}'.format(int(alpha) / 100.0)
+        else:
+            alpha = _arbitrary(alpha)
+            if alpha is None:
+                return None
+    if value in SPECIAL_COLORS:
+        return (SPECIAL_COLORS[value], None) if alpha is None else None
+    arbitrary = _arbitrary(value)
+    if arbitrary is not None and arbitrary.startswith('#'):
+        return arbitrary, alpha
+    if value in COLORS:
+        return COLORS[value], alpha
+    return None
+
+
+def _color_decls(prop, value, opacity_var):
+    found = _color(value)
+    if found is None:
+        return None
+    color, alpha = found
+    if not color.startswith('#'):
+        return ['{}:{}'.format(prop, color)]
+    if alpha is not None:
+        return ['{}:rgb({} / {})'.format(prop, _rgb(color), alpha)]
+    return ['{}:1'.format(opacity_var), '{}:rgb({} / var({}))'.format(prop, _rgb(color), opacity_var)]
+
+
+def _size(value, extra=None):
+    """Spacing, fraction or arbitrary length, or one of ``extra``."""
+    if extra and value in extra:
+        return extra[value]
+    if value in SPACING:
+        return SPACING[value]
+    return _fraction(value) or _arbitrary(value)
+
+
+# -- utilities -----------------------------------------------------------------
+
+# Tailwind's core plugin order: later groups win over earlier ones
+ORDER = '''container visibility position inset z-index grid-column float margin line-clamp display aspect-ratio
+height max-height min-height width min-width max-width flex cursor list-style-position list-style-type
+grid-template-columns flex-direction flex-wrap align-items justify-content gap space divide-width overflow
+whitespace border-radius border-width border-color background-color background-image gradient-color-stops
+object-fit padding text-align font-family font-size font-weight font-style line-height text-color text-decoration
+opacity box-shadow outline ring-width ring-color backdrop-blur transition-property transition-duration'''.split()
+RANK = dict((name, i) for i, name in enumerate(ORDER))
+
+STATIC = {
+    'visible': ('visibility', 'visibility:visible'),
+    'invisible': ('visibility', 'visibility:hidden'),
+    'float-left': ('float', 'float:left'),
+    'aspect-square': ('aspect-ratio', 'aspect-ratio:1 / 1'),
+    'flex-1': ('flex', 'flex:1 1 0%'),
+    'cursor-pointer': ('cursor', 'cursor:pointer'),
+    'cursor-not-allowed': ('cursor', 'cursor:not-allowed'),
+    'list-inside': ('list-style-position', 'list-style-position:inside'),
+    'list-disc': ('list-style-type', 'list-style-type:disc'),
+    'flex-row': ('flex-direction', 'flex-direction:row'),
+    'flex-col': ('flex-direction', 'flex-direction:column'),
+    'flex-wrap': ('flex-wrap', 'flex-wrap:wrap'),
+    'overflow-hidden': ('overflow', 'overflow:hidden'),
+    'overflow-x-auto': ('overflow', 'overflow-x:auto'),
+    'font-sans': ('font-family', 'font-family:' + FONT_SANS),
+    'italic': ('font-style', 'font-style:italic'),
+    'underline': ('text-decoration', 'text-decoration-line:underline'),
+    'outline-none': ('outline', 'outline:2px solid transparent;outline-offset:2px'),
+    'hidden': ('display', 'display:none'),
+}
+for _v in ('fixed', 'absolute', 'relative', 'sticky'):
+    STATIC[_v] = ('position', 'position:' + _v)
+for _v in ('block', 'inline-block', 'flex', 'inline-flex', 'grid'):
+    STATIC[_v] = ('display', 'display:' + _v)
+for _v in ('nowrap', 'pre-line'):
+    STATIC['whitespace-' + _v] = ('whitespace', 'white-space:' + _v)
+for _k, _v in (('start', 'flex-start'), ('end', 'flex-end'), ('center', 'center')):
+    STATIC['items-' + _k] = ('align-items', 'align-items:' + _v)
+for _k, _v in (('center', 'center'), ('between', 'space-between')):
+    STATIC['justify-' + _k] = ('justify-content', 'justify-content:' + _v)
+for _v in ('contain', 'cover'):
+    STATIC['object-' + _v] = ('object-fit', 'object-fit:' + _v)
+for _v in ('left', 'center', 'right'):
+    STATIC['text-' + _v] = ('text-align', 'text-align:' + _v)
+
+
+def _spacing_family(base):
+    """margin, padding, inset, gap and space utilities."""
+    m = re.match(r'^(m|p)([xytrbl]?)-(.+)$', base)
+    if m:
+        kind, side, value = m.groups()
+        value = _size(value, {'auto': 'auto'} if kind == 'm' else None)
+        if value is None:
+            return None
+        prop = 'margin' if kind == 'm' else 'padding'
+        props = ['{}-{}'.format(prop, s) for s in SIDES[side]] if side else [prop]
+        return (prop, 0 if not side else 1 if side in 'xy' else 2,
+                ';'.join('{}:{}'.format(p, value) for p in props), '')
+    m = re.match(r'^(inset|top|right|bottom|left)-(.+)$', base)
+    if m:
+        name, value = m.groups()
+        value = _size(value, {'auto': 'auto', 'full': '100%'})
+        if value is None:
+            return None
+        return ('inset', 0 if name == 'inset' else 1, '{}:{}'.format(name, value), '')
+    m = re.match(r'^gap(-[xy])?-(.+)$', base)
+    if m:
+        axis, value = m.groups()
+        value = _size(value)
+        if value is None:
+            return None
+        prop = {None: 'gap', '-x': 'column-gap', '-y': 'row-gap'}[axis]
+        return ('gap', 0 if axis is None else 1, '{}:{}'.format(prop, value), '')
+    m = re.match(r'^space-([xy])-(.+)$', base)
+    if m:
+        axis, value = m.groups()
+        value = _size(value)
+        if value is None:
+            return None
+        start, end = ('left', 'right') if axis == 'x' else ('top', 'bottom')
+        var = '--tw-space-{}-reverse'.format(axis)
+        return ('space', 0, '{0}:0;margin-{1}:calc({3} * var({0}));margin-{2}:calc({3} * calc(1 - var({0})))'.format(
+            var, end, start, value), CHILDREN)
+    return None
+
+
+def _sizing_family(base):
+    m = re.match(r'^(w|h|min-w|min-h|max-w|max-h)-(.+)$', base)
+    if not m:
+        return None
+    name, value = m.groups()
+    if name == 'max-w':
+        found = MAX_WIDTH.get(value) or _arbitrary(value)
+    else:
+        found = _size(value, {'auto': 'auto', 'full': '100%', 'screen': '100vw' if 'w' in name else '100vh'})
+    if found is None:
+        return None
+    group = {'w': 'width', 'h': 'height', 'min-w': 'min-width', 'min-h': 'min-height', 'max-w': 'max-width',
+             'max-h': 'max-height'}[name]
+    return (group, 0, '{}:{}'.format(group, found), '')
+
+
+def _border_family(base):
+    m = re.match(r'^rounded(?:-(.+))?$', base)
+    if m:
+        radius = BORDER_RADIUS.get(m.group(1) or '') or _arbitrary(m.group(1) or '')
+        return ('border-radius', 0, 'border-radius:' + radius, '') if radius else None
+    m = re.match(r'^border(?:-([xytrbl]))?(?:-(.+))?$', base)
+    if m:
+        side, value = m.groups()
+        width = BORDER_WIDTH.get(value or '') or (_arbitrary(value) if value else None)
+        if width is not None:
+            props = ['border-{}-width'.format(s) for s in SIDES[side]] if side else ['border-width']
+            return ('border-width', 0 if not side else 1 if side in 'xy' else 2,
+                    ';'.join('{}:{}'.format(p, width) for p in props), '')
+        if side is None and value:
+            decls = _color_decls('border-color', value, '--tw-border-opacity')
+            if decls:
+                return ('border-color', 0, ';'.join(decls), '')
+        return None
+    m = re.match(r'^divide-([xy])(?:-(.+))?$', base)
+    if m:
+        axis, value = m.groups()
+        width = BORDER_WIDTH.get(value or '')
+        if width is None:
+            return None
+        start, end = ('left', 'right') if axis == 'x' else ('top', 'bottom')
+        var = '--tw-divide-{}-reverse'.format(axis)
+        return ('divide-width', 0, '{0}:0;border-{1}-width:calc({3} * calc(1 - var({0})));'
+                                   'border-{2}-width:calc({3} * var({0}))'.format(var, start, end, width), CHILDREN)
+    return None
+
+
+def _typography_family(base):
+    if base.startswith('text-'):
+        value = base[len('text-'):]
+        if value in FONT_SIZE:
+            size, leading = FONT_SIZE[value]
+            return ('font-size', 0, 'font-size:{};line-height:{}'.format(size, leading), '')
+        decls = _color_decls('color', value, '--tw-text-opacity')
+        return ('text-color', 0, ';'.join(decls), '') if decls else None
+    if base.startswith('font-'):
+        value = FONT_WEIGHT.get(base[len('font-'):])
+        return ('font-weight', 0, 'font-weight:' + value, '') if value else None
+    if base.startswith('leading-'):
+        value = LINE_HEIGHT.get(base[len('leading-'):]) or _arbitrary(base[len('leading-'):])
+        return ('line-height', 0, 'line-height:' + value, '') if value else None
+    m = re.match(r'^line-clamp-(\d+)$', base)
+    if m:
+        return ('line-clamp', 0, 'overflow:hidden;display:-webkit-box;-webkit-box-orient:vertical;'
+                                 '-webkit-line-clamp:' + m.group(1), '')
+    return None
+
+def _background_family(base):
+    m = re.match(r'^bg-gradient-to-(t|tr|r|br|b|bl|l|tl)$', base)
+    if m:
+        return ('background-image', 0,
+                'background-image:linear-gradient({}, var(--tw-gradient-stops))'.format(
+                    GRADIENT_DIRECTIONS[m.group(1)]), '')
+    if base.startswith('bg-'):
+        decls = _color_decls('background-color', base[len('bg-'):], '--tw-bg-opacity')
+        return ('background-color', 0, ';'.join(decls), '') if decls else None
+    m = re.match(r'^(from|via|to)-(.+)$', base)
+    if m:
+        stop, value = m.groups()
+        found = _color(value)
+        if found is None:
+            return None
+        color, alpha = found
+        if color.startswith('#'):
+            rgb = _rgb(color)
+            value = 'rgb({} / {})'.format(rgb, alpha) if alpha is not None else color
+            clear = 'rgb({} / 0)'.format(rgb)
+        else:
+            value, clear = color, 'rgb(255 255 255 / 0)'
+        if stop == 'from':
+            decls = ('--tw-gradient-from:{} var(--tw-gradient-from-position);'
+                     '--tw-gradient-to:{} var(--tw-gradient-to-position);'
+                     '--tw-gradient-stops:var(--tw-gradient-from), var(--tw-gradient-to)').format(value, clear)
+        elif stop == 'via':
+            decls = ('--tw-gradient-to:{} var(--tw-gradient-to-position);'
+                     '--tw-gradient-stops:var(--tw-gradient-from), {} var(--tw-gradient-via-position), '
+                     'var(--tw-gradient-to)').format(clear, value)
+        else:
+            decls = '--tw-gradient-to:{} var(--tw-gradient-to-position)'.format(value)
+        return ('gradient-color-stops', {'from': 0, 'via': 1, 'to': 2}[stop], decls, '')
+    return None
+
+
+def _effects_family(base):
+    m = re.match(r'^shadow(?:-(.+))?$', base)
+    if m and (m.group(1) or '') in SHADOW:
+        shadow, colored = SHADOW[m.group(1) or '']
+        return ('box-shadow', 0, '--tw-shadow:{};--tw-shadow-colored:{};box-shadow:var(--tw-ring-offset-shadow, '
+                                 '0 0 #0000), var(--tw-ring-shadow, 0 0 #0000), var(--tw-shadow)'.format(shadow, colored),
+                '')
+    m = re.match(r'^opacity-(\d+)$', base)
+    if m and m.group(1) in OPACITY:
+        return ('opacity', 0, 'opacity:{:g}'.format(int(m.group(1)) / 100.0), '')
+    m = re.match(r'^ring(?:-(\d+))?$', base)
+    if m:
+        width = '{}px'.format(m.group(1) or 3)
+        return ('ring-width', 0, '--tw-ring-offset-shadow:var(--tw-ring-inset) 0 0 0 var(--tw-ring-offset-width) '
+                                 'var(--tw-ring-offset-color);--tw-ring-shadow:var(--tw-ring-inset) 0 0 0 calc({} + '
+                                 'var(--tw-ring-offset-width)) var(--tw-ring-color);box-shadow:var(--tw-ring-offset-shadow), '
+                                 'var(--tw-ring-shadow), var(--tw-shadow, 0 0 #0000)'.format(width), '')
+    if base.startswith('ring-'):
+        decls = _color_decls('--tw-ring-color', base[len('ring-'):], '--tw-ring-opacity')
+        return ('ring-color', 0, ';'.join(decls), '') if decls else None
+    m = re.match(r'^backdrop-blur(?:-(.+))?$', base)
+    if m and (m.group(1) or '') in BLUR:
+        value = BLUR[m.group(1) or '']
+        value = 'blur({})'.format(value) if value != '0' else value
+        return ('backdrop-blur', 0, '--tw-backdrop-blur:{0};-webkit-backdrop-filter:var(--tw-backdrop-blur);'
+                                    'backdrop-filter:var(--tw-backdrop-blur)'.format(value), '')
+    return None
+
+
+def _layout_family(base):
+    m = re.match(r'^z-(.+)$', base)
+    if m and (m.group(1) in Z_INDEX or _arbitrary(m.group(1))):
+        return ('z-index', 0, 'z-index:' + (_arbitrary(m.group(1)) or m.group(1)), '')
+    m = re.match(r'^col-span-(\d+|full)$', base)
+    if m:
+        value = '1 / -1' if m.group(1) == 'full' else 'span {0} / span {0}'.format(m.group(1))
+        return ('grid-column', 0, 'grid-column:' + value, '')
+    m = re.match(r'^grid-cols-(\d+)$', base)
+    if m:
+        return ('grid-template-columns', 0, 'grid-template-columns:repeat({}, minmax(0, 1fr))'.format(m.group(1)), '')
+    m = re.match(r'^transition-(.+)$', base)
+    if m and m.group(1) in TRANSITION:
+        return ('transition-property', 0, 'transition-property:{};transition-timing-function:cubic-bezier(0.4, 0, '
+                                          '0.2, 1);transition-duration:150ms'.format(TRANSITION[m.group(1)]), '')
+    m = re.match(r'^duration-(\d+)$', base)
+    if m and m.group(1) in DURATION:
+        return ('transition-duration', 0, 'transition-duration:{}ms'.format(m.group(1)), '')
+    return None
+
+
+FAMILIES = (_spacing_family, _sizing_family, _border_family, _typography_family, _background_family,
+            _effects_family, _layout_family)
+
+
+def utility(base):
+    """(group, sub-order, declarations, child selector) for a class without variants, or None."""
+    if base in STATIC:
+        group, decls = STATIC[base]
+        return group, 0, decls, ''
+    for family in FAMILIES:
+        found = family(base)
+        if found is not None:
+            return found
+    return None
+
+
+def rule(token):
+    """(sort key, media query or None, CSS rule) for a class token, or None if it is not a utility."""
+    variants, base = split_variants(token)
+    if not base or base == 'container' and variants:
+        return None
+    screen = None
+    pseudo = []
+    for variant in variants:
+        if variant in SCREENS and screen is None and not pseudo:
+            screen = variant
+        elif variant in PSEUDO_VARIANTS:
+            pseudo.append(variant)
+        else:
+            return None
+    found = utility(base)
+    if found is None:
+        return None
+    group, sub, decls, children = found
+    selector = '.' + css_escape(token)
+    # pseudo-classes before pseudo-elements, as in Tailwind
+    suffixes = sorted((PSEUDO_VARIANTS[v] for v in pseudo), key=lambda s: s.startswith('::'))
+    selector += ''.join(suffixes) + children
+    variant_rank = tuple(sorted(list(PSEUDO_VARIANTS).index(v) + 1 for v in pseudo))
+    screen_rank = list(SCREENS).index(screen) + 1 if screen else 0
+    key = (screen_rank, variant_rank, RANK[group], sub, token)
+    media = '@media (min-width: {})'.format(SCREENS[screen]) if screen else None
+    return key, media, '{}{{{}}}'.format(selector, decls)
+
+
+# -- scanning and output ------------------------------------------------------
+
+def candidates(text):
+    found = set()
+    for token in CANDIDATE_RE.findall(text):
+        token = token.rstrip(':.')
+        if token:
+            found.add(token)
+    return found
+
+
+def source_paths(root_dir):
+    paths = []
+    for tree in ('', 'cn'):
+        paths.extend(sorted(glob.glob(os.path.join(root_dir, tree, '*.html'))))
+    for pattern in SOURCE_GLOBS:
+        paths.extend(sorted(glob.glob(os.path.join(root_dir, pattern))))
+    return paths
+
+
+def scan(paths):
+    classes = set()
+    for path in paths:
+        with io.open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            classes |= candidates(f.read())
+    return classes
+
+
+def _custom_rules(classes):
+    """Rules of CUSTOM_CSS whose classes are used."""
+    out = []
+    for block in split_rules(CUSTOM_CSS):
+        names = re.findall(r'\.([A-Za-z0-9_-]+)', block.split('{', 1)[0])
+        if any(name in classes for name in names):
+            out.append(_compact(block))
+    return out
+
+
+def generate(classes):
+    """The stylesheet for the class tokens in ``classes``."""
+    rules = [r for r in (rule(token) for token in classes) if r is not None]
+    rules.sort(key=lambda r: r[0])
+    lines = [PREFLIGHT.rstrip('\n')]
+    if 'container' in classes:
+        lines.append('.container{width:100%}')
+        lines.extend('@media (min-width: {0}){{.container{{max-width:{0}}}}}'.format(w) for w in SCREENS.values())
+    media = None
+    for _key, rule_media, text in rules:
+        if rule_media != media:
+            if media:
+                lines.append('}')
+            if rule_media:
+                lines.append(rule_media + '{')
+            media = rule_media
+        lines.append(text)
+    if media:
+        lines.append('}')
+    lines.extend(_custom_rules(classes))
+    return '\n'.join(lines) + '\n'
+
+
+def unknown_classes(paths, root_dir=ROOT_DIR):
+    """{class: file} for the class names of ``paths`` that get no rule here and no <style> of them defines."""
+    texts = OrderedDict()
+    for path in paths:
+        with io.open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            texts[path] = f.read()
+    defined = set(CSS_CLASS_RE.findall(CUSTOM_CSS + '\n'.join(STYLE_RE.findall('\n'.join(texts.values())))))
+    unknown = {}
+    for path, text in texts.items():
+        names = [m.group(1) for m in CLASS_ATTR_RE.finditer(text)]
+        names.extend(n for m in CLASS_LIST_RE.finditer(text) for n in re.findall(r'["\']([^"\']*)["\']', m.group(1)))
+        for token in ' '.join(names).split():
+            if ('$' in token or '{' in token or token in defined or token in FOREIGN_CLASSES
+                    or token.startswith('fa-') or token == 'container' or rule(token) is not None):
+                continue
+            unknown.setdefault(token, os.path.relpath(path, root_dir))
+    return unknown
+
+
+def check_classes(paths, root_dir=ROOT_DIR):
+    """Raise ValueError if a page or template uses a class the stylesheet would lack."""
+    unknown = unknown_classes(paths, root_dir)
+    if unknown:
+        raise ValueError('no CSS rule for {}; add the utility to tailwind_css.py or define the class in a '
+                         '<style>'.format(', '.join('{} ({})'.format(t, unknown[t]) for t in sorted(unknown))))
+
+
+# -- pages -----------------------------------------------------------------------
+
+CDN_RE = re.compile(r'[ \t]*<script src="https://cdn\.tailwindcss\.com[^"]*"></script>[ \t]*\n?')
+CONFIG_RE = re.compile(r'[ \t]*<script>\s*tailwind\.config\s*=[\s\S]*?</script>[ \t]*\n?')
+TAILWIND_STYLE_RE = re.compile(r'[ \t]*<style type="text/tailwindcss">([\s\S]*?)</style>[ \t]*\n?')
+LINK_RE = re.compile(r'<link rel="stylesheet" href="((?:\.\./)*)tailwind\.[0-9a-f]{12}\.css">')
+LAYER_RE = re.compile(r'@layer\s+[\w-]+\s*\{')
+
+
+def _compact(css):
+    return re.sub(r'\s+', ' ', css).strip()
+
+
+def split_rules(css):
+    """Top-level rules of ``css``, the contents of @layer blocks unwrapped."""
+    rules = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(css):
+        m = LAYER_RE.match(css, i) if not depth else None
+        if m:
+            i = start = m.end()
+            depth = 0
+            continue
+        ch = css[i]
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            if depth == 0:
+                start = i + 1  # end of an unwrapped @layer block
+            else:
+                depth -= 1
+                if depth == 0:
+                    rules.append(css[start:i + 1].strip())
+                    start = i + 1
+        i += 1
+    return [r for r in rules if r]
+
+
+def _same_rule(css):
+    """``css`` with formatting differences (spaces, leading zeros, last semicolon) removed, for comparing rules."""
+    css = re.sub(r'\s*([{};:,()])\s*', r'\1', _compact(css))
+    return re.sub(r'(?<![\d.])0\.(?=\d)', '.', css).replace(';}', '}')
+
+
+def _dedent(rule_text, indent):
+    """Re-indent a rule from split_rules(): its closing line's indentation is the rule's own."""
+    lines = rule_text.split('\n')
+    base = len(lines[-1]) - len(lines[-1].lstrip(' ')) if len(lines) > 1 else 0
+    out = [indent + lines[0]]
+    for line in lines[1:]:
+        cut = min(base, len(line) - len(line.lstrip(' ')))
+        out.append(indent + line[cut:] if line.strip() else '')
+    return '\n'.join(out)
+
+
+def link_page(html, href):
+    """``html`` loading ``href`` instead of the Tailwind CDN (unchanged if it uses neither)."""
+    m = LINK_RE.search(html)
+    if m:
+        return html[:m.start()] + '<link rel="stylesheet" href="{}">'.format(href) + html[m.end():]
+    if not CDN_RE.search(html):
+        return html
+    head_end = html.find('</head>')
+    if head_end == -1:
+        return html
+    shared = set(_same_rule(r) for r in split_rules(CUSTOM_CSS))
+    own = []
+    for block in TAILWIND_STYLE_RE.finditer(html):
+        own.extend(r for r in split_rules(block.group(1)) if _same_rule(r) not in shared)
+    head, rest = html[:head_end], html[head_end:]
+    head = TAILWIND_STYLE_RE.sub('', CONFIG_RE.sub('', CDN_RE.sub('', head)))
+    line_start = head.rfind('\n') + 1
+    if head[line_start:].strip():
+        # minified page: no line of its own for </head>
+        tags = '<link rel="stylesheet" href="{}">'.format(href)
+        if own:
+            tags += '<style>{}</style>'.format(''.join(_compact(r) for r in own))
+        return head + tags + rest
+    indent = head[line_start:] + '    '
+    tags = indent + '<link rel="stylesheet" href="{}">\n'.format(href)
+    if own:
+        tags += indent + '<style>\n' + '\n'.join(_dedent(r, indent + '    ') for r in own) + '\n' + indent + '</style>\n'
+    return head[:line_start] + tags + head[line_start:] + rest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check that the static stylesheet has a rule for every class '
+                                                 'of the pages.')
+    parser.add_argument('--root', default=ROOT_DIR)
+    args = parser.parse_args(argv)
+    root_dir = os.path.abspath(args.root)
+    paths = source_paths(root_dir)
+    css = generate(scan(paths))
+    print('{} bytes of CSS from {} files'.format(len(css.encode('utf-8')), len(paths)))
+    try:
+        check_classes(paths, root_dir)
+    except ValueError as e:
+        sys.exit(str(e))
+    print('every class has a rule')
+
+
+if __name__ == '__main__':
+    main()
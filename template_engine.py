@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Small compiled template engine for the site pages.
+
+Syntax (a Jinja-like subset):
+    {{ item.title }}            value, HTML-escaped
+    {{ fragments.nav|safe }}    value inserted as-is
+    {% if page.quote %}...{% else %}...{% endif %}   (``not`` allowed)
+    {% for card in related %}...{% endfor %}
+    {% extends "base.html" %} / {% block content %}...{% endblock %}
+
+A line holding only {% %} tags is dropped entirely, so block structure does
+not leave blank lines in the output.  Each template is compiled once to Python
+functions (one per block plus the page body) and cached by the loader; a child
+template renders through its parent with its own blocks swapped in.
+"""
+import io
+import os
+import re
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(ROOT_DIR, 'templates')
+
+TOKEN_RE = re.compile(r'\{\{\s*(.*?)\s*\}\}|\{%\s*(.*?)\s*%\}', re.S)
+TAG_LINE_RE = re.compile(r'^[ \t]*((?:\{%.*?%\}[ \t]*)+)\r?\n', re.M)
+PATH_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z0-9_]+)*$')
+NAME_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class TemplateError(Exception):
+    pass
+
+
+def escape(value):
+    if value is None:
+        return ''
+    s = value if isinstance(value, str) else str(value)
+    return s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def to_text(value):
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+
+def lookup(obj, key):
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(key)
+    if isinstance(obj, (list, tuple)) and key.isdigit():
+        idx = int(key)
+        return obj[idx] if idx < len(obj) else None
+    return getattr(obj, key, None)
+
+
+class _Compiler(object):
+    """Turns a token stream into Python source for one template."""
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = TAG_LINE_RE.sub(lambda m: m.group(1).rstrip(), source)
+        self.parent = None
+        self.blocks = {}  # name -> list of code lines
+
+    def compile(self):
+        body = self._parse(self._tokens(), [], 1, end=())
+        lines = ['def render_root(_ctx, _blocks):', '    _out = []']
+        lines += body[0] or []
+        lines += ['    return "".join(_out)', '']
+        for name, block_lines in self.blocks.items():
+            lines.append('def block_{}(_ctx, _blocks):'.format(name))
+            lines.append('    _out = []')
+            lines += block_lines
+            lines += ['    return "".join(_out)', '']
+        return '\n'.join(lines)
+
+    def _tokens(self):
+        pos = 0
+        for m in TOKEN_RE.finditer(self.source):
+            if m.start() > pos:
+                yield ('text', self.source[pos:m.start()])
+            if m.group(1) is not None:
+                yield ('var', m.group(1))
+            else:
+                yield ('tag', m.group(2))
+            pos = m.end()
+        if pos < len(self.source):
+            yield ('text', self.source[pos:])
+
+    def _expr(self, expr, scope):
+        expr = expr.strip()
+        negate = False
+        if expr.startswith('not '):
+            negate, expr = True, expr[4:].strip()
+        if not PATH_RE.match(expr):
+            raise TemplateError('{}: unsupported expression {!r}'.format(self.name, expr))
+        parts = expr.split('.')
+        if parts[0] in scope:
+            code = 'l_' + parts[0]
+        else:
+            code = '_ctx.get({!r})'.format(parts[0])
+        for part in parts[1:]:
+            code = '_lookup({}, {!r})'.format(code, part)
+        return 'not ' + code if negate else code
+
+    def _parse(self, tokens, scope, depth, end):
+        """Emit code until one of the ``end`` tags; returns (lines, end_tag)."""
+        pad = '    ' * depth
+        lines = []
+        for kind, value in tokens:
+            if kind == 'text':
+                lines.append('{}_out.append({!r})'.format(pad, value))
+            elif kind == 'var':
+                expr, _, filt = value.partition('|')
+                filt = filt.strip()
+                code = self._expr(expr, scope)
+                if filt == 'safe':
+                    lines.append('{}_out.append(_text({}))'.format(pad, code))
+                elif filt in ('', 'e', 'escape'):
+                    lines.append('{}_out.append(_escape({}))'.format(pad, code))
+                else:
+                    raise TemplateError('{}: unknown filter {!r}'.format(self.name, filt))
+            else:
+                word, _, rest = value.partition(' ')
+                rest = rest.strip()
+                if word in end:
+                    return lines, word
+                if word == 'extends':
+                    self.parent = rest.strip('"\'')
+                elif word == 'block':
+                    if not NAME_RE.match(rest):
+                        raise TemplateError('{}: bad block name {!r}'.format(self.name, rest))
+                    if scope:
+                        raise TemplateError('{}: block {!r} inside a loop'.format(self.name, rest))
+                    block_lines, _ = self._parse(tokens, scope, 1, end=('endblock',))
+                    self.blocks[rest] = block_lines
+                    lines.append('{}_out.append(_blocks[{!r}](_ctx, _blocks))'.format(pad, rest))
+                elif word == 'if':
+                    lines.append('{}if {}:'.format(pad, self._expr(rest, scope)))
+                    inner, stop = self._parse(tokens, scope, depth + 1, end=('else', 'endif'))
+                    lines += inner or [pad + '    pass']
+                    if stop == 'else':
+                        lines.append(pad + 'else:')
+                        inner, stop = self._parse(tokens, scope, depth + 1, end=('endif',))
+                        lines += inner or [pad + '    pass']
+                    if stop != 'endif':
+                        raise TemplateError('{}: unclosed if'.format(self.name))
+                elif word == 'for':
+                    m = re.match(r'^([A-Za-z_][A-Za-z0-9_]*)\s+in\s+(.+)$', rest)
+                    if not m:
+                        raise TemplateError('{}: bad for tag {!r}'.format(self.name, value))
+                    var = m.group(1)
+                    lines.append('{}for l_{} in ({} or ()):'.format(pad, var, self._expr(m.group(2), scope)))
+                    inner, stop = self._parse(tokens, scope + [var], depth + 1, end=('endfor',))
+                    if stop != 'endfor':
+                        raise TemplateError('{}: unclosed for'.format(self.name))
+                    lines += inner or [pad + '    pass']
+                else:
+                    raise TemplateError('{}: unknown tag {!r}'.format(self.name, word))
+        if end:
+            raise TemplateError('{}: missing {}'.format(self.name, ' / '.join(end)))
+        return lines, None
+
+
+class Template(object):
+    def __init__(self, name, source, loader):
+        self.name = name
+        self.loader = loader
+        compiler = _Compiler(name, source)
+        code = compiler.compile()
+        namespace = {'_escape': escape, '_text': to_text, '_lookup': lookup}
+        exec(compile(code, '<template {}>'.format(name), 'exec'), namespace)
+        self.parent_name = compiler.parent
+        self.blocks = dict((b, namespace['block_' + b]) for b in compiler.blocks)
+        self._root = namespace['render_root']
+
+    def _render(self, ctx, blocks):
+        merged = dict(self.blocks)
+        merged.update(blocks)
+        if self.parent_name:
+            return self.loader.get(self.parent_name)._render(ctx, merged)
+        return self._root(ctx, merged)
+
+    def render(self, ctx=None, **kwargs):
+        context = dict(ctx or {})
+        context.update(kwargs)
+        return self._render(context, {})
+
+
+class TemplateLoader(object):
+    """Compiles templates from ``directory`` on first use and keeps them for the process."""
+
+    def __init__(self, directory=TEMPLATE_DIR):
+        self.directory = directory
+        self._cache = {}
+
+    def get(self, name):
+        tpl = self._cache.get(name)
+        if tpl is None:
+            with io.open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                tpl = self._cache[name] = Template(name, f.read(), self)
+        return tpl
+
+    def render(self, name, ctx=None, **kwargs):
+        return self.get(name).render(ctx, **kwargs)
+
+
+loader = TemplateLoader()
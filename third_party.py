@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Google Analytics, AdSense and favicon tags of the pages.
+
+The tags were added by PowerShell scripts (apply_ga.ps1, apply_adsense.ps1,
+apply_favicon.ps1 and their cn variants) that pasted the GA and adsense
+snippets before </head>: gtag.js and adsbygoogle.js were discovered with the
+page's own resources and competed with them for the first paint.
+build_site.py's scripts stage does it in Python for both trees, from
+third_party.json:
+
+    {
+      "loading": "load",                  default strategy of the scripts
+      "interaction_timeout_ms": 5000,     "interaction" scripts load anyway this long after load (0: never)
+      "gtag": {"id": "G-..."},            each may set its own "loading"
+      "adsense": {"client": "ca-pub-...", "loading": "interaction"},
+      "favicon": "favicon.ico"
+    }
+
+with one of the strategies
+
+    async        <script async src=...> tags, as the snippets had them
+    load         inserted by a small inline loader once the page has loaded
+    interaction  inserted on the first pointer, key, touch or scroll event
+
+gtag() and the dataLayer are defined right away in every case, so calls made
+before gtag.js arrives are queued as before.  link_page() removes the tags
+of an earlier run or of the old snippets wherever they are and writes one
+block at the end of <head> (the loader script carries id="third-party", so
+it is found again in minified pages too); a favicon link is only added to
+pages that have none.  Running it again changes nothing.
+
+    python build_site.py --only scripts
+    python third_party.py               (prints the block it writes)
+"""
+import argparse
+import io
+import json
+import os
+import re
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = 'third_party.json'
+STRATEGIES = ('async', 'load', 'interaction')
+SCRIPT_ID = 'third-party'
+
+GTAG_SRC = 'https://www.googletagmanager.com/gtag/js?id={id}'
+ADSENSE_SRC = 'https://pagead2.googlesyndication.com/pagead/js/adsbygoogle.js?client={client}'
+GTAG_INIT = ("window.dataLayer = window.dataLayer || [];\n"
+             "function gtag(){{dataLayer.push(arguments);}}\n"
+             "gtag('js', new Date());\n"
+             "gtag('config', '{id}');")
+# [src, crossorigin] lists per strategy, inserted by the page once it is time
+LOADER = '''(function () {{
+    var onLoad = {load}, onInteraction = {interaction}, timeout = {timeout};
+    var events = ['pointerdown', 'keydown', 'touchstart', 'scroll'];
+    function add(list) {{
+        list.splice(0).forEach(function (s) {{
+            var el = document.createElement('script');
+            el.async = true;
+            el.src = s[0];
+            if (s[1]) el.crossOrigin = 'anonymous';
+            document.head.appendChild(el);
+        }});
+    }}
+    function interacted() {{
+        events.forEach(function (e) {{ removeEventListener(e, interacted, true); }});
+        add(onInteraction);
+    }}
+    if (onInteraction.length) {{
+        events.forEach(function (e) {{ addEventListener(e, interacted, {{capture: true, passive: true}}); }});
+    }}
+    function loaded() {{
+        add(onLoad);
+        if (timeout && onInteraction.length) setTimeout(interacted, timeout);
+    }}
+    if (document.readyState === 'complete') loaded(); else addEventListener('load', loaded);
+}})();'''
+
+# what the old snippets and earlier runs left in the pages
+OLD_TAG_RES = [re.compile(p) for p in (
+    r'<!--\s*Google tag \(gtag\.js\)\s*-->',
+    r'<script\s[^>]*src="https://www\.googletagmanager\.com/gtag/js[^"]*"[^>]*>\s*</script>',
+    r'<script>(?:(?!</script>)[\s\S]){0,400}?gtag\(\s*\'config\'(?:(?!</script>)[\s\S]){0,100}?</script>',
+    r'<script\s[^>]*src="https://pagead2\.googlesyndication\.com/pagead/js/adsbygoogle\.js[^"]*"[^>]*>\s*</script>',
+    r'<script id="{}">[\s\S]*?</script>'.format(SCRIPT_ID),
+)]
+ICON_LINK_RE = re.compile(r'<link\s[^>]*rel="(?:shortcut )?icon"[^>]*>', re.IGNORECASE)
+
+
+def load_config(root_dir=ROOT_DIR):
+    with io.open(os.path.join(root_dir, CONFIG_FILE), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    for name in ('gtag', 'adsense'):
+        if config.get(name):
+            loading = config[name].get('loading', config.get('loading', 'load'))
+            if loading not in STRATEGIES:
+                raise ValueError('{}: unknown loading strategy {!r} for {} (one of {})'.format(
+                    CONFIG_FILE, loading, name, ', '.join(STRATEGIES)))
+    return config
+
+
+def _scripts(config):
+    """[(src, crossorigin, strategy)] of the external scripts in ``config``."""
+    default = config.get('loading', 'load')
+    scripts = []
+    if config.get('gtag'):
+        scripts.append((GTAG_SRC.format(id=config['gtag']['id']), False, config['gtag'].get('loading', default)))
+    if config.get('adsense'):
+        scripts.append((ADSENSE_SRC.format(client=config['adsense']['client']), True,
+                        config['adsense'].get('loading', default)))
+    return scripts
+
+
+def render_tags(config):
+    """The lines of the block written before </head>."""
+    lines = []
+    scripts = _scripts(config)
+    for src, crossorigin, strategy in scripts:
+        if strategy == 'async':
+            lines.append('<script async src="{}"{}></script>'.format(src, ' crossorigin="anonymous"' if crossorigin
+                                                                    else ''))
+    body = []
+    if config.get('gtag'):
+        body.append(GTAG_INIT.format(id=config['gtag']['id']))
+    deferred = dict((s, [[src, crossorigin] for src, crossorigin, strategy in scripts if strategy == s])
+                    for s in ('load', 'interaction'))
+    if deferred['load'] or deferred['interaction']:
+        body.append(LOADER.format(load=json.dumps(deferred['load']), interaction=json.dumps(deferred['interaction']),
+                                  timeout=int(config.get('interaction_timeout_ms') or 0)))
+    if body:
+        code = '\n'.join(body).split('\n')
+        lines.append('<script id="{}">\n{}\n</script>'.format(SCRIPT_ID, '\n'.join('    ' + l for l in code)))
+    return lines
+
+
+def link_page(html, lines, favicon_href=None):
+    """``html`` with the tags of ``lines`` (render_tags()) at the end of <head> instead of any earlier ones."""
+    head_end = html.find('</head>')
+    if head_end == -1:
+        return html
+    head, rest = html[:head_end], html[head_end:]
+    for tag_re in OLD_TAG_RES:
+        head = tag_re.sub('\0', head)
+    # drop the lines the removed tags stood on
+    head = re.sub(r'\n[ \t]*\0(?:[ \t]*\0)*[ \t]*(?=\n)', '', head).replace('\0', '')
+    if favicon_href and not ICON_LINK_RE.search(head):
+        lines = ['<link rel="icon" href="{}">'.format(favicon_href)] + list(lines)
+    line_start = head.rfind('\n') + 1
+    if head[line_start:].strip():
+        # minified page: </head> follows the last tag directly
+        return head + ''.join(lines) + rest
+    indent = head[line_start:] + '    '
+    block = ''.join(indent + line.replace('\n', '\n' + indent) + '\n' for line in lines)
+    block = re.sub(r'\n[ \t]+(?=\n)', '\n', block)
+    return head[:line_start] + block + head[line_start:] + rest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Show the tags the scripts stage of build_site.py writes.')
+    parser.add_argument('--root', default=ROOT_DIR)
+    args = parser.parse_args(argv)
+    for line in render_tags(load_config(os.path.abspath(args.root))):
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@ Features:
 - Translates visible text in a safe set of tags: title, h1-h6, p, li, span, a, blockquote, button, small, strong, em, label, figcaption
 - Translates common attributes: alt, title, aria-label, placeholder, content (for meta description)
 - Preserves HTML structure and spacing
+- Collects segments across files, dedupes them and sends size-limited batches
 
 Translation backends (auto-detected by environment variables):
 - DeepL: set DEEPL_API_KEY
@@ -15,22 +16,19 @@ Translation backends (auto-detected by environment variables):
 
 If no backend keys are present, the script will skip translation and print guidance.
 """
-from __future__ import print_function
 import os
 import re
-import json
-import uuid
 import glob
-try:
-    # Python 3
-    from urllib.request import Request, urlopen
-    from urllib.error import HTTPError
-except Exception:
-    # Python 2
-    from urllib2 import Request, urlopen, HTTPError  # type: ignore
+import sys
+from build_manifest import BuildManifest, code_version, hash_inputs
+from translation_memory import get_memory, report as report_memory
+from edit_buffer import EditBuffer
+from translation_segments import SegmentCollector
+from translation_client import TranslationClient, client_from_env, report as report_client
 
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_STAGE = 'translate_full_content_en'
 
 
 TAG_TEXT_PATTERN = re.compile(
@@ -54,161 +52,148 @@ def translate_texts(texts):
     if not texts:
         return []
 
-    deepl_key = os.environ.get('DEEPL_API_KEY')
-    az_key = os.environ.get('AZURE_TRANSLATOR_KEY')
-    az_ep = os.environ.get('AZURE_TRANSLATOR_ENDPOINT')
-
-    if deepl_key:
-        return translate_deepl(texts, deepl_key)
-    if az_key and az_ep:
-        return translate_azure(texts, az_key, az_ep)
+    # Backend from DEEPL_API_KEY / AZURE_TRANSLATOR_*; batches go out concurrently with retries
+    client = client_from_env()
+    if client is None:
+        # No backend available, return original
+        return texts
 
-    # No backend available, return original
-    return texts
+    # Known strings come from the translation memory, only new ones hit the API
+    memory = get_memory()
+    if memory is None:
+        return client.translate(texts)
+    return memory.translate(client.backend, 'EN', texts, client.translate)
 
 
 def translate_deepl(texts, api_key):
-    url = 'https://api-free.deepl.com/v2/translate'
-    # Build form data
-    params = [('auth_key', api_key), ('target_lang', 'EN')]
-    for t in texts:
-        params.append(('text', t))
-    body = '&'.join(['{}={}'.format(k, _percent_encode(v)) for k, v in params])
-    req = Request(url, data=body.encode('utf-8'), headers={'Content-Type': 'application/x-www-form-urlencoded'})
-    try:
-        resp = urlopen(req)
-        data = json.loads(resp.read().decode('utf-8', 'ignore'))
-        trans = [item['text'] for item in data.get('translations', [])]
-        # pad if mismatch
-        if len(trans) != len(texts):
-            trans = trans + texts[len(trans):]
-        return trans
-    except HTTPError as e:
-        print('DeepL error:', e)
-        return texts
-    except Exception as e:
-        print('DeepL error:', e)
-        return texts
+    return TranslationClient('deepl', api_key, os.environ.get('DEEPL_API_URL')).translate(texts)
 
 
 def translate_azure(texts, api_key, endpoint):
     # Azure Translator v3.0
-    url = endpoint.rstrip('/') + '/translate?api-version=3.0&to=en'
-    payload = [{"text": t} for t in texts]
-    body = json.dumps(payload).encode('utf-8')
-    headers = {
-        'Ocp-Apim-Subscription-Key': api_key,
-        'Content-Type': 'application/json',
-        'X-ClientTraceId': str(uuid.uuid4())
-    }
-    req = Request(url, data=body, headers=headers)
-    try:
-        resp = urlopen(req)
-        data = json.loads(resp.read().decode('utf-8', 'ignore'))
-        result = []
-        for item in data:
-            translations = item.get('translations') or []
-            if translations:
-                result.append(translations[0].get('text', ''))
-            else:
-                result.append('')
-        if len(result) != len(texts):
-            result = result + texts[len(result):]
-        return result
-    except HTTPError as e:
-        print('Azure error:', e)
-        return texts
-    except Exception as e:
-        print('Azure error:', e)
-        return texts
-
-
-def _percent_encode(value):
-    try:
-        from urllib.parse import quote_plus  # py3
-    except Exception:
-        from urllib import quote_plus  # py2
-    if isinstance(value, bytes):
-        value = value.decode('utf-8', 'ignore')
-    return quote_plus(value)
+    return TranslationClient('azure', api_key, endpoint).translate(texts)
 
 
 def update_lang_attr(html):
     return re.sub(r'(<html\s+[^>]*?lang=\")zh(?:-CN)?(\")', r'\1en\2', html, flags=re.IGNORECASE)
 
 
+META_DESCRIPTION_PATTERN = re.compile(r'(<meta\s+name=\"description\"\s+content=\")(.*?)\"', re.IGNORECASE)
+ATTR_PATTERNS = [(attr, re.compile(r'\s' + attr + r'=\"(?P<val>[^\"]+)\"', re.IGNORECASE)) for attr in ATTRS_TO_TRANSLATE]
+
+# How many files share one collect/translate/apply round in process_files
+FILES_PER_ROUND = 200
+
+
+def collect_segments(html, kinds=('attr', 'text', 'meta')):
+    """
+    Find every translatable segment of a page: attribute values, simple text
+    nodes and the meta description.  Returns (start, end, prefix, text, suffix)
+    spans over ``html``; the span is replaced by prefix + translation + suffix.
+    """
+    segments = []
+    if 'attr' in kinds:
+        for attr, pattern in ATTR_PATTERNS:
+            for m in pattern.finditer(html):
+                if has_chinese(m.group('val')):
+                    segments.append((m.start(), m.end(), ' {}="'.format(attr), m.group('val'), '"'))
+    if 'text' in kinds:
+        for m in TAG_TEXT_PATTERN.finditer(html):
+            text = m.group('text')
+            if has_chinese(text.strip()):
+                segments.append((m.start('text'), m.end('text'), '', text, ''))
+    if 'meta' in kinds:
+        for m in META_DESCRIPTION_PATTERN.finditer(html):
+            if has_chinese(m.group(2)):
+                segments.append((m.start(2), m.end(2), '', m.group(2), ''))
+    segments.sort(key=lambda seg: seg[0])
+    return segments
+
+
+def apply_segments(html, segments, translations):
+    """Splice translations (one per segment) into ``html`` in a single pass."""
+    buf = EditBuffer(html)
+    for (start, end, prefix, _, suffix), new_text in zip(segments, translations):
+        buf.replace(start, end, prefix + new_text + suffix)
+    # overlapping matches: the earlier segment wins
+    return buf.render(skip_overlaps=True)
+
+
+def _translate_segments(html, kinds):
+    segments = collect_segments(html, kinds)
+    if not segments:
+        return html
+    collector = SegmentCollector()
+    refs = [collector.add(seg[3]) for seg in segments]
+    collector.translate(translate_texts)
+    return apply_segments(html, segments, [collector.get(r) for r in refs])
+
+
 def translate_attributes(html):
-    # Translate specific attributes when they contain Chinese
-    def repl(m):
-        before = m.group(0)
-        attr = m.group('attr')
-        val = m.group('val')
-        if has_chinese(val):
-            new_val = translate_texts([val])[0]
-            return before.replace(val, new_val)
-        return before
-
-    # Build a regex for each attribute
-    for attr in ATTRS_TO_TRANSLATE:
-        pattern = re.compile(r'\s' + attr + r'=\"(?P<val>[^\"]+)\"', re.IGNORECASE)
-        html = pattern.sub(lambda m: ' {}="{}"'.format(attr, translate_texts([m.group('val')])[0]) if has_chinese(m.group('val')) else m.group(0), html)
-    return html
+    # Translate specific attributes when they contain Chinese, one batched call per page
+    return _translate_segments(html, ('attr',))
 
 
 def translate_visible_text(html):
     # Find simple text nodes inside selected tags (no nested tags). For nested content, this will be applied iteratively but remains conservative.
-    chunks = []
-    positions = []
-    for m in TAG_TEXT_PATTERN.finditer(html):
-        text = m.group('text')
-        if has_chinese(text.strip()):
-            chunks.append(text)
-            positions.append((m.start('text'), m.end('text')))
-
-    if not chunks:
-        return html
+    return _translate_segments(html, ('text',))
 
-    translated = translate_texts(chunks)
-    # Rebuild string with replacements
-    html_list = list(html)
-    for (start, end), new_text in zip(positions, translated):
-        # replace in place preserving length changes by slicing
-        html_list[start:end] = list(new_text)
-    return ''.join(html_list)
 
-
-def process_file(path):
+def _read_html(path):
     try:
         with open(path, 'rb') as f:
             data = f.read()
         try:
-            html = data.decode('utf-8')
+            return data.decode('utf-8')
         except Exception:
-            html = data.decode('utf-8', 'ignore')
+            return data.decode('utf-8', 'ignore')
     except Exception:
-        return False
-
-    original = html
-    html = update_lang_attr(html)
-    html = translate_attributes(html)
-    html = translate_visible_text(html)
-    # Also translate <meta name="description" content="...">
-    meta_pat = re.compile(r'(<meta\s+name=\"description\"\s+content=\")(.*?)\"', re.IGNORECASE)
-    def meta_repl(m):
-        val = m.group(2)
-        if has_chinese(val):
-            t = translate_texts([val])[0]
-            return m.group(1) + t + '"'
-        return m.group(0)
-    html = meta_pat.sub(meta_repl, html)
-
-    changed = (html != original)
-    if changed:
-        with open(path, 'wb') as f:
-            f.write(html.encode('utf-8'))
+        return None
+
+
+def _failed_texts():
+    """Segments the translation backend gave up on in this process."""
+    client = client_from_env()
+    return client.failures if client is not None else {}
+
+
+def process_files(paths, incomplete=None):
+    """
+    Translate many files with shared requests: segments of every file in a
+    round are collected and deduped first, translated in batches, then
+    written back.  Returns the list of paths that changed; paths with a
+    segment that failed to translate are appended to ``incomplete``.
+    """
+    changed = []
+    for i in range(0, len(paths), FILES_PER_ROUND):
+        pages = []
+        collector = SegmentCollector()
+        for path in paths[i:i + FILES_PER_ROUND]:
+            original = _read_html(path)
+            if original is None:
+                continue
+            html = update_lang_attr(original)
+            segments = collect_segments(html)
+            refs = [collector.add(seg[3]) for seg in segments]
+            pages.append((path, original, html, segments, refs))
+        collector.translate(translate_texts)
+        failed = _failed_texts()
+        for path, original, html, segments, refs in pages:
+            if incomplete is not None and any(seg[3] in failed for seg in segments):
+                incomplete.append(path)
+            if segments:
+                html = apply_segments(html, segments, [collector.get(r) for r in refs])
+            if html != original:
+                with open(path, 'wb') as f:
+                    f.write(html.encode('utf-8'))
+                changed.append(path)
     return changed
 
 
+def process_file(path):
+    return bool(process_files([path]))
+
+
 def main():
     html_files = glob.glob(os.path.join(ROOT, '*.html'))
     if not html_files:
@@ -225,15 +210,35 @@ def main():
     if backend == 'none':
         print('No translation backend configured. Set DEEPL_API_KEY or AZURE_TRANSLATOR_KEY + AZURE_TRANSLATOR_ENDPOINT to enable translation.')
 
-    total = 0
+    # Files already processed by this code with this backend are skipped unread
+    manifest = BuildManifest(MANIFEST_STAGE)
+    digest = hash_inputs(code_version(__file__), backend)
+    force = '--force' in sys.argv[1:]
+
+    skipped = 0
+    pending = []
     for p in html_files:
         if os.path.basename(p).lower().startswith('privacy'):
             # still process; requirement is all root-level html
             pass
-        if process_file(p):
-            total += 1
-
-    print('Processed {} files{}.'.format(total, '' if backend != 'none' else ' (no-op without API key)'))
+        if not force and manifest.is_fresh(p, digest):
+            skipped += 1
+            continue
+        pending.append(p)
+    # Segments of all pending files are collected and translated together
+    incomplete = []
+    total = len(process_files(pending, incomplete))
+    # pages with untranslated segments are retried on the next run
+    for p in pending:
+        if p not in incomplete:
+            manifest.record(p, digest)
+    manifest.save()
+
+    print('Processed {} files{}, {} unchanged skipped.'.format(total, '' if backend != 'none' else ' (no-op without API key)', skipped))
+    if incomplete:
+        print('{} files with failed segments are not recorded and will be retried.'.format(len(incomplete)))
+    report_memory()
+    report_client()
 
 
 if __name__ == '__main__':
@@ -1,6 +1,5 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-from __future__ import print_function
 """
 Translate chinese fields in nba.json to English.
 
@@ -8,8 +7,13 @@ Behavior:
 - Reads nba.json from project root
 - Backs up to nba_zh_backup.json (once per run if not exists)
 - Translates per-item fields: title, detail (zh -> en)
+- Sends distinct strings in batches within the backend's request limits
 - Preserves list length and object key order
-- Writes back to nba.json with 2-space indentation
+- Streams items in rounds of ITEMS_PER_ROUND (item_store), constant memory
+- Writes back to nba.json with 2-space indentation (keeps a UTF-8 BOM),
+  folding in and emptying its change log (nba.json.changes)
+- --data PATH for another file (a .jsonl works too); --resume-from ID starts
+  at that item after an interrupted run
 
 Backends (same as HTML translation script):
 - DeepL: set DEEPL_API_KEY
@@ -19,22 +23,22 @@ If no backend keys are present, the script will print guidance and exit without
 """
 
 import os
-import json
-import uuid
 import io
-from collections import OrderedDict
-try:
-    # Py3
-    from urllib.request import Request, urlopen
-    from urllib.error import HTTPError
-except Exception:
-    # Py2
-    from urllib2 import Request, urlopen, HTTPError  # type: ignore
+import sys
+import itertools
+from build_manifest import BuildManifest, code_version, hash_inputs
+from change_log import ChangeLog
+from item_store import argv_option, iter_items, report_interrupted, rewrite_items
+from translation_memory import get_memory, report as report_memory
+from translation_client import TranslationClient, client_from_env, report as report_client
 
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 JSON_PATH = os.path.join(ROOT, 'nba.json')
 BACKUP_PATH = os.path.join(ROOT, 'nba_zh_backup.json')
+MANIFEST_STAGE = 'translate_nba_json_en'
+# items whose strings are collected and translated together
+ITEMS_PER_ROUND = 500
 
 
 def has_chinese(s):
@@ -50,67 +54,22 @@ def has_chinese(s):
 def translate_texts(texts):
     if not texts:
         return []
-    deepl_key = os.environ.get('DEEPL_API_KEY')
-    az_key = os.environ.get('AZURE_TRANSLATOR_KEY')
-    az_ep = os.environ.get('AZURE_TRANSLATOR_ENDPOINT')
-    if deepl_key:
-        return translate_deepl(texts, deepl_key)
-    if az_key and az_ep:
-        return translate_azure(texts, az_key, az_ep)
-    return None  # signal no backend
+    client = client_from_env()
+    if client is None:
+        return None  # signal no backend
+
+    memory = get_memory()
+    if memory is None:
+        return client.translate(texts)
+    return memory.translate(client.backend, 'EN', texts, client.translate)
 
 
 def translate_deepl(texts, api_key):
-    url = 'https://api-free.deepl.com/v2/translate'
-    params = [('auth_key', api_key), ('target_lang', 'EN')]
-    for t in texts:
-        params.append(('text', t))
-    body = '&'.join(['{}={}'.format(k, _percent_encode(v)) for k, v in params])
-    req = Request(url, data=body.encode('utf-8'), headers={'Content-Type': 'application/x-www-form-urlencoded'})
-    try:
-        resp = urlopen(req)
-        data = json.loads(resp.read().decode('utf-8', 'ignore'))
-        trans = [item['text'] for item in data.get('translations', [])]
-        if len(trans) != len(texts):
-            trans = trans + texts[len(trans):]
-        return trans
-    except Exception as e:
-        print('DeepL error:', e)
-        return texts
+    return TranslationClient('deepl', api_key, os.environ.get('DEEPL_API_URL')).translate(texts)
 
 
 def translate_azure(texts, api_key, endpoint):
-    url = endpoint.rstrip('/') + '/translate?api-version=3.0&to=en'
-    body = json.dumps([{ 'text': t } for t in texts]).encode('utf-8')
-    headers = {
-        'Ocp-Apim-Subscription-Key': api_key,
-        'Content-Type': 'application/json',
-        'X-ClientTraceId': str(uuid.uuid4())
-    }
-    req = Request(url, data=body, headers=headers)
-    try:
-        resp = urlopen(req)
-        data = json.loads(resp.read().decode('utf-8', 'ignore'))
-        out = []
-        for item in data:
-            ts = item.get('translations') or []
-            out.append(ts[0].get('text', '') if ts else '')
-        if len(out) != len(texts):
-            out = out + texts[len(out):]
-        return out
-    except Exception as e:
-        print('Azure error:', e)
-        return texts
-
-
-def _percent_encode(value):
-    try:
-        from urllib.parse import quote_plus  # py3
-    except Exception:
-        from urllib import quote_plus  # py2
-    if isinstance(value, bytes):
-        value = value.decode('utf-8', 'ignore')
-    return quote_plus(value)
+    return TranslationClient('azure', api_key, endpoint).translate(texts)
 
 
 def backup_once():
@@ -127,29 +86,8 @@ def backup_once():
     return True
 
 
-def main():
-    if not os.path.exists(JSON_PATH):
-        print('nba.json not found in project root')
-        return
-
-    # Detect backend availability
-    has_backend = bool(os.environ.get('DEEPL_API_KEY') or (
-        os.environ.get('AZURE_TRANSLATOR_KEY') and os.environ.get('AZURE_TRANSLATOR_ENDPOINT')
-    ))
-    if not has_backend:
-        print('No translation backend configured. Set DEEPL_API_KEY or AZURE_TRANSLATOR_KEY + AZURE_TRANSLATOR_ENDPOINT')
-        return
-
-    backup_once()
-
-    with io.open(JSON_PATH, 'r', encoding='utf-8') as f:
-        data = json.loads(f.read(), object_pairs_hook=OrderedDict)
-
-    if not isinstance(data, list):
-        print('Unexpected JSON format; expected a list of items')
-        return
-
-    # Gather all chunks to translate in sequence to leverage batching
+def collect_texts(data):
+    """Chinese title/detail values of every item, with their (item_index, field_name) positions."""
     texts = []
     positions = []  # (item_index, field_name)
 
@@ -157,29 +95,92 @@ def main():
         # only process title/detail if Chinese present
         for field in ('title', 'detail'):
             val = item.get(field)
-            if isinstance(val, (str, unicode)) if 'unicode' in dir(__builtins__) else isinstance(val, str):  # py2/py3
+            if isinstance(val, str):
                 if has_chinese(val):
                     texts.append(val)
                     positions.append((i, field))
+    return texts, positions
 
-    if not texts:
-        print('No Chinese content found in nba.json')
+
+def apply_translations(data, positions, translated):
+    for (idx, field), new_val in zip(positions, translated):
+        data[idx][field] = new_val
+
+
+def translate_items(items, counts):
+    """Generator step: translate items in rounds of ITEMS_PER_ROUND and pass each one on."""
+    chunk = []
+    for item in itertools.chain(items, [None]):
+        if item is not None:
+            chunk.append(item)
+            if len(chunk) < ITEMS_PER_ROUND:
+                continue
+        if not chunk:
+            break
+        texts, positions = collect_texts(chunk)
+        if texts:
+            translated = translate_texts(texts)
+            if translated is None:
+                raise RuntimeError('No translation performed (backend missing).')
+            apply_translations(chunk, positions, translated)
+        counts['fields'] += len(texts)
+        counts['items'] += len(chunk)
+        for done in chunk:
+            yield done
+        chunk = []
+
+
+def main():
+    json_path = argv_option('--data') or JSON_PATH
+    if not os.path.exists(json_path):
+        print('{} not found'.format(json_path))
         return
 
-    translated = translate_texts(texts)
-    if translated is None:
-        print('No translation performed (backend missing).')
+    # Detect backend availability
+    has_backend = bool(os.environ.get('DEEPL_API_KEY') or (
+        os.environ.get('AZURE_TRANSLATOR_KEY') and os.environ.get('AZURE_TRANSLATOR_ENDPOINT')
+    ))
+    if not has_backend:
+        print('No translation backend configured. Set DEEPL_API_KEY or AZURE_TRANSLATOR_KEY + AZURE_TRANSLATOR_ENDPOINT')
         return
 
-    # Apply translations
-    for (idx, field), new_val in zip(positions, translated):
-        data[idx][field] = new_val
+    # Skip the whole run if nba.json has not changed since it was last translated
+    manifest = BuildManifest(MANIFEST_STAGE)
+    backend = 'deepl' if os.environ.get('DEEPL_API_KEY') else 'azure'
+    # pending change-log edits count as changes to the file
+    def inputs_digest():
+        return hash_inputs(code_version(__file__), backend, ChangeLog(json_path).fingerprint())
+    digest = inputs_digest()
+    start_id = argv_option('--resume-from')
+    if '--force' not in sys.argv[1:] and start_id is None and manifest.is_fresh(json_path, digest):
+        print('{} unchanged since last translation; nothing to do'.format(json_path))
+        return
 
-    # Write back with 2-space indentation, stable separators
-    with io.open(JSON_PATH, 'w', encoding='utf-8') as f:
-        f.write(json.dumps(data, ensure_ascii=False, indent=2, separators=(',', ': ')))
+    if json_path == JSON_PATH:
+        backup_once()
 
-    print('Translated {} fields across {} items.'.format(len(texts), len(data)))
+    # Cheap streaming pass first, so a file without Chinese is not rewritten
+    if not any(collect_texts([item])[0] for item in iter_items(json_path)):
+        print('No Chinese content found in {}'.format(json_path))
+        manifest.record(json_path, digest)
+        manifest.save()
+        return
+
+    # Items stream through in rounds; memory stays flat however long the file is
+    counts = {'items': 0, 'fields': 0}
+    try:
+        rewrite_items(json_path, lambda items: translate_items(items, counts), start_id=start_id)
+    except (Exception, KeyboardInterrupt) as e:
+        print('Translation stopped: {}'.format(e or type(e).__name__))
+        report_interrupted(e)
+        raise
+    # the rewrite emptied the change log
+    manifest.record(json_path, inputs_digest())
+    manifest.save()
+
+    print('Translated {} fields across {} items.'.format(counts['fields'], counts['items']))
+    report_memory()
+    report_client()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+Concurrent HTTP client for the DeepL / Azure translation backends.
+
+translate_texts() in the translate_* scripts used to send one blocking urlopen
+request per batch, without keep-alive, and fell back to the source text on any
+error.  TranslationClient instead:
+
+- sends batches (translation_segments.make_batches) from a thread pool, each
+  worker keeping its own persistent HTTP(S) connection;
+- limits the request rate with a token bucket shared by all workers;
+- retries 429 / 5xx / dropped connections with jittered exponential backoff,
+  honouring Retry-After;
+- re-sends only the segments of a batch that came back missing or empty, and
+  reports the ones that still fail per segment (client.failures) instead of
+  silently passing the Chinese text on.
+
+Failed segments are returned unchanged, as before, so callers keep working;
+the translation memory never stores them because they equal their source.
+
+Environment (all optional):
+    TRANSLATION_CONCURRENCY=4      parallel requests
+    TRANSLATION_RATE=0             requests per second, 0 = unlimited
+    TRANSLATION_RETRIES=4          retries per batch
+    DEEPL_API_URL=...              DeepL endpoint (default: api-free)
+
+Usage (throughput test against the local stub server):
+    python translation_client.py --backend deepl --segments 5000 --concurrency 8 \
+        --latency-ms 50 --error-rate 0.1
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from multiprocessing.pool import ThreadPool
+
+from translation_segments import BACKEND_LIMITS, SegmentCollector, make_batches
+
+import http.client as httplib
+from urllib.parse import quote_plus, urlsplit
+
+DEEPL_URL = 'https://api-free.deepl.com/v2/translate'
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class BackendError(Exception):
+    def __init__(self, message, status=None, retry_after=None):
+        Exception.__init__(self, message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status is None or self.status in RETRY_STATUS
+
+
+class TokenBucket(object):
+    """``rate`` tokens per second, at most ``capacity`` saved up; rate 0 never blocks."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate or 0)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.time()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class TranslationClient(object):
+    def __init__(self, backend, api_key, endpoint=None, target='EN', concurrency=4, rate=0,
+                 retries=4, backoff=0.5, max_backoff=30.0, timeout=60.0, limits=None):
+        self.backend = backend
+        self.api_key = api_key
+        self.target = target
+        if backend == 'deepl':
+            url = endpoint or DEEPL_URL
+        else:
+            url = endpoint.rstrip('/') + '/translate?api-version=3.0&to=' + target.lower()
+        parts = urlsplit(url)
+        self.scheme, self.netloc = parts.scheme, parts.netloc
+        self.path = parts.path + ('?' + parts.query if parts.query else '')
+        self.concurrency = max(1, concurrency)
+        self.bucket = TokenBucket(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.limits = limits or BACKEND_LIMITS[backend]
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.failures = {}
+        self.requests = 0
+        self.retried = 0
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = httplib.HTTPSConnection if self.scheme == 'https' else httplib.HTTPConnection
+            conn = self._local.conn = cls(self.netloc, timeout=self.timeout)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _post(self, body, headers):
+        self.bucket.acquire()
+        with self._lock:
+            self.requests += 1
+        conn = self._connection()
+        try:
+            conn.request('POST', self.path, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        except (httplib.HTTPException, socket.error) as e:
+            # stale keep-alive connection or network error: reconnect on retry
+            self._drop_connection()
+            raise BackendError('{}: {}'.format(type(e).__name__, e))
+        if resp.status != 200:
+            retry_after = resp.getheader('Retry-After')
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            raise BackendError('HTTP {} {}'.format(resp.status, resp.reason), resp.status, retry_after)
+        return json.loads(data.decode('utf-8', 'ignore'))
+
+    def _request(self, texts):
+        """One API call; returns a list with None for every segment that came back missing or empty."""
+        if self.backend == 'deepl':
+            params = [('auth_key', self.api_key), ('target_lang', self.target)] + [('text', t) for t in texts]
+            body = '&'.join('{}={}'.format(k, quote_plus(v.encode('utf-8'))) for k, v in params)
+            data = self._post(body.encode('utf-8'), {'Content-Type': 'application/x-www-form-urlencoded'})
+            out = [item.get('text') or None for item in data.get('translations', [])]
+        else:
+            body = json.dumps([{'text': t} for t in texts]).encode('utf-8')
+            data = self._post(body, {
+                'Ocp-Apim-Subscription-Key': self.api_key,
+                'Content-Type': 'application/json',
+                'X-ClientTraceId': str(uuid.uuid4()),
+            })
+            out = []
+            for item in data:
+                ts = item.get('translations') or []
+                out.append(ts[0].get('text') or None if ts else None)
+        return (out + [None] * len(texts))[:len(texts)]
+
+    def _sleep_before_retry(self, attempt, error):
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        delay = random.uniform(delay / 2, delay)
+        if error is not None and error.retry_after:
+            delay = max(delay, error.retry_after)
+        time.sleep(delay)
+
+    # -- batches ------------------------------------------------------------
+
+    def translate_batch(self, texts):
+        """
+        Translate one batch, retrying failed requests and re-sending only the
+        segments that came back empty.  Returns translations in order, with
+        the source text (and an entry in ``failures``) for segments that failed.
+        """
+        results = [None] * len(texts)
+        pending = list(range(len(texts)))
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.retried += 1
+                self._sleep_before_retry(attempt - 1, error)
+            error = None
+            try:
+                out = self._request([texts[i] for i in pending])
+            except BackendError as e:
+                error = e
+                if not e.retryable:
+                    break
+                continue
+            still = []
+            for i, t in zip(pending, out):
+                if t is None:
+                    still.append(i)
+                else:
+                    results[i] = t
+            pending = still
+            if not pending:
+                break
+        reason = str(error) if error is not None else 'empty translation'
+        with self._lock:
+            for i in pending:
+                self.failures[texts[i]] = reason
+        return [texts[i] if r is None else r for i, r in enumerate(results)]
+
+    def translate(self, texts):
+        """Translate ``texts`` (order kept) with concurrent, size-limited batches of the distinct strings."""
+        unique = list(SegmentCollector.dedupe(texts))
+        if not unique:
+            return []
+        batches = make_batches(unique, self.limits)
+        if self.concurrency == 1 or len(batches) == 1:
+            results = [self.translate_batch(b) for b in batches]
+        else:
+            pool = ThreadPool(min(self.concurrency, len(batches)))
+            try:
+                results = pool.map(self.translate_batch, batches, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        translated = {}
+        for batch, out in zip(batches, results):
+            translated.update(zip(batch, out))
+        return [translated[t] for t in texts]
+
+    def stats(self):
+        return {'requests': self.requests, 'retries': self.retried, 'failed_segments': len(self.failures)}
+
+    def report(self, prefix=None, limit=5):
+        prefix = prefix or '{} client'.format(self.backend)
+        s = self.stats()
+        print('{}: {} requests, {} retries, {} failed segments'.format(
+            prefix, s['requests'], s['retries'], s['failed_segments']))
+        for text, reason in list(self.failures.items())[:limit]:
+            print('  failed: {!r} ({})'.format(text[:60], reason))
+        if len(self.failures) > limit:
+            print('  ... {} more'.format(len(self.failures) - limit))
+
+
+def _env_number(name, default, cast=int):
+    value = os.environ.get(name)
+    try:
+        return cast(value) if value else default
+    except ValueError:
+        return default
+
+
+_clients = {}
+
+
+def client_from_env():
+    """Process-wide client for the backend configured in the environment, or None."""
+    deepl_key = os.environ.get('DEEPL_API_KEY')
+    az_key = os.environ.get('AZURE_TRANSLATOR_KEY')
+    az_ep = os.environ.get('AZURE_TRANSLATOR_ENDPOINT')
+    if deepl_key:
+        key = ('deepl', deepl_key, os.environ.get('DEEPL_API_URL') or DEEPL_URL)
+    elif az_key and az_ep:
+        key = ('azure', az_key, az_ep)
+    else:
+        return None
+    client = _clients.get(key)
+    if client is None:
+        client = _clients[key] = TranslationClient(
+            key[0], key[1], key[2],
+            concurrency=_env_number('TRANSLATION_CONCURRENCY', 4),
+            rate=_env_number('TRANSLATION_RATE', 0, float),
+            retries=_env_number('TRANSLATION_RETRIES', 4))
+    return client
+
+
+def report():
+    for client in _clients.values():
+        if client.requests:
+            client.report()
+
+
+def main(argv=None):
+    from translation_stub import StubServer
+    parser = argparse.ArgumentParser(description='Measure client throughput against the local stub server.')
+    parser.add_argument('--backend', choices=('deepl', 'azure'), default='deepl')
+    parser.add_argument('--segments', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0, help='requests per second, 0 = unlimited')
+    parser.add_argument('--retries', type=int, default=4)
+    parser.add_argument('--backoff', type=float, default=0.05, help='base backoff in seconds')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='stub latency per request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of stub requests answered 429/503')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='share of segments the stub leaves empty')
+    args = parser.parse_args(argv)
+
+    texts = ['\u6bb5\u843d {} \u7bee\u7403\u6bd4\u8d5b\u7684\u6545\u4e8b\u3002'.format(i) for i in range(args.segments)]
+    with StubServer(latency_ms=args.latency_ms, error_rate=args.error_rate, drop_rate=args.drop_rate) as server:
+        client = TranslationClient(args.backend, 'stub', server.endpoint(args.backend), concurrency=args.concurrency,
+                                   rate=args.rate, retries=args.retries, backoff=args.backoff)
+        start = time.time()
+        client.translate(texts)
+        elapsed = time.time() - start
+    client.report()
+    served = server.stats()
+    print('{} segments in {:.2f}s ({:.0f} segments/s); stub: {} translated requests, {} errors, {} dropped segments'.format(
+        args.segments, elapsed, args.segments / elapsed if elapsed else 0,
+        served['requests'], served['errors'], served['dropped']))
+
+
+if __name__ == '__main__':
+    main()
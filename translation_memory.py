@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent translation memory for the DeepL / Azure translate scripts.
+
+Translations are stored in SQLite (.translation-memory.sqlite next to this
+file) keyed by backend, target language and the hash of the normalized source
+text (NFC, whitespace collapsed and trimmed).  translate_texts() in the
+translate_* scripts looks every string up here first and only sends the
+misses to the backend; successful results are written through immediately, so
+an interrupted run keeps what it already paid for.
+
+A cached translation is re-wrapped in the leading/trailing whitespace of the
+string being translated, so the same label indented differently on two pages
+shares one entry.  Results identical to the source are not stored: the
+backends return the source text on errors.
+
+Environment:
+    TRANSLATION_MEMORY=<path>   use another database file
+    TRANSLATION_MEMORY=off      disable the memory
+
+Usage:
+    python translation_memory.py stats
+    python translation_memory.py prune [--older-than DAYS] [--backend NAME] [--never-hit]
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(ROOT_DIR, '.translation-memory.sqlite')
+WS_RE = re.compile(r'\s+')
+EDGE_WS_RE = re.compile(r'^(\s*)[\s\S]*?(\s*)$')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tm (
+    backend     TEXT NOT NULL,
+    target      TEXT NOT NULL,
+    src_hash    TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    created     INTEGER NOT NULL,
+    last_used   INTEGER NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (backend, target, src_hash)
+)
+'''
+
+
+def normalize(text):
+    return WS_RE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def source_hash(text):
+    return hashlib.sha256(normalize(text).encode('utf-8')).hexdigest()
+
+
+def _rewrap(original, translation):
+    lead, trail = EDGE_WS_RE.match(original).groups()
+    return lead + translation.strip() + trail
+
+
+class TranslationMemory(object):
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, backend, target, texts):
+        """Map text -> cached translation for every text found in the memory."""
+        found = {}
+        keys = dict((t, source_hash(t)) for t in set(texts))
+        hashes = list(set(keys.values()))
+        now = int(time.time())
+        with self._lock:
+            # SQLite limits bound parameters; query in slices
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    'SELECT src_hash, translation FROM tm WHERE backend = ? AND target = ? AND src_hash IN ({})'.format(
+                        ','.join('?' * len(part))),
+                    [backend, target] + part).fetchall()
+                for src_hash, translation in rows:
+                    found[src_hash] = translation
+            if found:
+                self._conn.executemany(
+                    'UPDATE tm SET hits = hits + 1, last_used = ? WHERE backend = ? AND target = ? AND src_hash = ?',
+                    [(now, backend, target, h) for h in found])
+                self._conn.commit()
+        return dict((t, found[h]) for t, h in keys.items() if h in found)
+
+    def store(self, backend, target, pairs):
+        """Write (source, translation) pairs through; pairs equal to their source are skipped."""
+        now = int(time.time())
+        rows = [(backend, target, source_hash(s), normalize(s), t.strip(), now, now)
+                for s, t in pairs if t and normalize(t) != normalize(s)]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO tm (backend, target, src_hash, source, translation, created, last_used, hits) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, 0)', rows)
+            self._conn.commit()
+        self.stored += len(rows)
+        return len(rows)
+
+    def translate(self, backend, target, texts, fetch):
+        """
+        Translate ``texts`` (list, order kept) using the memory first; ``fetch``
+        is called once with the distinct misses and must return their
+        translations in the same order.  Returns None if ``fetch`` does.
+        """
+        if not texts:
+            return []
+        cached = self.lookup(backend, target, texts)
+        missing = []
+        seen = set()
+        for t in texts:
+            if t in cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+                if t not in seen:
+                    seen.add(t)
+                    missing.append(t)
+        fetched = {}
+        if missing:
+            result = fetch(missing)
+            if result is None:
+                return None
+            fetched = dict(zip(missing, result))
+            self.store(backend, target, fetched.items())
+        return [_rewrap(t, cached[t]) if t in cached else fetched.get(t, t) for t in texts]
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT backend, target, COUNT(*), SUM(hits), SUM(LENGTH(source)) FROM tm GROUP BY backend, target').fetchall()
+        return {
+            'session': {'hits': self.hits, 'misses': self.misses, 'stored': self.stored},
+            'entries': [{'backend': b, 'target': t, 'entries': n, 'hits': h or 0, 'source_chars': c or 0}
+                        for b, t, n, h, c in rows],
+        }
+
+    def prune(self, older_than_days=None, backend=None, never_hit=False):
+        """Delete entries not used for ``older_than_days`` / of ``backend`` / never hit. Returns the count."""
+        clauses, params = [], []
+        if older_than_days is not None:
+            clauses.append('last_used < ?')
+            params.append(int(time.time() - older_than_days * 86400))
+        if backend:
+            clauses.append('backend = ?')
+            params.append(backend)
+        if never_hit:
+            clauses.append('hits = 0')
+        sql = 'DELETE FROM tm' + (' WHERE ' + ' AND '.join(clauses) if clauses else '')
+        with self._lock:
+            count = self._conn.execute(sql, params).rowcount
+            self._conn.commit()
+            self._conn.execute('VACUUM')
+        return count
+
+
+_shared = {}
+
+
+def get_memory():
+    """Process-wide memory from $TRANSLATION_MEMORY (default file), or None when disabled."""
+    path = os.environ.get('TRANSLATION_MEMORY') or DEFAULT_PATH
+    if path.lower() == 'off':
+        return None
+    memory = _shared.get(path)
+    if memory is None:
+        memory = _shared[path] = TranslationMemory(path)
+    return memory
+
+
+def report(prefix='Translation memory'):
+    memory = get_memory()
+    if memory is not None and (memory.hits or memory.misses):
+        s = memory.stats()['session']
+        print('{}: {} hits, {} misses, {} stored'.format(prefix, s['hits'], s['misses'], s['stored']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or prune the translation memory.')
+    parser.add_argument('command', choices=('stats', 'prune'))
+    parser.add_argument('--older-than', type=float, default=None, help='prune: entries unused for this many days')
+    parser.add_argument('--backend', default=None, help='prune: only this backend (deepl, azure)')
+    parser.add_argument('--never-hit', action='store_true', help='prune: only entries that were never reused')
+    args = parser.parse_args(argv)
+    memory = get_memory()
+    if memory is None:
+        print('Translation memory is disabled (TRANSLATION_MEMORY=off).')
+        return
+    if args.command == 'stats':
+        entries = memory.stats()['entries']
+        if not entries:
+            print('{}: empty'.format(memory.path))
+        for e in entries:
+            print('{backend}/{target}: {entries} entries, {hits} hits, {source_chars} source chars'.format(**e))
+    else:
+        if args.older_than is None and not args.backend and not args.never_hit:
+            parser.error('prune needs --older-than, --backend and/or --never-hit')
+        count = memory.prune(args.older_than, args.backend, args.never_hit)
+        print('Pruned {} entries from {}'.format(count, memory.path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Segment collection and size-aware batching for the translate scripts.
+
+Instead of one request per string (or one unbounded request for everything),
+callers gather every segment first, dedupe identical strings, and send the
+distinct ones in batches that respect each backend's request limits:
+
+    DeepL      50 texts per request, request body under 128 KiB (form-encoded)
+    Azure v3   1000 texts per request, 50,000 characters per request
+
+A text larger than a whole batch is sent on its own.  Results are scattered
+back to every position the text was collected from.
+"""
+
+from urllib.parse import quote_plus
+
+
+def _urlencoded_size(text):
+    # '&text=' + percent-encoded UTF-8, as the DeepL client builds the form body
+    return 6 + len(quote_plus(text.encode('utf-8')))
+
+
+BACKEND_LIMITS = {
+    'deepl': {'max_texts': 50, 'max_size': 127 * 1024, 'measure': _urlencoded_size},
+    'azure': {'max_texts': 1000, 'max_size': 50000, 'measure': len},
+}
+
+
+def make_batches(texts, limits):
+    """Split ``texts`` (in order) into lists that fit ``limits``."""
+    max_texts = limits['max_texts']
+    max_size = limits['max_size']
+    measure = limits['measure']
+    batches = []
+    current, size = [], 0
+    for text in texts:
+        n = measure(text)
+        if current and (len(current) >= max_texts or size + n > max_size):
+            batches.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+class SegmentCollector(object):
+    """
+    Gathers segments from many sources; each ``add`` returns a ref that
+    ``get`` resolves once ``translate`` has run over the distinct texts.
+    """
+
+    def __init__(self):
+        self.texts = []
+        self._index = {}
+        self._results = None
+        self.added = 0
+
+    @staticmethod
+    def dedupe(texts):
+        seen = set()
+        for t in texts:
+            if t not in seen:
+                seen.add(t)
+                yield t
+
+    def add(self, text):
+        self.added += 1
+        ref = self._index.get(text)
+        if ref is None:
+            ref = self._index[text] = len(self.texts)
+            self.texts.append(text)
+        return ref
+
+    def __len__(self):
+        return len(self.texts)
+
+    def translate(self, translate_texts):
+        """Run ``translate_texts`` once over the distinct texts. Returns False if it returned None."""
+        self._results = translate_texts(self.texts) if self.texts else []
+        if self._results is None:
+            self._results = list(self.texts)
+            return False
+        return True
+
+    def get(self, ref):
+        return self._results[ref]
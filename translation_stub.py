@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Offline stand-in for the DeepL / Azure translation backends.
+
+StubTranslator has the same call shape as translate_texts(texts) in the
+translate_* scripts: a list of strings in, a list of the same length out.
+Every run of CJK characters is replaced by a deterministic ASCII token, so the
+output no longer "has Chinese" and the scripts treat it as translated.  Each
+call counts as one HTTP request; an optional per-request latency simulates the
+network so request-count regressions show up in benchmarks.
+
+    stub = StubTranslator(latency_ms=20)
+    with stub.installed(translate_full_content_en):
+        translate_full_content_en.process_file(path)
+    print(stub.stats())
+
+StubServer is the same stub behind a local HTTP server that speaks the DeepL
+(/v2/translate, form-encoded) and Azure v3 (/translate, JSON) request formats,
+with keep-alive, simulated latency and injected errors: a share of requests is
+answered 429 (with Retry-After) or 503, and a share of segments comes back
+empty.  Point the real scripts at it to test the HTTP client offline:
+
+    python translation_stub.py --port 8765 --latency-ms 50 --error-rate 0.1
+    DEEPL_API_KEY=stub DEEPL_API_URL=http://127.0.0.1:8765/v2/translate \
+        python translate_full_content_en.py
+"""
+import argparse
+import contextlib
+import json
+import random
+import re
+import threading
+import time
+import zlib
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qsl, urlsplit
+
+CJK_RUN_RE = re.compile(u'[\u3400-\u9fff\uf900-\ufaff]+')
+
+
+def fake_translate(text):
+    """Replace each CJK run by a stable token derived from its content."""
+    return CJK_RUN_RE.sub(lambda m: 'en{:08x}'.format(zlib.crc32(m.group(0).encode('utf-8')) & 0xffffffff), text)
+
+
+class StubTranslator(object):
+    def __init__(self, latency_ms=0.0, per_segment_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.per_segment = per_segment_ms / 1000.0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.segments = 0
+            self.chars = 0
+
+    def __call__(self, texts):
+        if not texts:
+            return []
+        with self._lock:
+            self.requests += 1
+            self.segments += len(texts)
+            self.chars += sum(len(t) for t in texts)
+        delay = self.latency + self.per_segment * len(texts)
+        if delay:
+            time.sleep(delay)
+        return [fake_translate(t) for t in texts]
+
+    def stats(self):
+        return {'requests': self.requests, 'segments': self.segments, 'chars': self.chars}
+
+    @contextlib.contextmanager
+    def installed(self, *modules):
+        """Temporarily route ``module.translate_texts`` of each module to this stub."""
+        saved = [(m, m.translate_texts) for m in modules]
+        try:
+            for m in modules:
+                m.translate_texts = self
+            yield self
+        finally:
+            for m, fn in saved:
+                m.translate_texts = fn
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real APIs
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload if payload is not None else {'message': self.responses[status][0]}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server.stub
+        raw = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+        path = urlsplit(self.path).path
+        if path.endswith('/v2/translate'):
+            texts = [v for k, v in parse_qsl(raw, keep_blank_values=True) if k == 'text']
+        elif path.endswith('/translate'):
+            texts = [item.get('text', '') for item in json.loads(raw or '[]')]
+        else:
+            self._send(404)
+            return
+        status, out = server.handle(texts)
+        if status == 429:
+            self._send(429, headers={'Retry-After': '{:g}'.format(server.retry_after)})
+        elif status != 200:
+            self._send(status)
+        elif path.endswith('/v2/translate'):
+            self._send(200, {'translations': [{'detected_source_language': 'ZH', 'text': t} for t in out]})
+        else:
+            self._send(200, [{'translations': [{'text': t, 'to': 'en'}]} for t in out])
+
+
+class StubServer(object):
+    """
+    Local HTTP stand-in for both translation APIs.  ``error_rate`` of the
+    requests fail (half 429, half 503); ``drop_rate`` of the segments of a
+    successful request come back empty.  Use as a context manager.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0.0, per_segment_ms=0.0,
+                 error_rate=0.0, drop_rate=0.0, retry_after=0.0, seed=0):
+        self.translator = StubTranslator(latency_ms, per_segment_ms)
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.errors = 0
+        self.dropped = 0
+        self.httpd = _ThreadingHTTPServer((host, port), _StubHandler)
+        self.httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def endpoint(self, backend):
+        """DEEPL_API_URL / AZURE_TRANSLATOR_ENDPOINT value for ``backend``."""
+        return self.url + '/v2/translate' if backend == 'deepl' else self.url
+
+    def handle(self, texts):
+        with self._lock:
+            roll = self._rng.random()
+            drops = [self._rng.random() < self.drop_rate for _ in texts]
+        if roll < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            if self.translator.latency:
+                time.sleep(self.translator.latency)
+            return (429 if roll < self.error_rate / 2 else 503), None
+        out = self.translator(texts)
+        with self._lock:
+            self.dropped += sum(drops)
+        return 200, ['' if d else t for t, d in zip(out, drops)]
+
+    def stats(self):
+        s = self.translator.stats()
+        s.update(errors=self.errors, dropped=self.dropped)
+        return s
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the stub translator over HTTP (DeepL and Azure formats).')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='latency per request')
+    parser.add_argument('--per-segment-ms', type=float, default=0.0, help='extra latency per segment')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered 429/503')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='share of segments returned empty')
+    parser.add_argument('--retry-after', type=float, default=0.0, help='Retry-After seconds sent with 429')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    server = StubServer(args.host, args.port, args.latency_ms, args.per_segment_ms,
+                        args.error_rate, args.drop_rate, args.retry_after, args.seed)
+    print('Stub translator on {}  (DeepL: {}  Azure: {})'.format(
+        server.url, server.endpoint('deepl'), server.endpoint('azure')))
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats()))
+
+
+if __name__ == '__main__':
+    main()